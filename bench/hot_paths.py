@@ -0,0 +1,264 @@
+# event_recorder/bench/hot_paths.py
+"""
+热路径基准：解码、渲染与事件持久化。结果写成 JSON，便于不同版本之间比较。
+
+    python -m event_recorder.bench.hot_paths [--only decode,render,events] [--quick]
+    python -m event_recorder.bench.hot_paths --compare 旧结果.json 新结果.json
+
+- decode：顺序读取、随机跳转、逐帧回退（VideoCore.get_frame），每个合成视频各测一次
+- render：FrameRenderer.render + PIL 封装（MainWindow.show_frame 中与 Tk 无关的部分），无需图形环境
+- events：EventManager.save_events / load_events，1k ~ 1M 个事件
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from event_recorder.core.lazy_import import lazy_import
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+
+from event_recorder.config import ACCEPTED_RESOLUTIONS, BENCH_RESULTS_DIR, BENCH_EVENT_COUNTS, BENCH_VIDEO_SECONDS
+from event_recorder.bench.synthetic import ensure_videos
+from event_recorder.core.event_logic import EventManager
+from event_recorder.core.event_store import write_events_json
+from event_recorder.core.video_core import VideoCore
+from event_recorder.gui.renderer import FrameRenderer
+
+BENCH_SUITES = ("decode", "render", "events")
+# 渲染基准的面板尺寸
+PANEL_SIZES = ((1280, 720), (1920, 1080))
+# 等待关键帧索引建立的最长时间（秒）
+_INDEX_WAIT_S = 30.0
+
+
+def _stats(samples) -> dict:
+    """单次耗时（秒）序列 -> 毫秒统计"""
+    ms = sorted(s * 1000.0 for s in samples)
+    if not ms:
+        return {"n": 0}
+    return {
+        "n": len(ms),
+        "mean_ms": statistics.fmean(ms),
+        "p50_ms": ms[len(ms) // 2],
+        "p95_ms": ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+        "max_ms": ms[-1],
+        "per_s": 1000.0 / statistics.fmean(ms) if statistics.fmean(ms) > 0 else 0.0,
+    }
+
+
+def _timed(fn, *args, **kw):
+    t = time.perf_counter()
+    out = fn(*args, **kw)
+    return time.perf_counter() - t, out
+
+
+# ---------- 解码 ----------
+def bench_decode(path: str, samples: int = 200, seed: int = 0) -> list:
+    core = VideoCore()
+    info = core.open(path)
+    deadline = time.monotonic() + _INDEX_WAIT_S
+    while core.keyframes is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    total = info['total_frames']
+    params = {"video": os.path.basename(path), "width": info['width'], "height": info['height'],
+              "fps": info['fps'], "keyframe_index": core.keyframes is not None}
+    results = []
+    try:
+        # 顺序读取
+        core.frame_cache.clear()
+        core.seek_frame(0)
+        n = min(samples, total)
+        times = [_timed(core.get_frame, i)[0] for i in range(n)]
+        results.append({"bench": "decode.sequential", "params": params, "stats": _stats(times)})
+
+        # 随机跳转（不命中缓存）
+        rng = random.Random(seed)
+        core.frame_cache.clear()
+        targets = [rng.randrange(total) for _ in range(max(1, samples // 4))]
+        times = []
+        for idx in targets:
+            core.frame_cache.clear()
+            times.append(_timed(core.get_frame, idx)[0])
+        results.append({"bench": "decode.random_seek", "params": params, "stats": _stats(times)})
+
+        # 逐帧回退：从中间位置向前走
+        core.frame_cache.clear()
+        start = total // 2
+        core.get_frame(start)
+        n = min(samples // 4, start)
+        times = [_timed(core.get_frame, start - i)[0] for i in range(1, n + 1)]
+        results.append({"bench": "decode.step_back", "params": params, "stats": _stats(times)})
+    finally:
+        core.release()
+    return results
+
+
+# ---------- 渲染 ----------
+def bench_render(width: int, height: int, samples: int = 100) -> list:
+    frame = np.random.default_rng(0).integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    overlays = [{"text": "kill", "x1": width * 0.35, "y1": height * 0.6, "x2": width * 0.65, "y2": height * 0.8}]
+    results = []
+    for panel in PANEL_SIZES:
+        for fast in (False, True):
+            renderer = FrameRenderer("#a6acb2")
+            renderer.set_overlays(overlays)
+            renderer.render(frame, (width, height), panel, fast)  # 预热：建立布局与 overlay 图层
+
+            def once():
+                buf = renderer.render(frame, (width, height), panel, fast)
+                Image.frombuffer("RGB", panel, buf, "raw", "RGB", 0, 1)
+
+            times = [_timed(once)[0] for _ in range(samples)]
+            results.append({
+                "bench": "render.show_frame",
+                "params": {"width": width, "height": height, "panel": list(panel), "fast": fast},
+                "stats": _stats(times),
+            })
+    return results
+
+
+# ---------- 事件持久化 ----------
+def _synthetic_events(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    types = ["Kill", "Assist", "Death", "ObjectiveCaptured", "Revive"]
+    for i in range(count):
+        hf = rng.randrange(0, 30 * 3600)
+        df = rng.randrange(0, 300)
+        yield {
+            "game_type": "Apex Legends", "event_type": rng.choice(types),
+            "highlight_frame": hf, "highlight_time": hf / 30.0,
+            "duration_frames": df, "duration_seconds": df / 30.0,
+            "event_text": "Headshot" if i % 3 == 0 else "", "save_path": "saved",
+            "language": "zh_CN", "comment": "",
+        }
+
+
+def bench_events(count: int) -> list:
+    tmp = tempfile.mkdtemp(prefix="event_bench_")
+    try:
+        src = os.path.join(tmp, "source.json")
+        write_events_json(src, _synthetic_events(count))
+        size = os.path.getsize(src)
+
+        mgr = EventManager(save_dir=tmp, journal=False)
+        load_s, _ = _timed(mgr.load_events, src)
+        save_s, _ = _timed(mgr.save_events, "saved.json")
+
+        journal_dir = os.path.join(tmp, "journal")
+        jm = EventManager(save_dir=journal_dir, journal=True)
+        jm.load_events(src)
+        adds = [_timed(jm.add_event, evt)[0] for evt in _synthetic_events(min(count, 1000), seed=1)]
+        compact_s, _ = _timed(jm.compact)
+        jm.close()
+
+        params = {"events": count, "file_bytes": size}
+        return [
+            {"bench": "events.load", "params": params, "stats": _stats([load_s])},
+            {"bench": "events.save", "params": params, "stats": _stats([save_s])},
+            {"bench": "events.journal_add", "params": params, "stats": _stats(adds)},
+            {"bench": "events.compact", "params": params, "stats": _stats([compact_s])},
+        ]
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ---------- 结果文件 ----------
+def _environment() -> dict:
+    env = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+    }
+    try:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env["commit"] = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=root, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        env["commit"] = None
+    return env
+
+
+def run_benchmarks(suites=BENCH_SUITES, quick: bool = False, event_counts=BENCH_EVENT_COUNTS,
+                   resolutions=None, log=print) -> dict:
+    samples = 50 if quick else 200
+    results = []
+    if "decode" in suites:
+        seconds = 3 if quick else BENCH_VIDEO_SECONDS
+        for path, w, h, fps in ensure_videos(resolutions=resolutions, seconds=seconds,
+                                             on_progress=lambda p: log(f"生成合成视频 {p}")):
+            log(f"decode {w}x{h}@{fps}")
+            results += bench_decode(path, samples)
+    if "render" in suites:
+        for w, h in resolutions or ACCEPTED_RESOLUTIONS:
+            log(f"render {w}x{h}")
+            results += bench_render(w, h, samples // 2)
+    if "events" in suites:
+        for count in event_counts:
+            if quick and count > 100_000:
+                continue
+            log(f"events {count}")
+            results += bench_events(count)
+    return {"environment": _environment(), "results": results}
+
+
+def _result_key(r: dict) -> str:
+    return r["bench"] + json.dumps(r["params"], sort_keys=True)
+
+
+def compare(old: dict, new: dict, metric: str = "p50_ms"):
+    """按 bench + params 对齐两次结果，返回 [(bench, params, 旧值, 新值, 比值), ...]"""
+    before = {_result_key(r): r for r in old["results"]}
+    rows = []
+    for r in new["results"]:
+        o = before.get(_result_key(r))
+        if o is None or metric not in o["stats"] or metric not in r["stats"]:
+            continue
+        a, b = o["stats"][metric], r["stats"][metric]
+        rows.append((r["bench"], r["params"], a, b, b / a if a else float('inf')))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="解码 / 渲染 / 事件持久化热路径基准")
+    parser.add_argument("--only", default=",".join(BENCH_SUITES), help="逗号分隔：decode,render,events")
+    parser.add_argument("--quick", action="store_true", help="缩短视频、减少采样，跳过百万级事件")
+    parser.add_argument("--out", help="结果文件路径，默认写入 BENCH_RESULTS_DIR/<时间>.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="比较两份结果文件后退出")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0], 'r', encoding='utf-8') as f:
+            old = json.load(f)
+        with open(args.compare[1], 'r', encoding='utf-8') as f:
+            new = json.load(f)
+        for bench, params, a, b, ratio in compare(old, new):
+            flag = "  ↑慢" if ratio > 1.1 else ("  ↓快" if ratio < 0.9 else "")
+            print(f"{bench:22s} {json.dumps(params, ensure_ascii=False)}  {a:9.3f} -> {b:9.3f} ms  x{ratio:.2f}{flag}")
+        return 0
+
+    suites = [s.strip() for s in args.only.split(",") if s.strip() in BENCH_SUITES]
+    report = run_benchmarks(suites, args.quick)
+    out = args.out or os.path.join(BENCH_RESULTS_DIR, time.strftime("%Y%m%d_%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+    print(f"结果已写入 {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
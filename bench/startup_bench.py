@@ -0,0 +1,120 @@
+# event_recorder/bench/startup_bench.py
+"""
+启动时间基准：在全新的子进程中重复测量，取中位数，超出预算时以非零状态退出。
+
+    python -m event_recorder.bench.startup_bench [--runs 5] [--json 结果.json]
+
+测量项：
+- import_s  导入 gui.main_window 的耗时；同时检查 cv2 / numpy / PIL 是否被提前导入
+- window_s  从开始导入到 MainWindow 首次映射到屏幕的耗时（无图形环境时跳过）
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from event_recorder.config import STARTUP_IMPORT_BUDGET_S, STARTUP_WINDOW_BUDGET_S
+
+# 启动阶段不应真正导入的模块
+HEAVY_MODULES = ("cv2", "numpy", "PIL.Image", "PIL.ImageTk", "skimage")
+
+_IMPORT_PROBE = """
+import json, time
+t0 = time.perf_counter()
+import event_recorder.gui.main_window
+t1 = time.perf_counter()
+from event_recorder.core.lazy_import import is_loaded
+print(json.dumps({"import_s": t1 - t0, "eager": [m for m in %r if is_loaded(m)]}))
+"""
+
+_WINDOW_PROBE = """
+import json, time
+import tkinter as tk
+try:
+    tk.Tk().destroy()
+except tk.TclError as e:
+    print(json.dumps({"skipped": str(e)}))
+    raise SystemExit(0)
+t0 = time.perf_counter()
+from event_recorder.gui.main_window import MainWindow
+app = MainWindow()
+app.wait_visibility()
+t1 = time.perf_counter()
+app.after_idle(app.on_close)
+app.mainloop()
+print(json.dumps({"window_s": t1 - t0}))
+"""
+
+
+def _child_env() -> dict:
+    """子进程环境：保证 event_recorder 包可被导入"""
+    pkg_parent = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (pkg_parent, env.get("PYTHONPATH")) if p)
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def _run_child(code: str) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", code], env=_child_env(),
+        capture_output=True, text=True, timeout=120
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"子进程失败（{proc.returncode}）：{proc.stderr.strip()}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run_startup_bench(runs: int = 5) -> dict:
+    """
+    :return: {"import_s", "eager", "window_s"（或 "window_skipped"）, "budget": {...}, "ok"}
+    """
+    imports = [_run_child(_IMPORT_PROBE % (HEAVY_MODULES,)) for _ in range(runs)]
+    result = {
+        "import_s": statistics.median(r["import_s"] for r in imports),
+        "eager": sorted({m for r in imports for m in r["eager"]}),
+        "budget": {"import_s": STARTUP_IMPORT_BUDGET_S, "window_s": STARTUP_WINDOW_BUDGET_S},
+    }
+    windows = []
+    for _ in range(runs):
+        r = _run_child(_WINDOW_PROBE)
+        if "skipped" in r:
+            result["window_skipped"] = r["skipped"]
+            break
+        windows.append(r["window_s"])
+    if windows:
+        result["window_s"] = statistics.median(windows)
+
+    ok = result["import_s"] <= STARTUP_IMPORT_BUDGET_S and not result["eager"]
+    if "window_s" in result:
+        ok = ok and result["window_s"] <= STARTUP_WINDOW_BUDGET_S
+    result["ok"] = ok
+    return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="测量导入耗时与主窗口出现耗时，超出预算时失败")
+    parser.add_argument("--runs", type=int, default=5, help="重复次数（取中位数）")
+    parser.add_argument("--json", help="把结果写入该 JSON 文件")
+    args = parser.parse_args(argv)
+
+    result = run_startup_bench(max(1, args.runs))
+    print(f"导入 gui.main_window：{result['import_s'] * 1000:.1f} ms（预算 {STARTUP_IMPORT_BUDGET_S * 1000:.0f} ms）")
+    if result["eager"]:
+        print(f"启动时被提前导入的重型模块：{', '.join(result['eager'])}")
+    if "window_s" in result:
+        print(f"主窗口出现：{result['window_s'] * 1000:.1f} ms（预算 {STARTUP_WINDOW_BUDGET_S * 1000:.0f} ms）")
+    else:
+        print(f"跳过主窗口测量：{result.get('window_skipped')}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=4)
+    print("通过" if result["ok"] else "超出预算")
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+# event_recorder/bench/synthetic.py
+"""
+生成基准测试用的合成视频：覆盖 config.py 中全部受支持的分辨率与帧率。
+画面为滚动的渐变 + 帧号文字 + 少量噪声，使编码器产生接近真实录像的 P 帧。
+"""
+
+import os
+
+from event_recorder.core.lazy_import import lazy_import
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+from event_recorder.config import ACCEPTED_RESOLUTIONS, ACCEPTED_FRAMERATES, BENCH_VIDEO_DIR, BENCH_VIDEO_SECONDS
+
+
+def video_name(width: int, height: int, fps: int, seconds: float) -> str:
+    return f"synthetic_{width}x{height}_{fps}fps_{int(seconds)}s.mp4"
+
+
+def make_video(path: str, width: int, height: int, fps: int, seconds: float = BENCH_VIDEO_SECONDS, seed: int = 0):
+    """写出一段合成视频（mp4v 编码）；先写临时文件，完成后改名"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp.mp4"
+    writer = cv2.VideoWriter(tmp, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise IOError(f"无法创建视频：{path}")
+    rng = np.random.default_rng(seed)
+    xs = np.linspace(0, 255, width, dtype=np.float32)
+    ys = np.linspace(0, 255, height, dtype=np.float32)
+    base = np.empty((height, width, 3), dtype=np.uint8)
+    base[..., 0] = xs[None, :]
+    base[..., 1] = ys[:, None]
+    base[..., 2] = ((xs[None, :] + ys[:, None]) / 2).astype(np.uint8)
+    noise = rng.integers(0, 16, size=(height, width, 3), dtype=np.uint8)
+    scale = height / 360.0
+    try:
+        for i in range(int(round(fps * seconds))):
+            frame = np.roll(base, shift=(i * 4) % width, axis=1)
+            frame += np.roll(noise, shift=i % 7, axis=0)
+            cv2.putText(frame, f"{i:06d}", (int(20 * scale), int(60 * scale)), cv2.FONT_HERSHEY_SIMPLEX,
+                        1.5 * scale, (255, 255, 255), max(1, int(3 * scale)), cv2.LINE_AA)
+            writer.write(frame)
+    finally:
+        writer.release()
+    os.replace(tmp, path)
+    return path
+
+
+def ensure_videos(out_dir: str = BENCH_VIDEO_DIR, resolutions=None, framerates=None,
+                  seconds: float = BENCH_VIDEO_SECONDS, on_progress=None):
+    """
+    返回 [(路径, 宽, 高, 帧率), ...]；缺失的视频就地生成，已有的直接复用。
+    :param on_progress: 可选回调 on_progress(路径)，开始生成某个视频时调用
+    """
+    videos = []
+    for width, height in resolutions or ACCEPTED_RESOLUTIONS:
+        for fps in framerates or ACCEPTED_FRAMERATES:
+            path = os.path.join(out_dir, video_name(width, height, fps, seconds))
+            if not os.path.exists(path):
+                if on_progress:
+                    on_progress(path)
+                make_video(path, width, height, fps, seconds)
+            videos.append((path, width, height, fps))
+    return videos
@@ -1,5 +1,7 @@
 # config.py
 
+import os
+
 # ------- 视频格式校验 -------
 # 支持的分辨率列表（宽，高）
 ACCEPTED_RESOLUTIONS = [
@@ -27,3 +29,178 @@ DEFAULT_LANGUAGE = 'en_US'
 
 # 默认事件持续时长（帧）
 DEFAULT_DURATION_FRAMES = 0
+
+# ------- 解码缓存 -------
+# 已解码帧 LRU 缓存的内存上限（字节），4K 帧约 27MB/帧
+FRAME_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# ------- 播放预取 -------
+# 后台预解码环形缓冲区的内存上限（字节）
+PREFETCH_MAX_BYTES = 256 * 1024 * 1024
+# 后台预解码环形缓冲区的最大帧数
+PREFETCH_MAX_FRAMES = 120
+
+# ------- 视频索引缓存 -------
+# 关键帧索引等视频旁路缓存文件的存放目录
+CACHE_DIR = os.path.join(DEFAULT_SAVE_DIR, ".cache")
+# 无关键帧索引时，目标在解码器前方不超过该帧数则顺序 grab 前进而不 seek
+SEQUENTIAL_SKIP_MAX = 30
+# 从关键帧向前解码时，目标帧之前保留到 LRU 缓存的帧数（便于随后逐帧回退）
+BACKSTEP_CACHE_FRAMES = 8
+
+# ------- 拖动跳转 -------
+# 进度条停止拖动多久（毫秒）后解码精确的全质量帧
+SEEK_SETTLE_MS = 150
+# 主线程轮询后台跳转结果的间隔（毫秒）
+SEEK_POLL_MS = 10
+
+# ------- 缩略图胶片条 -------
+# 胶片条采样间隔（秒），实际按帧率换算为每 N 帧取一张
+FILMSTRIP_INTERVAL_SECONDS = 2.0
+# 缩略图宽度（像素），高度按视频宽高比计算
+FILMSTRIP_THUMB_WIDTH = 160
+# 生成缩略图的进程数，None 表示使用全部 CPU
+FILMSTRIP_WORKERS = None
+# 进度条上方胶片条行的高度（像素）
+FILMSTRIP_ROW_HEIGHT = 40
+
+# ------- 播放调度 -------
+# 显示帧率上限；倍速播放超过该速率时跳帧（只 grab 不 retrieve）
+PLAYBACK_MAX_DISPLAY_FPS = 60
+
+# ------- 事件日志 -------
+# 是否启用预写日志：增删改立即追加到 events.json.journal，后台定期压缩为 events.json
+EVENT_JOURNAL_ENABLED = True
+# 后台压缩间隔（秒）
+EVENT_COMPACT_INTERVAL_S = 30
+# 每条日志记录后是否 fsync（更安全但更慢）
+EVENT_JOURNAL_FSYNC = False
+
+# ------- 事件时间轴 -------
+# 进度条上方事件分布条的高度（像素）
+EVENT_STRIP_HEIGHT = 6
+
+# ------- 截图/片段导出 -------
+# 并行处理的视频数（每个视频一个进程），None 表示使用全部 CPU
+EXPORT_WORKERS = None
+# 每个视频进程内写文件的线程数
+EXPORT_WRITER_THREADS = 4
+# 解码线程最多领先写线程的帧数（限制内存占用）
+EXPORT_MAX_PENDING_FRAMES = 64
+# 截图格式
+EXPORT_IMAGE_EXT = ".jpg"
+# 片段编码 FourCC
+EXPORT_CLIP_FOURCC = "mp4v"
+
+# ------- 训练数据集导出 -------
+# 导出帧的尺寸 (宽, 高)
+DATASET_FRAME_SIZE = (224, 224)
+# 每个分片文件容纳的帧数
+DATASET_SHARD_FRAMES = 1024
+# 并行写分片的进程数，None 表示使用全部 CPU
+DATASET_WORKERS = None
+
+# ------- 批量探测 -------
+# 扫描目录时视为视频的扩展名（其中不在 ACCEPTED_FORMATS 内的会被判为不支持的格式）
+PROBE_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".m4v", ".flv", ".wmv", ".webm", ".ts")
+# 探测进程数，None 表示使用全部 CPU
+PROBE_WORKERS = None
+
+# ------- 启动时间预算（bench/startup_bench.py） -------
+# 导入 gui.main_window 的耗时上限（秒）
+STARTUP_IMPORT_BUDGET_S = 0.3
+# 从开始导入到主窗口首次显示的耗时上限（秒）
+STARTUP_WINDOW_BUDGET_S = 1.0
+
+# ------- 性能基准（bench/） -------
+# 合成测试视频的存放目录（生成一次后复用）
+BENCH_VIDEO_DIR = os.path.join(CACHE_DIR, "bench_videos")
+# 基准结果（JSON）输出目录
+BENCH_RESULTS_DIR = os.path.join(DEFAULT_SAVE_DIR, "bench_results")
+# 合成视频时长（秒）
+BENCH_VIDEO_SECONDS = 10
+# 事件保存/加载基准的事件数量
+BENCH_EVENT_COUNTS = (1_000, 10_000, 100_000, 1_000_000)
+
+# ------- 性能埋点 -------
+# 启动时是否记录各阶段耗时（HUD 打开时也会开启记录）
+PERF_ENABLED = False
+# 每个阶段保留最近多少次耗时用于计算分位数
+PERF_WINDOW = 512
+# trace 缓冲区最多保留的事件数（超出后丢弃最旧的）
+PERF_TRACE_MAX_EVENTS = 200_000
+# HUD 刷新间隔（毫秒）
+PERF_HUD_REFRESH_MS = 500
+
+# ------- HUD 区域变化检测（候选事件） -------
+# ROI 裁剪后的缩放比例
+HUD_DETECT_SCALE = 0.25
+# 每隔多少帧分析一帧（1 表示逐帧）
+HUD_DETECT_FRAME_STRIDE = 1
+# 每个进程任务负责的帧数
+HUD_DETECT_CHUNK_FRAMES = 1800
+# 检测进程数，None 表示使用全部 CPU
+HUD_DETECT_WORKERS = None
+# 变化分数超过 中位数 + 灵敏度 × MAD 视为 HUD 出现变化
+HUD_DETECT_SENSITIVITY = 6.0
+# 变化分数的绝对下限（0~1，像素平均差 / 255）
+HUD_DETECT_MIN_CHANGE = 0.02
+# 间隔小于该秒数的变化合并为同一个候选事件
+HUD_DETECT_MERGE_SECONDS = 1.0
+
+# ------- 镜头切换与活跃度分析 -------
+# 每秒采样的帧数
+SCENE_SAMPLE_FPS = 4
+# 采样帧缩放后的宽度（像素）
+SCENE_ANALYSIS_WIDTH = 160
+# 每个进程任务负责的采样帧数
+SCENE_CHUNK_SAMPLES = 256
+# 分析进程数，None 表示使用全部 CPU
+SCENE_WORKERS = None
+# 直方图距离超过 中位数 + 灵敏度 × MAD（且不低于下限）视为镜头切换
+SCENE_CUT_SENSITIVITY = 8.0
+SCENE_CUT_MIN_DISTANCE = 0.25
+# 相邻镜头切换的最小间隔（秒）
+SCENE_MIN_CUT_GAP_S = 1.0
+# 进度条上方活跃度热度条的高度（像素）
+ACTIVITY_STRIP_HEIGHT = 6
+
+# ------- 多视频会话 -------
+# 会话中同时保持打开的 VideoCore 句柄数，超出时关闭最久未使用的视频（保留其位置与事件）
+SESSION_MAX_OPEN_VIDEOS = 4
+# 非当前视频的帧缓存保留上限（字节），切回时最近看过的帧仍可直接命中
+SESSION_IDLE_CACHE_BYTES = 64 * 1024 * 1024
+
+# ------- 多进程解码 -------
+# 解码后端："single"（VideoCore）、"multiprocess"（MultiProcessDecoder）或 "auto"（按像素吞吐量选择）
+DECODE_BACKEND = "auto"
+# auto 模式下 宽 × 高 × fps 超过该值时使用多进程解码（默认 4K@50）
+MP_DECODE_AUTO_PIXEL_RATE = 3840 * 2160 * 50
+# 解码进程数，None 表示使用全部 CPU（受共享内存预算约束）
+MP_DECODE_WORKERS = None
+# 每个进程一次解码的连续帧数（一段）
+MP_DECODE_SEGMENT_FRAMES = 16
+# 等待的段超过该秒数没有任何进度（解码进程卡死）时放弃进程池，改用单进程解码
+MP_DECODE_STALL_S = 10.0
+# 共享内存帧槽位的总字节数；None 表示按可用内存的 MP_DECODE_SHM_FRACTION 计算，且不超过 MP_DECODE_SHM_MAX_BYTES
+MP_DECODE_SHM_BYTES = None
+MP_DECODE_SHM_FRACTION = 0.25
+MP_DECODE_SHM_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# ------- 事件文件合并 -------
+# 外部排序时每个有序段（临时文件）最多容纳的事件数
+MERGE_RUN_EVENTS = 100_000
+# 一次 k 路归并同时打开的有序段数，超出时先分批归并
+MERGE_FAN_IN = 128
+# 并行切分输入文件的进程数，None 表示使用全部 CPU
+MERGE_WORKERS = None
+# 不同标注员同类型事件起止帧相差超过该帧数时报告为区间不一致
+MERGE_SPAN_TOLERANCE_FRAMES = 3
+# 不同类型的事件区间交并比不低于该值时报告为类型冲突
+MERGE_CONFLICT_IOU = 0.5
+
+# ------- 事件筛选 -------
+# 备注子串检索的 n-gram 长度
+SEARCH_GRAM_SIZE = 3
+# 筛选栏输入停顿多久后刷新列表（毫秒）
+EVENT_FILTER_DELAY_MS = 150
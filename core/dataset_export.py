@@ -0,0 +1,253 @@
+# event_recorder/core/dataset_export.py
+"""
+训练数据集导出：事件窗口内的帧缩放到固定尺寸，写入可内存映射的 .npy 分片，标签按列存放。
+
+    python -m event_recorder.core.dataset_export --job 视频.mp4 events.json [--job ...] --out 数据集目录
+
+输出目录：
+- shard_00000.npy ...  (N, h, w, 3) uint8 RGB 帧数组，每片最多 DATASET_SHARD_FRAMES 帧
+- labels.npz           按列存放的标签（每个样本一行），分类字段为整数编码，
+                       shard / offset / length 给出样本帧在分片中的位置
+- meta.json            帧尺寸、分片列表与各分类字段的取值表
+
+一个样本的帧总在同一分片内连续存放，FrameDataset 按样本随机读取时直接返回分片的切片视图，不复制。
+"""
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+from event_recorder.config import DATASET_FRAME_SIZE, DATASET_SHARD_FRAMES, DATASET_WORKERS, SEQUENTIAL_SKIP_MAX
+from event_recorder.core.event_index import event_span
+from event_recorder.core.event_store import is_candidate
+from event_recorder.core.export_clips import load_event_file
+from event_recorder.core.media_cache import temp_path
+from event_recorder.core.probe import cached_probe
+
+# 以整数编码的分类字段
+CATEGORY_FIELDS = ("game_type", "event_type", "event_text", "language")
+# 数值字段及其 dtype
+NUMERIC_FIELDS = (
+    ("highlight_frame", np.int64), ("duration_frames", np.int64),
+    ("highlight_time", np.float64), ("duration_seconds", np.float64),
+)
+
+
+def _shard_name(k: int) -> str:
+    return f"shard_{k:05d}.npy"
+
+
+def plan_dataset(jobs, shard_frames: int = DATASET_SHARD_FRAMES):
+    """
+    规划样本与分片：按顺序把样本装入分片，装不下时开新分片；
+    超过分片容量的样本单独成片（该分片比常规分片大）。
+    :param jobs: [(视频路径, 事件文件路径), ...]
+    :return: (samples, shards)
+             samples: [{"video", "src_start", "length", "shard", "offset", "evt"}, ...]
+             shards:  [[(视频路径, 源起始帧, 帧数, 分片内偏移), ...], ...]
+    """
+    samples, shards = [], []
+    fill = shard_frames  # 当前分片已用帧数；初值使第一个样本开新分片
+    for video_path, events_path in jobs:
+        meta = cached_probe(video_path)  # 只需帧数：读探测元数据，不打开解码器
+        if not meta["ok"]:
+            if meta["reason"].startswith("无法打开视频"):
+                raise IOError(meta["reason"])
+            raise ValueError(f"{video_path}：{meta['reason']}")
+        last = meta["total_frames"] - 1
+        manager = load_event_file(events_path)
+        for eid in manager.event_ids():
+            evt = manager.get_record(eid)
+            start, end = event_span(evt)
+            if start > last or is_candidate(evt):
+                continue
+            length = min(end, last) - start + 1
+            if fill + length > shard_frames:
+                shards.append([])
+                fill = 0
+            shards[-1].append((video_path, start, length, fill))
+            samples.append({"video": video_path, "src_start": start, "length": length,
+                            "shard": len(shards) - 1, "offset": fill, "evt": evt.to_dict()})
+            fill += length
+    return samples, shards
+
+
+def _write_shard(shard_path: str, segments, size, rgb: bool = True) -> int:
+    """
+    进程池任务：解码 segments 中的帧并缩放到 size=(w, h)，写入一个分片文件。
+    同一视频的片段按起点顺序解码（直接用 VideoCapture，不建索引）：
+    下一片段就在解码位置前方不远时 grab 前进，否则 seek。
+    """
+    w, h = size
+    total = max(off + n for _, _, n, off in segments)
+    tmp = temp_path(shard_path, ".npy")
+    out = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.uint8, shape=(total, h, w, 3))
+    cap = None
+    current = None
+    pos = 0  # 解码器下一次 read() 返回的帧
+    try:
+        for video_path, start, length, off in sorted(segments, key=lambda s: (s[0], s[1])):
+            if video_path != current:
+                if cap is not None:
+                    cap.release()
+                cap = cv2.VideoCapture(video_path)
+                if not cap.isOpened():
+                    raise IOError(f"无法打开视频：{video_path}")
+                current, pos = video_path, 0
+            if not 0 <= start - pos <= SEQUENTIAL_SKIP_MAX:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+                pos = start
+            while pos < start and cap.grab():
+                pos += 1
+            for i in range(length):
+                ret, frame = cap.read()
+                if not ret:
+                    break  # 视频提前结束：剩余帧保持全黑
+                pos += 1
+                dst = out[off + i]
+                cv2.resize(frame, (w, h), dst=dst, interpolation=cv2.INTER_AREA)
+                if rgb:
+                    cv2.cvtColor(dst, cv2.COLOR_BGR2RGB, dst=dst)
+    finally:
+        if cap is not None:
+            cap.release()
+    out.flush()
+    del out
+    os.replace(tmp, shard_path)
+    return total
+
+
+def _label_columns(samples, videos):
+    """样本标签转为列：分类字段编码为 int32，返回 (列字典, 各分类取值表)"""
+    n = len(samples)
+    columns = {
+        "video": np.array([videos.index(s["video"]) for s in samples], dtype=np.int32),
+        "src_start": np.array([s["src_start"] for s in samples], dtype=np.int64),
+        "shard": np.array([s["shard"] for s in samples], dtype=np.int32),
+        "offset": np.array([s["offset"] for s in samples], dtype=np.int64),
+        "length": np.array([s["length"] for s in samples], dtype=np.int64),
+    }
+    vocab = {}
+    for field in CATEGORY_FIELDS:
+        values = [str(s["evt"].get(field) or "") for s in samples]
+        names = sorted(set(values))
+        code = {name: i for i, name in enumerate(names)}
+        columns[field] = np.fromiter((code[v] for v in values), dtype=np.int32, count=n)
+        vocab[field] = names
+    for field, dtype in NUMERIC_FIELDS:
+        columns[field] = np.array([s["evt"].get(field) or 0 for s in samples], dtype=dtype)
+    return columns, vocab
+
+
+def export_dataset(jobs, out_dir: str, size=DATASET_FRAME_SIZE, shard_frames: int = DATASET_SHARD_FRAMES,
+                   workers=DATASET_WORKERS, rgb: bool = True, on_progress=None) -> dict:
+    """
+    导出训练数据集，分片由进程池并行写出。
+    :param jobs: [(视频路径, 事件文件路径), ...]
+    :param size: 帧尺寸 (宽, 高)
+    :param on_progress: 可选回调 on_progress(已完成分片数, 分片总数)
+    :return: meta 字典（同 meta.json）
+    """
+    size = (int(size[0]), int(size[1]))
+    samples, shards = plan_dataset(jobs, shard_frames)
+    videos = [os.path.abspath(v) for v, _ in jobs]
+    for s in samples:
+        s["video"] = os.path.abspath(s["video"])
+    os.makedirs(out_dir, exist_ok=True)
+
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_write_shard, os.path.join(out_dir, _shard_name(k)), segs, size, rgb)
+            for k, segs in enumerate(shards)
+        ]
+        for fut in as_completed(futures):
+            fut.result()
+            done += 1
+            if on_progress:
+                on_progress(done, len(shards))
+
+    columns, vocab = _label_columns(samples, videos)
+    np.savez(os.path.join(out_dir, "labels.npz"), **columns)
+    meta = {
+        "size": list(size),
+        "channels": "RGB" if rgb else "BGR",
+        "shards": [_shard_name(k) for k in range(len(shards))],
+        "samples": len(samples),
+        "frames": sum(s["length"] for s in samples),
+        "videos": videos,
+        "categories": vocab,
+    }
+    with open(os.path.join(out_dir, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=4)
+    return meta
+
+
+class FrameDataset:
+    """
+    读取 export_dataset 的输出：分片以 mmap_mode='r' 打开，
+    dataset[i] 返回 (帧数组视图 (length, h, w, 3), 标签字典)，不复制像素。
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        with open(os.path.join(root, "meta.json"), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        with np.load(os.path.join(root, "labels.npz")) as z:
+            self.labels = {k: z[k] for k in z.files}
+        self.categories = self.meta["categories"]
+        self._shards = [None] * len(self.meta["shards"])
+
+    def _shard(self, k: int):
+        arr = self._shards[k]
+        if arr is None:
+            arr = np.load(os.path.join(self.root, self.meta["shards"][k]), mmap_mode='r')
+            self._shards[k] = arr
+        return arr
+
+    def frames(self, i: int):
+        """样本 i 的帧（分片的只读切片视图）"""
+        off = int(self.labels["offset"][i])
+        return self._shard(int(self.labels["shard"][i]))[off:off + int(self.labels["length"][i])]
+
+    def label(self, i: int) -> dict:
+        """样本 i 的标签；分类字段同时给出编码与名称"""
+        out = {k: v[i].item() for k, v in self.labels.items()}
+        for field in CATEGORY_FIELDS:
+            out[field + "_name"] = self.categories[field][out[field]]
+        return out
+
+    def __getitem__(self, i: int):
+        return self.frames(i), self.label(i)
+
+    def __len__(self) -> int:
+        return int(self.meta["samples"])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="把事件窗口内的帧导出为可内存映射的训练数据集")
+    parser.add_argument("--job", nargs=2, action="append", required=True, metavar=("VIDEO", "EVENTS"),
+                        help="视频文件及其事件文件，可重复指定")
+    parser.add_argument("--out", required=True, help="输出目录")
+    parser.add_argument("--size", nargs=2, type=int, default=list(DATASET_FRAME_SIZE), metavar=("W", "H"),
+                        help="帧尺寸")
+    parser.add_argument("--shard-frames", type=int, default=DATASET_SHARD_FRAMES, help="每个分片的帧数")
+    parser.add_argument("--workers", type=int, default=DATASET_WORKERS, help="并行写分片的进程数")
+    parser.add_argument("--bgr", action="store_true", help="保持 OpenCV 的 BGR 通道顺序")
+    args = parser.parse_args(argv)
+
+    meta = export_dataset(
+        [tuple(j) for j in args.job], args.out, args.size, args.shard_frames, args.workers,
+        rgb=not args.bgr, on_progress=lambda d, t: print(f"分片 {d}/{t}")
+    )
+    print(f"样本 {meta['samples']}，帧 {meta['frames']}，分片 {len(meta['shards'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,350 @@
+# event_recorder/core/event_bulk.py
+"""
+事件的批量数值运算：把 highlight_frame / duration_frames 与分组键（game_type, event_type）
+取成 NumPy 列，在按 (分组, 起点) 排序后的数组上一次扫描完成重叠检测与去重。
+函数只做数组运算并返回结果（位置下标均指原列表中的位置），由 EventManager 作为一个事务应用，
+并以 batch_record 编码成一条日志记录。
+"""
+
+import base64
+import math
+from operator import attrgetter
+
+from event_recorder.core.lazy_import import lazy_import
+np = lazy_import("numpy")
+
+
+def _is_number(v) -> bool:
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _to_int(v) -> int:
+    """与 event_span 一致：数值取整，数字字符串解析，其余（缺失、None、无法解析）为 0"""
+    if _is_number(v):
+        return int(v)
+    if isinstance(v, str):
+        try:
+            return int(v)
+        except ValueError:
+            return 0
+    return 0
+
+
+def int_column(records, field: str):
+    """记录字段的 int64 列：整列转换，缺失或非数值时逐个回退"""
+    values = list(map(attrgetter(field), records))
+    try:
+        return np.array(values, dtype=np.int64)
+    except (TypeError, ValueError, OverflowError):
+        return np.array([_to_int(v) for v in values], dtype=np.int64)
+
+
+def check_fps(fps, name: str = "fps") -> float:
+    """帧率必须是有限正数，否则抛出 ValueError"""
+    try:
+        value = float(fps)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} 不是有效的帧率：{fps!r}")
+    if not math.isfinite(value) or value <= 0:
+        raise ValueError(f"{name} 必须是有限正数：{fps!r}")
+    return value
+
+
+def float_column(records, field: str):
+    """记录字段的 float64 列：整列转换，缺失或非数值时逐个回退为 NaN"""
+    values = list(map(attrgetter(field), records))
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([float(v) if _is_number(v) else np.nan for v in values], dtype=np.float64)
+
+
+class EventColumns:
+    """
+    事件列表的数值列：
+    - start / duration：int64 帧号与持续帧数
+    - group：int32 分组编码（相同 game_type 与 event_type 的事件编码相同）
+    """
+
+    def __init__(self, start, duration, group, group_names):
+        self.start = start
+        self.duration = duration
+        self.group = group
+        self.group_names = group_names
+
+    @classmethod
+    def from_records(cls, records):
+        """由 EventRecord 列表取列：直接读 __slots__ 属性，整列转换，缺失或非数值时才逐个回退"""
+        n = len(records)
+        start = int_column(records, "highlight_frame")
+        duration = int_column(records, "duration_frames")
+        codes = {}
+        keys = map(attrgetter("game_type", "event_type"), records)
+        group = np.fromiter((codes.setdefault(k, len(codes)) for k in keys), dtype=np.int32, count=n)
+        return cls(start, np.maximum(duration, 0), group, list(codes))
+
+    def _code(self, rec) -> int:
+        key = (rec.game_type, rec.event_type)
+        if key not in self.group_names:
+            self.group_names = self.group_names + [key]
+        return self.group_names.index(key)
+
+    def append(self, rec):
+        """列表末尾追加了记录 rec"""
+        self.start = np.append(self.start, _to_int(rec.highlight_frame))
+        self.duration = np.append(self.duration, max(_to_int(rec.duration_frames), 0))
+        self.group = np.append(self.group, np.int32(self._code(rec)))
+
+    def set(self, i: int, rec):
+        """位置 i 的记录替换为 rec"""
+        self.start[i] = _to_int(rec.highlight_frame)
+        self.duration[i] = max(_to_int(rec.duration_frames), 0)
+        self.group[i] = self._code(rec)
+
+    def delete(self, i: int):
+        self.start = np.delete(self.start, i)
+        self.duration = np.delete(self.duration, i)
+        self.group = np.delete(self.group, i)
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+
+def _stable_order(*keys):
+    """
+    按多列（主键在前）排序的下标，相同时保持原位置顺序。
+    各列取值范围之积放得进 int64 时组合成一个键只做一次稳定排序，否则退回 lexsort。
+    """
+    combined = np.zeros(len(keys[0]), dtype=np.int64)
+    total = 1
+    for key in keys:
+        lo = int(key.min())
+        span = int(key.max()) - lo + 1
+        total *= span
+        if total >= 1 << 62:
+            return np.lexsort(keys[::-1])
+        combined = combined * span + (key - lo)
+    return np.argsort(combined, kind="stable")
+
+
+def _clusters(cols: EventColumns, tolerance: int):
+    """按 (分组, 起点, 原位置) 排序的下标，及排序后每个位置的簇编号（非递减）"""
+    order = _stable_order(cols.group, cols.start)
+    g = cols.group[order]
+    s = cols.start[order]
+    e = cols.end[order]
+    # 按分组加偏移后整体单调，累计最大值不会跨组
+    span = int(max(e.max(), s.max()) - min(s.min(), 0)) + tolerance + 2
+    offset = g.astype(np.int64) * span
+    run_end = np.maximum.accumulate(e + offset) - offset
+    new = np.ones(len(order), dtype=bool)
+    new[1:] = (g[1:] != g[:-1]) | (s[1:] > run_end[:-1] + tolerance)
+    return order, np.cumsum(new) - 1
+
+
+def overlap_clusters(cols: EventColumns, tolerance: int = 0):
+    """
+    同组内区间重叠（或间隔不超过 tolerance 帧）的事件归为一簇。
+    一次排序 + 分组内的累计最大结束帧：起点不晚于之前最大结束帧 + tolerance 即与前面的簇相连。
+    :return: (簇编号数组（按原位置），簇数)
+    """
+    n = len(cols)
+    if not n:
+        return np.zeros(0, dtype=np.int64), 0
+    order, labels_sorted = _clusters(cols, tolerance)
+    labels = np.empty(n, dtype=np.int64)
+    labels[order] = labels_sorted
+    return labels, int(labels_sorted[-1]) + 1
+
+
+def find_overlaps(cols: EventColumns, tolerance: int = 0):
+    """返回含两个及以上事件的重叠簇：[位置数组, ...]，每簇按起点排序"""
+    if not len(cols):
+        return []
+    order, labels = _clusters(cols, tolerance)
+    bounds = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+    return [grp for grp in np.split(order, bounds) if len(grp) > 1]
+
+
+def find_duplicates(cols: EventColumns, frame_tolerance: int = 0, duration_tolerance: int = 0):
+    """
+    近似重复：同组、起点相差不超过 frame_tolerance 且持续帧数相差不超过 duration_tolerance。
+    排序后与前一个事件比较，连成链的只保留链首（最早、原位置最靠前）。
+    :return: 应删除的位置数组（升序）
+    """
+    n = len(cols)
+    if n < 2:
+        return np.zeros(0, dtype=np.int64)
+    order = _stable_order(cols.group, cols.start, cols.duration)
+    g = cols.group[order]
+    s = cols.start[order]
+    d = cols.duration[order]
+    dup = np.zeros(n, dtype=bool)
+    dup[1:] = ((g[1:] == g[:-1]) & (s[1:] - s[:-1] <= frame_tolerance)
+               & (np.abs(d[1:] - d[:-1]) <= duration_tolerance))
+    return np.sort(order[dup])
+
+
+def merge_overlaps(cols: EventColumns, tolerance: int = 0):
+    """
+    把每个重叠簇合并为一个事件：保留簇内起点最早的事件，区间扩展为整簇的 [最早起点, 最晚结束]。
+    :return: (保留的位置数组, 其新起点, 新持续帧数, 应删除的位置数组)
+    """
+    if not len(cols):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, empty
+    # 簇在排序结果中连续，且簇内已按 (起点, 原位置) 排好：簇首即保留的事件
+    order, sorted_labels = _clusters(cols, tolerance)
+    first = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+    keep = order[first]
+    new_start = cols.start[keep]
+    new_end = np.maximum.reduceat(cols.end[order], first)
+    multi = np.diff(np.r_[first, len(order)]) > 1
+    drop = np.ones(len(order), dtype=bool)
+    drop[first] = False
+    return keep[multi], new_start[multi], (new_end - new_start)[multi], np.sort(order[drop])
+
+
+def shift(cols: EventColumns, delta: int, positions=None):
+    """把 positions（默认全部）事件的起点平移 delta 帧（不早于第 0 帧），返回 (位置, 新起点)"""
+    positions = np.arange(len(cols)) if positions is None else np.asarray(positions, dtype=np.int64)
+    return positions, np.maximum(cols.start[positions] + int(delta), 0)
+
+
+def rescale_fps(cols: EventColumns, old_fps: float, new_fps: float):
+    """按帧率变化换算全部事件的帧号：返回 (新起点, 新持续帧数)，均四舍五入到整帧"""
+    ratio = check_fps(new_fps, "new_fps") / check_fps(old_fps, "old_fps")
+    start = np.rint(cols.start * ratio).astype(np.int64)
+    end = np.rint(cols.end * ratio).astype(np.int64)
+    return start, end - start
+
+
+# ---------- 批量修改的日志记录 ----------
+_BATCH_COLUMNS = (("start", "<i8"), ("duration", "<i8"), ("time", "<f8"), ("seconds", "<f8"), ("drop", "<i8"))
+
+
+def pack_column(values, dtype: str) -> str:
+    """数组编码为日志中的字符串：小端原始字节的 base64"""
+    return base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode("ascii")
+
+
+def unpack_column(text: str, dtype: str):
+    return np.frombuffer(base64.b64decode(text), dtype=dtype).astype(dtype[1:])
+
+
+def batch_record(n: int, positions, start=None, duration=None, time=None, seconds=None, drop=None) -> dict:
+    """
+    一次批量修改的日志记录：{"op": "batch", "n": 修改前事件数, "pos": 位置, 各列...}，数组按列编码。
+    位置覆盖全部事件时省略 "pos"；未给出的列省略。
+    """
+    rec = {"op": "batch", "n": int(n)}
+    if len(positions) != n:
+        rec["pos"] = pack_column(positions, "<i8")
+    values = {"start": start, "duration": duration, "time": time, "seconds": seconds, "drop": drop}
+    for name, dtype in _BATCH_COLUMNS:
+        if values[name] is not None and len(values[name]):
+            rec[name] = pack_column(values[name], dtype)
+    return rec
+
+
+def read_batch_record(rec: dict) -> dict:
+    """batch_record 的逆运算：返回 positions、start、duration、time、seconds、drop（缺省列为 None）"""
+    n = int(rec["n"])
+    out = {"positions": unpack_column(rec["pos"], "<i8") if "pos" in rec else np.arange(n, dtype=np.int64)}
+    for name, dtype in _BATCH_COLUMNS:
+        out[name] = unpack_column(rec[name], dtype) if name in rec else None
+    return out
+
+
+class RecordPatch:
+    """
+    批量修改后尚未写回记录的数值字段，与列表位置对齐：
+    - stale：该位置的记录是否过期
+    - frames：该位置的帧号是否被修改；start / duration 为新帧号与持续帧数
+    - time / seconds：新 highlight_time / duration_seconds（NaN 表示沿用记录原值）
+    记录本身保持不可变，读取单条记录或序列化时才按位置用 EventRecord.replace 生成新记录。
+    """
+
+    _FILL = (False, False, 0, 0, np.nan, np.nan)
+
+    def __init__(self, n: int):
+        self.stale = np.zeros(n, dtype=bool)
+        self.frames = np.zeros(n, dtype=bool)
+        self.start = np.zeros(n, dtype=np.int64)
+        self.duration = np.zeros(n, dtype=np.int64)
+        self.time = np.full(n, np.nan)
+        self.seconds = np.full(n, np.nan)
+
+    def _arrays(self):
+        return self.stale, self.frames, self.start, self.duration, self.time, self.seconds
+
+    def _set_arrays(self, arrays):
+        self.stale, self.frames, self.start, self.duration, self.time, self.seconds = arrays
+
+    def copy(self) -> "RecordPatch":
+        patch = RecordPatch.__new__(RecordPatch)
+        patch._set_arrays([a.copy() for a in self._arrays()])
+        return patch
+
+    def mark(self, positions, start=None, duration=None, time=None, seconds=None):
+        """记下 positions 上的新数值；未给出的字段保留先前批量修改记下的值"""
+        self.stale[positions] = True
+        if start is not None:
+            self.frames[positions] = True
+            self.start[positions] = start
+            self.duration[positions] = duration
+        if time is not None:
+            self.time[positions] = time
+            self.seconds[positions] = seconds
+
+    def clear(self, i: int):
+        """位置 i 已换成最新记录"""
+        for a, v in zip(self._arrays(), self._FILL):
+            a[i] = v
+
+    def keep(self, mask):
+        """按布尔掩码删除位置（与列表的批量删除同步）"""
+        self._set_arrays([a[mask] for a in self._arrays()])
+
+    def append(self):
+        """列表末尾追加了一条最新记录"""
+        self._set_arrays([np.append(a, v) for a, v in zip(self._arrays(), self._FILL)])
+
+    def delete(self, idx: int):
+        self._set_arrays([np.delete(a, idx) for a in self._arrays()])
+
+    def overlay(self, start, duration):
+        """把修改过的帧号写进整列（EventColumns 由记录取列后调用）"""
+        start[self.frames] = self.start[self.frames]
+        duration[self.frames] = self.duration[self.frames]
+
+    def overlay_times(self, time, seconds):
+        """把修改过的时间字段写进由记录取出的 float 列"""
+        has = ~np.isnan(self.time)
+        time[has] = self.time[has]
+        seconds[has] = self.seconds[has]
+
+    def any(self) -> bool:
+        return bool(self.stale.any())
+
+    def apply(self, rec, i: int):
+        """位置 i 上的最新记录：过期时返回替换了数值字段的新记录，否则原样返回"""
+        if not self.stale[i]:
+            return rec
+        changes = {}
+        if self.frames[i]:
+            changes["highlight_frame"] = int(self.start[i])
+            changes["duration_frames"] = int(self.duration[i])
+        if not np.isnan(self.time[i]):
+            changes["highlight_time"] = float(self.time[i])
+            changes["duration_seconds"] = float(self.seconds[i])
+        return rec.replace(**changes)
+
+    def records(self, records):
+        """逐条给出最新记录（序列化快照时使用，不改动列表）"""
+        for i, (rec, stale) in enumerate(zip(records, self.stale.tolist())):
+            yield self.apply(rec, i) if stale else rec
@@ -0,0 +1,190 @@
+# event_recorder/core/event_index.py
+
+from event_recorder.core.lazy_import import lazy_import
+np = lazy_import("numpy")
+
+_NO_END = -(1 << 62)  # 线段树空叶子的结束帧（小于任何事件）
+
+
+def event_span(evt: dict):
+    """事件覆盖的闭区间 [highlight_frame, highlight_frame + duration_frames]"""
+    start = int(evt.get("highlight_frame") or 0)
+    duration = max(0, int(evt.get("duration_frames") or 0))
+    return start, start + duration
+
+
+class EventIntervalIndex:
+    """
+    事件帧区间索引，数组按 (起点, 事件ID) 排序保存：
+    - _starts / _ends / _ids：每个事件的起点、终点与事件ID（同一顺序）
+    - _sorted_ends：排序的终点，用于计数
+    - _tree：按起点顺序的终点最大值线段树，列举时只进入最大终点 >= 查询下界的子树；增删后失效，下次列举时整体重建
+
+    计数类查询（覆盖数、区间重叠数）与最近邻查询均为 O(log n)；
+    列举类查询只访问含命中事件的子树，为 O(log n + 候选数·log n)，个别超长事件不会拖慢其他查询。
+    单条增删为一次数组插入/删除（NumPy 内存移动），批量删除按掩码过滤，批量改帧号后由 rebuild_columns 整体重建。
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._starts = np.zeros(0, dtype=np.int64)
+        self._ends = np.zeros(0, dtype=np.int64)
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._sorted_ends = np.zeros(0, dtype=np.int64)
+        self._tree = None
+
+    def rebuild(self, items):
+        """由 (事件ID, 事件) 序列整体重建"""
+        ids, starts, ends = [], [], []
+        for eid, evt in items:
+            start, end = event_span(evt)
+            ids.append(eid)
+            starts.append(start)
+            ends.append(end)
+        self.rebuild_columns(ids, starts, ends)
+
+    def rebuild_columns(self, ids, starts, ends):
+        """由事件ID与起止帧数组整体重建（加载与批量修改后使用，排序交给 NumPy）"""
+        ids = np.asarray(ids, dtype=np.int64)
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        order = np.lexsort((ids, starts))
+        self._starts = starts[order]
+        self._ends = ends[order]
+        self._ids = ids[order]
+        self._sorted_ends = np.sort(ends)
+        self._tree = None
+
+    def remove_many(self, eids):
+        """一次删除多个事件：按掩码过滤，保持排序，不重新排序"""
+        keep = ~np.isin(self._ids, np.asarray(eids, dtype=np.int64))
+        self._starts = self._starts[keep]
+        self._ends = self._ends[keep]
+        self._ids = self._ids[keep]
+        self._sorted_ends = np.sort(self._ends)
+        self._tree = None
+
+    def add(self, eid: int, evt: dict):
+        start, end = event_span(evt)
+        lo = int(np.searchsorted(self._starts, start, side='left'))
+        hi = int(np.searchsorted(self._starts, start, side='right'))
+        i = lo + int(np.searchsorted(self._ids[lo:hi], eid))
+        self._starts = np.insert(self._starts, i, start)
+        self._ends = np.insert(self._ends, i, end)
+        self._ids = np.insert(self._ids, i, eid)
+        self._sorted_ends = np.insert(self._sorted_ends, np.searchsorted(self._sorted_ends, end), end)
+        self._tree = None
+
+    def remove(self, eid: int):
+        i = self._position(eid)
+        end = self._ends[i]
+        self._starts = np.delete(self._starts, i)
+        self._ends = np.delete(self._ends, i)
+        self._ids = np.delete(self._ids, i)
+        self._sorted_ends = np.delete(self._sorted_ends, np.searchsorted(self._sorted_ends, end))
+        self._tree = None
+
+    def update(self, eid: int, evt: dict):
+        self.remove(eid)
+        self.add(eid, evt)
+
+    def _position(self, eid: int) -> int:
+        found = np.flatnonzero(self._ids == eid)
+        if not len(found):
+            raise KeyError(eid)
+        return int(found[0])
+
+    def span(self, eid: int):
+        i = self._position(eid)
+        return int(self._starts[i]), int(self._ends[i])
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # ---------- 计数 ----------
+    def count_covering(self, frame: int) -> int:
+        """覆盖 frame 的事件数：起点 <= frame 的个数 − 终点 < frame 的个数"""
+        return self.count_overlapping(frame, frame)
+
+    def count_overlapping(self, a: int, b: int) -> int:
+        """与 [a, b] 有交集的事件数"""
+        return int(np.searchsorted(self._starts, b, side='right')
+                   - np.searchsorted(self._sorted_ends, a, side='left'))
+
+    # ---------- 列举 ----------
+    def covering(self, frame: int):
+        """覆盖 frame 的事件ID（按起点排序）"""
+        return self.overlapping(frame, frame)
+
+    def overlapping(self, a: int, b: int):
+        """与 [a, b] 有交集的事件ID（按起点排序）：在起点 <= b 的前缀上沿线段树找终点 >= a 的事件"""
+        hi = int(np.searchsorted(self._starts, b, side='right'))
+        if not hi:
+            return []
+        tree, size = self._max_end_tree()
+        found = []
+        stack = [(1, 0, size)]  # (节点, 覆盖的起点顺序区间 [lo, end))
+        while stack:
+            node, lo, end = stack.pop()
+            if lo >= hi or tree[node] < a:
+                continue
+            if node >= size:
+                found.append(lo)
+                continue
+            mid = (lo + end) // 2
+            stack.append((2 * node + 1, mid, end))
+            stack.append((2 * node, lo, mid))
+        return self._ids[found].tolist()
+
+    def _max_end_tree(self):
+        """按起点顺序的终点最大值线段树（数组形式，节点 k 的子节点为 2k、2k+1；叶子从 size 开始）"""
+        if self._tree is None:
+            n = len(self._ends)
+            size = 1 << max(0, (n - 1).bit_length())
+            tree = np.full(2 * size, _NO_END, dtype=np.int64)
+            tree[size:size + n] = self._ends
+            level = size
+            while level > 1:
+                tree[level // 2:level] = np.maximum(tree[level:2 * level:2], tree[level + 1:2 * level:2])
+                level //= 2
+            self._tree = (tree, size)
+        return self._tree
+
+    # ---------- 最近邻 ----------
+    def next_after(self, frame: int):
+        """起点严格晚于 frame 的第一个事件，返回 (起点, 事件ID) 或 None"""
+        i = int(np.searchsorted(self._starts, frame, side='right'))
+        return self._item(i) if i < len(self._starts) else None
+
+    def prev_before(self, frame: int):
+        """起点严格早于 frame 的最后一个事件，返回 (起点, 事件ID) 或 None"""
+        i = int(np.searchsorted(self._starts, frame, side='left'))
+        return self._item(i - 1) if i > 0 else None
+
+    def nearest(self, frame: int):
+        """起点离 frame 最近的事件，返回 (起点, 事件ID) 或 None"""
+        i = int(np.searchsorted(self._starts, frame, side='left'))
+        candidates = [self._item(j) for j in (i - 1, i) if 0 <= j < len(self._starts)]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda item: abs(item[0] - frame))
+
+    def _item(self, i: int):
+        return int(self._starts[i]), int(self._ids[i])
+
+    # ---------- 时间轴 ----------
+    def density(self, total_frames: int, bins: int):
+        """
+        把 [0, total_frames) 均分为 bins 段，返回每段内被事件覆盖的事件数（numpy 数组），
+        用差分 + 前缀和一次性向量化计算，用于在进度条上绘制事件分布。
+        """
+        bins = max(1, int(bins))
+        if not len(self._ids) or total_frames <= 0:
+            return np.zeros(bins, dtype=np.int64)
+        scale = bins / float(total_frames)
+        s_bin = np.clip((self._starts * scale).astype(np.int64), 0, bins - 1)
+        e_bin = np.clip((self._ends * scale).astype(np.int64), 0, bins - 1)
+        diff = np.bincount(s_bin, minlength=bins + 1) - np.bincount(e_bin + 1, minlength=bins + 1)
+        return np.cumsum(diff[:bins])
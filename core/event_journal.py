@@ -0,0 +1,94 @@
+# event_recorder/core/event_journal.py
+
+import json
+import os
+
+from event_recorder.config import EVENT_JOURNAL_FSYNC
+
+
+class EventJournal:
+    """
+    事件预写日志（JSON Lines），与快照文件 events.json 配对使用。
+
+    文件布局：
+    - <快照>.journal       当前日志；首行 {"base": 快照摘要}，其后每行一条操作记录
+    - <快照>.journal.next  压缩过程中的新日志，替换快照后再改名为当前日志
+
+    任意时刻崩溃后，load() 都能挑出首行摘要与现有快照一致的那份日志重放。
+    """
+
+    def __init__(self, snapshot_path: str):
+        self.snapshot_path = snapshot_path
+        self.path = snapshot_path + ".journal"
+        self.next_path = snapshot_path + ".journal.next"
+        self._fh = None
+        self.base = None  # 当前日志首行的快照摘要；None 表示本进程尚未开始写日志
+        self.records = 0  # 当前日志中的记录数
+
+    def load(self, base: str):
+        """返回与快照摘要 base 匹配的日志中的全部记录；找不到匹配日志时返回空列表"""
+        for path in (self.path, self.next_path):
+            records = self._read(path, base)
+            if records is not None:
+                return records
+        return []
+
+    @staticmethod
+    def _read(path: str, base: str):
+        if not os.path.exists(path):
+            return None
+        records = []
+        with open(path, 'r', encoding='utf-8') as f:
+            header = f.readline()
+            try:
+                if json.loads(header).get("base") != base:
+                    return None
+            except ValueError:
+                return None
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    break  # 崩溃时写了一半的尾行
+        return records
+
+    def reset(self, base: str, records=()):
+        """
+        以快照摘要 base 开始一份新日志（先写 .next），records 为需要保留的记录。
+        调用方替换快照后必须调用 promote()。
+        """
+        self.close()
+        os.makedirs(os.path.dirname(self.next_path) or ".", exist_ok=True)
+        with open(self.next_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"base": base}) + "\n")
+            for rec in records:
+                f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.base = base
+        self.records = len(records)
+
+    def promote(self):
+        """快照已替换：把 .next 日志改名为当前日志"""
+        self.close()
+        os.replace(self.next_path, self.path)
+
+    def begin(self, base: str, records=()):
+        """没有快照替换的场景下直接开始一份新日志"""
+        self.reset(base, records)
+        self.promote()
+
+    def append(self, record: dict):
+        """追加一条记录并立即刷到操作系统"""
+        if self._fh is None:
+            self._fh = open(self.path, 'a', encoding='utf-8')
+        self._fh.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._fh.flush()
+        if EVENT_JOURNAL_FSYNC:
+            os.fsync(self._fh.fileno())
+        self.records += 1
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
@@ -1,30 +1,107 @@
 # event_recorder/core/event_logic.py
 
-import json
+import bisect
+import hashlib
 import os
-from event_recorder.config import DEFAULT_SAVE_DIR
+import threading
+from itertools import compress
+from event_recorder.config import DEFAULT_SAVE_DIR, EVENT_JOURNAL_ENABLED, EVENT_COMPACT_INTERVAL_S
+from event_recorder.core.event_journal import EventJournal
+from event_recorder.core.event_index import EventIntervalIndex
+from event_recorder.core.event_search import EventFieldIndex
+from event_recorder.core import event_bulk
+from event_recorder.core.event_store import EventRecord, EventsView, iter_json_array, write_events_json
+from event_recorder.core.perf import perf
+from event_recorder.core.lazy_import import lazy_import
+np = lazy_import("numpy")
 
 class EventManager:
     """
     事件管理器：维护内存中的事件列表，支持加载、保存、增删改。
+
+    日志模式（journal=True）下：
+    - 增删改立即以紧凑记录追加到 save_dir/events.json.journal，崩溃不丢失；
+      批量操作（去重、合并、平移、重算时间等）写成一条按列编码的 "batch" 记录
+    - 后台线程定期把内存列表压缩为 events.json（临时文件 + 原子替换），并重置日志
+    - 加载默认事件文件时重放日志；默认文件无法解析时移到 events.json.corrupt 保留，以空列表继续
+    - 加载其他文件时写一条 "load" 记录（文件路径与摘要），重放时重新读取该文件，之后照常写日志与压缩
+
+    每个事件在本会话内有稳定的事件ID（不随列表位置变化），
+    intervals 为按帧区间的索引，fields 为按字段取值与备注 n-gram 的倒排索引，均随增删改增量更新；
+    加载后与大批删除后 fields 在后台线程整体重建，不占用第一次筛选的时间。
+
+    事件在内存中以紧凑的 EventRecord 保存（__slots__ + 驻留字符串），
+    加载时流式解析，不把整份文件读入内存；events 为按需转换成 dict 的惰性列表视图。
+    subscribe() 注册的监听器在每次改动后收到 (操作, 事件ID) 差异通知：
+    "add" / "update" / "delete" 携带事件ID，"reset"（整体重新加载）携带 None。
     """
 
-    def __init__(self, save_dir: str = None):
+    def __init__(self, save_dir: str = None, journal: bool = EVENT_JOURNAL_ENABLED):
         # 事件默认存放目录
         self.save_dir = save_dir or DEFAULT_SAVE_DIR
-        self.events = []
+        self._records = []  # EventRecord 列表
+        self._ids = []  # 与 _records 平行的事件ID列表
+        self._listeners = []
+        self._next_id = 1
+        self.intervals = EventIntervalIndex()
+        self.fields = EventFieldIndex()
+        self._cols = None  # 与列表位置对齐的 EventColumns，随单条增删改与批量修改按列更新
+        self._patch = None  # 批量修改后尚未写回记录的数值字段（event_bulk.RecordPatch）
+        self._lock = threading.RLock()
+        self._fields_built = threading.Condition(self._lock)  # 后台建立字段索引完成时通知
+        self._compact_lock = threading.Lock()
+        self.journal = EventJournal(self._default_path()) if journal else None
+        self._base = None  # 日志所基于的快照摘要；未知时只标记待压缩，不写日志
+        self._dirty = False  # 自上次压缩以来是否有改动
+        self._pending = None  # 压缩进行中产生的记录，需带入新日志
+        self.load_error = None  # 初始化时默认事件文件无法读取的说明，供界面提示
         # 尝试初始化载入已有事件
         try:
             self.load_events()
-        except Exception:
-            self.events = []
+        except Exception as e:
+            self._recover(e)
+        self._closed = threading.Event()
+        if self.journal:
+            threading.Thread(target=self._compact_loop, name="EventCompactor", daemon=True).start()
+
+    def _recover(self, error: Exception):
+        """
+        默认事件文件无法读取：移到 events.json.corrupt 保留，以空列表（不存在的快照）为基继续写日志；
+        无法移走时只清空列表，改动不写日志，显式保存或关闭时写回
+        """
+        path = self._default_path()
+        aside = path + ".corrupt"
+        try:
+            os.replace(path, aside)
+        except OSError:
+            self._reset_events([])
+            self._base = None
+            self.load_error = f"事件文件无法读取：{error}"
+            return
+        with self._lock:
+            self._load_data([], hashlib.sha1().hexdigest(), True)
+        self.load_error = f"事件文件无法读取（{error}），已移到 {aside}，从空列表开始"
+
+    def _default_path(self) -> str:
+        return os.path.join(self.save_dir, "events.json")
+
+    @property
+    def events(self) -> EventsView:
+        """事件列表的只读惰性视图（元素为 dict）；修改请用 add/update/delete_event"""
+        with self._lock:
+            self._materialize()
+            return EventsView(self._records)
 
-    def load_events(self, path: str = None):
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def load_events(self, path: str = None, on_progress=None):
         """
         加载事件列表。
         - 如果 path 为空：从 save_dir/events.json 加载
         - 如果 path 是相对名：在 save_dir 下拼接加载
         - 如果 path 是绝对路径：直接加载
+        :param on_progress: 可选回调 on_progress(已读字节数, 文件总字节数)，大文件加载时报告进度
         """
         # 确定实际文件路径
         if path is None:
@@ -34,41 +111,518 @@ class EventManager:
         else:
             file_path = os.path.join(self.save_dir, path)
 
+        is_default = os.path.abspath(file_path) == os.path.abspath(self._default_path())
+
+        digest = hashlib.sha1()
         if not os.path.exists(file_path):
             # 文件不存在，不报错，只清空列表
-            self.events = []
-            return
+            records = []
+        else:
+            # 锁外流式解析，解析失败不影响当前列表
+            with perf.span("events.load"):
+                records = [EventRecord.from_dict(evt)
+                           for evt in iter_json_array(file_path, on_progress, hasher=digest)]
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        try:
+            with self._lock:
+                self._load_data(records, digest.hexdigest(), is_default, file_path)
+        finally:
+            self._notify("reset", None)
 
-        if not isinstance(data, list):
-            raise ValueError(f"事件文件格式错误：根节点应为列表，实际得到 {type(data)}")
-        self.events = data
+    def _load_data(self, records: list, digest: str, is_default: bool, file_path: str = None):
+        """替换内存列表；日志模式下加载默认文件时重放日志（调用方持锁）"""
+        self._reset_events(records)
+        if self.journal:
+            if not is_default:
+                # 载入外部文件：整体替换，记下文件路径与摘要；events.json 留给之后的压缩改写
+                self._log({"op": "load", "path": os.path.abspath(file_path), "sha1": digest})
+            else:
+                # 重放与快照匹配的日志，并把它重写为干净的当前日志
+                self._base = digest
+                records = self.journal.load(self._base)
+                records = records[:self._replay(records)]
+                if records:
+                    self.journal.begin(self._base, records)
+                self._dirty = bool(records)
 
     def save_events(self, file_name: str = "events.json"):
         """
         将当前事件列表写入 save_dir/file_name。
+        日志模式下保存默认文件即立即压缩。
         """
         os.makedirs(self.save_dir, exist_ok=True)
         file_path = file_name if os.path.isabs(file_name) else os.path.join(self.save_dir, file_name)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(self.events, f, ensure_ascii=False, indent=4)
+        if self.journal and os.path.abspath(file_path) == os.path.abspath(self._default_path()):
+            self.compact()
+            return
+        with self._lock:
+            snapshot = self._snapshot()
+        with perf.span("events.save"):
+            write_events_json(file_path, snapshot)
+
+    def compact(self):
+        """
+        把当前事件列表写成新的 events.json 快照并重置日志：
+         1. 复制记录列表（持锁，极短），在锁外逐条序列化写临时文件并计算摘要
+         2. 持锁写出以新快照为基的 .next 日志（含压缩期间产生的记录）
+         3. 原子替换快照，再把 .next 日志改名为当前日志
+        任一步骤崩溃后，load_events 都能找到与快照匹配的日志。
+        """
+        with self._compact_lock:
+            with self._lock:
+                snapshot = self._snapshot()
+                self._pending = []
+                self._dirty = False
+            try:
+                file_path = self._default_path()
+                os.makedirs(self.save_dir, exist_ok=True)
+                tmp = file_path + ".tmp"
+                digest = hashlib.sha1()
+                with perf.span("events.compact"):
+                    write_events_json(tmp, snapshot, hasher=digest)
+                base = digest.hexdigest()
+                with self._lock:
+                    pending = self._pending
+                    if self.journal:
+                        self.journal.reset(base, pending)
+                    os.replace(tmp, file_path)
+                    if self.journal:
+                        self.journal.promote()
+                    self._base = base
+                    self._dirty = bool(pending)
+            except Exception:
+                with self._lock:
+                    self._dirty = True
+                raise
+            finally:
+                with self._lock:
+                    self._pending = None
+
+    def _snapshot(self):
+        """当前列表的快照（调用方持锁）：批量修改尚未写回的记录在锁外序列化时逐条生成"""
+        records = list(self._records)
+        if self._patch is None:
+            return records
+        return self._patch.copy().records(records)
+
+    def close(self):
+        """停止后台压缩；有未压缩的改动时最后压缩一次"""
+        self._closed.set()
+        if self.journal:
+            if self._dirty:
+                self.compact()
+            self.journal.close()
+
+    def _compact_loop(self):
+        while not self._closed.wait(EVENT_COMPACT_INTERVAL_S):
+            # 快照基未知（默认文件无法读取且未能移开）时不自动覆盖 events.json
+            if self._dirty and self._base is not None:
+                try:
+                    self.compact()
+                except OSError:
+                    pass
+
+    def _log(self, record: dict):
+        """记录一次改动：写日志，压缩进行中则同时暂存，带入新日志"""
+        if not self.journal:
+            return
+        self._dirty = True
+        if self._pending is not None:
+            self._pending.append(record)
+        if self._base is not None:
+            if self.journal.base != self._base:
+                # 本进程第一次写日志：以当前快照为基开始新日志，覆盖过期日志
+                self.journal.begin(self._base)
+            with perf.span("events.journal"):
+                self.journal.append(record)
+
+    def _replay(self, records) -> int:
+        """按顺序重放日志记录，返回重放成功的条数；与当前列表对不上的记录及其后的记录都被丢弃"""
+        for k, rec in enumerate(records):
+            try:
+                self._apply(rec)
+            except (KeyError, IndexError, TypeError, ValueError, OSError):
+                return k
+        return len(records)
+
+    def _apply(self, rec: dict):
+        """重放一条日志记录"""
+        op = rec.get("op")
+        if op == "add":
+            self._insert(rec["evt"])
+        elif op == "update":
+            self._replace(rec["idx"], rec["evt"])
+        elif op == "delete":
+            self._remove(rec["idx"])
+        elif op == "load":
+            digest = hashlib.sha1()
+            records = [EventRecord.from_dict(evt) for evt in iter_json_array(rec["path"], hasher=digest)]
+            if digest.hexdigest() != rec["sha1"]:
+                raise ValueError(f"载入的事件文件已变化：{rec['path']}")
+            self._reset_events(records)
+        elif op == "batch":
+            batch = event_bulk.read_batch_record(rec)
+            n = len(self._records)
+            if rec["n"] != n or any(a is not None and len(a) and (a.min() < 0 or a.max() >= n)
+                                    for a in (batch["positions"], batch["drop"])):
+                raise ValueError("批量修改记录与事件列表不符")
+            self._apply_batch(self.columns(), **batch)
+
+    # ---------- 列表与索引的同步修改 ----------
+    def _reset_events(self, records: list):
+        self._records = records
+        self._ids = list(range(self._next_id, self._next_id + len(records)))
+        self._next_id += len(records)
+        self._patch = None
+        # 区间索引由整列帧号建立（排序交给 NumPy）；字段倒排索引在后台建立
+        self._cols = event_bulk.EventColumns.from_records(records)
+        self.intervals.rebuild_columns(self._ids, self._cols.start, self._cols.end)
+        self._rebuild_fields()
+
+    def _field_items(self):
+        return self._ids, self._records
+
+    def _rebuild_fields(self):
+        """丢弃字段索引并在后台线程重建（调用方持锁）"""
+        self.fields.invalidate(self._field_items)
+        threading.Thread(target=self._build_fields, name="EventFieldIndex", daemon=True).start()
+
+    def _build_fields(self):
+        """持锁只取出记录列表，锁外建立索引，再持锁换入"""
+        with self._lock:
+            job = self.fields.prepare()
+        if job is None:
+            return  # 已被查询当场建立，或另一个线程正在建立
+        built = None
+        try:
+            with perf.span("events.field_index"):
+                built = self.fields.build(job)
+        finally:
+            with self._lock:
+                if built is not None:
+                    self.fields.install(job, built)
+                else:
+                    self.fields.cancel(job)
+                self._fields_built.notify_all()
+
+    def _await_fields(self):
+        """后台正在建立字段索引时等它完成（调用方持锁，等待期间释放），不在查询中再建一遍"""
+        while self.fields.building:
+            self._fields_built.wait()
+
+    def _insert(self, evt: dict) -> int:
+        rec = EventRecord.from_dict(evt)
+        eid = self._next_id
+        self._next_id += 1
+        self._records.append(rec)
+        self._ids.append(eid)
+        self.intervals.add(eid, rec)
+        self.fields.add(eid, rec)
+        if self._cols is not None:
+            self._cols.append(rec)
+        if self._patch is not None:
+            self._patch.append()
+        return eid
+
+    def _replace(self, idx: int, evt: dict) -> int:
+        rec = EventRecord.from_dict(evt)
+        eid = self._ids[idx]
+        self._records[idx] = rec
+        self.intervals.update(eid, rec)
+        self.fields.update(eid, rec)
+        if self._cols is not None:
+            self._cols.set(idx, rec)
+        if self._patch is not None:
+            self._patch.clear(idx)
+        return eid
+
+    def _remove(self, idx: int) -> int:
+        self._records.pop(idx)
+        eid = self._ids.pop(idx)
+        self.intervals.remove(eid)
+        self.fields.remove(eid)
+        if self._cols is not None:
+            self._cols.delete(idx)
+        if self._patch is not None:
+            self._patch.delete(idx)
+        return eid
+
+    # ---------- 差异通知 ----------
+    def subscribe(self, callback):
+        """注册改动监听器 callback(op, eid)"""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, op: str, eid):
+        for cb in list(self._listeners):
+            cb(op, eid)
+
+    # ---------- 事件ID ----------
+    def event_id(self, idx: int) -> int:
+        """列表位置 idx 上事件的稳定ID"""
+        return self._ids[idx]
 
-    def add_event(self, evt: dict):
-        self.events.append(evt)
+    def index_of(self, eid: int) -> int:
+        """事件ID当前所在的列表位置（事件ID按列表顺序递增，二分查找）"""
+        i = bisect.bisect_left(self._ids, eid)
+        if i < len(self._ids) and self._ids[i] == eid:
+            return i
+        raise KeyError(f"事件不存在：ID {eid}")
+
+    def _positions(self, event_ids):
+        """一组事件ID的列表位置（升序，不存在的忽略）"""
+        ids = np.asarray(self._ids, dtype=np.int64)
+        wanted = np.unique(np.asarray(list(event_ids), dtype=np.int64))
+        pos = np.searchsorted(ids, wanted)
+        found = pos < len(ids)
+        pos, wanted = pos[found], wanted[found]
+        return pos[ids[pos] == wanted]
+
+    def get_event(self, eid: int) -> dict:
+        """事件ID对应事件的 dict 副本"""
+        return self.get_record(eid).to_dict()
+
+    def get_record(self, eid: int) -> EventRecord:
+        """事件ID对应的只读记录（不复制，供列表渲染、排序等热路径使用）"""
+        with self._lock:
+            i = self.index_of(eid)
+            if self._patch is not None and self._patch.stale[i]:
+                return self._fresh(i)
+            return self._records[i]
+
+    def _fresh(self, i: int) -> EventRecord:
+        """把批量修改的数值写回位置 i：生成新记录替换旧记录（调用方持锁）"""
+        rec = self._patch.apply(self._records[i], i)
+        self._records[i] = rec
+        self._patch.clear(i)
+        return rec
+
+    def _materialize(self):
+        """把批量修改的数值全部写回记录（调用方持锁）"""
+        if self._patch is None:
+            return
+        for i in np.flatnonzero(self._patch.stale).tolist():
+            self._fresh(i)
+        self._patch = None
+
+    def event_ids(self):
+        """按列表顺序返回全部事件ID"""
+        return list(self._ids)
+
+    # ---------- 筛选 ----------
+    def search(self, comment: str = None, **fields):
+        """
+        按字段倒排索引筛选，返回事件ID集合，例如
+        search(event_type="Revive", language="zh_CN", comment="残血")。
+        条件见 EventFieldIndex.search。
+        """
+        with self._lock:
+            self._await_fields()
+            return self.fields.search(comment, **fields)
+
+    def matches(self, eid: int, comment: str = None, **fields) -> bool:
+        """事件 eid 是否满足与 search 相同的条件"""
+        with self._lock:
+            self._await_fields()
+            return self.fields.matches(eid, comment, **fields)
+
+    def field_values(self, field: str):
+        """字段的全部取值及事件数，按数量降序"""
+        with self._lock:
+            self._await_fields()
+            return self.fields.values(field)
+
+    # ---------- 增删改 ----------
+    def add_event(self, evt: dict) -> int:
+        """添加事件，返回其事件ID"""
+        with self._lock:
+            eid = self._insert(evt)
+            self._log({"op": "add", "evt": evt})
+        self._notify("add", eid)
+        return eid
 
     def delete_event(self, idx: int):
-        if 0 <= idx < len(self.events):
-            self.events.pop(idx)
-        else:
-            raise IndexError(f"删除事件失败：索引 {idx} 越界")
+        with self._lock:
+            if 0 <= idx < len(self._records):
+                eid = self._remove(idx)
+                self._log({"op": "delete", "idx": idx})
+            else:
+                raise IndexError(f"删除事件失败：索引 {idx} 越界")
+        self._notify("delete", eid)
 
     def update_event(self, idx: int, evt: dict):
-        if 0 <= idx < len(self.events):
-            self.events[idx] = evt
-        else:
-            raise IndexError(f"更新事件失败：索引 {idx} 越界")
+        with self._lock:
+            if 0 <= idx < len(self._records):
+                eid = self._replace(idx, evt)
+                self._log({"op": "update", "idx": idx, "evt": evt})
+            else:
+                raise IndexError(f"更新事件失败：索引 {idx} 越界")
+        self._notify("update", eid)
+
+    # ---------- 批量操作 ----------
+    def retime(self, frame_to_time) -> int:
+        """
+        按帧号批量重算全部事件的 highlight_time / duration_seconds：
+        帧号列一次换算，只把数值有变化的位置记入批量修改，不逐条生成记录。
+        :param frame_to_time: 接受帧号数组、返回秒数数组的换算函数（如 VideoCore.frame_to_time）
+        :return: 被修改的事件数
+        """
+        with self._lock:
+            cols = self.columns()
+            start = np.asarray(frame_to_time(cols.start), dtype=np.float64)
+            duration = np.asarray(frame_to_time(cols.end), dtype=np.float64) - start
+            # 文件中读入的时间可能缺失或不是数值：旧时间为 NaN，视为需要重算
+            old_t = event_bulk.float_column(self._records, "highlight_time")
+            old_d = event_bulk.float_column(self._records, "duration_seconds")
+            if self._patch is not None:
+                self._patch.overlay_times(old_t, old_d)
+            changed = np.flatnonzero(~np.isclose(old_t, start, rtol=0, atol=1e-9)
+                                     | ~np.isclose(old_d, duration, rtol=0, atol=1e-9))
+            count = self._batch(cols, changed, time=start[changed], seconds=duration[changed])
+        return self._commit_batch(count)
+
+    def columns(self) -> "event_bulk.EventColumns":
+        """
+        当前事件列表的数值列（帧号、持续帧数、分组编码），位置与列表位置一致。
+        随增删改与批量修改按列更新，只读使用。
+        """
+        with self._lock:
+            if self._cols is None:
+                cols = event_bulk.EventColumns.from_records(self._records)
+                if self._patch is not None:
+                    self._patch.overlay(cols.start, cols.duration)
+                self._cols = cols
+            return self._cols
+
+    def find_overlaps(self, tolerance: int = 0):
+        """同 game_type / event_type 内区间重叠（间隔 <= tolerance 帧）的事件簇：[[事件ID, ...], ...]"""
+        with self._lock:
+            ids = self._ids
+            clusters = event_bulk.find_overlaps(self.columns(), tolerance)
+            return [[ids[i] for i in grp.tolist()] for grp in clusters]
+
+    def dedupe(self, frame_tolerance: int = 0, duration_tolerance: int = 0) -> int:
+        """删除同组内起点与持续帧数都近似相同的重复事件（保留最早的一条），返回删除数"""
+        with self._lock:
+            cols = self.columns()
+            drop = event_bulk.find_duplicates(cols, frame_tolerance, duration_tolerance)
+            count = self._batch(cols, drop=drop)
+        return self._commit_batch(count)
+
+    def merge_overlaps(self, tolerance: int = 0, frame_to_time=None) -> int:
+        """
+        把同组内重叠的事件合并为一条（保留最早的事件，区间扩展到整簇），返回修改与删除的事件数。
+        :param frame_to_time: 可选的帧号数组 -> 秒数数组换算；给出时同时重算被扩展事件的时间字段
+        """
+        with self._lock:
+            cols = self.columns()
+            keep, start, duration, drop = event_bulk.merge_overlaps(cols, tolerance)
+            count = self._batch(cols, keep, start, duration, drop, frame_to_time)
+        return self._commit_batch(count)
+
+    def shift_events(self, delta: int, event_ids=None, frame_to_time=None) -> int:
+        """把指定事件（默认全部）整体平移 delta 帧，返回修改数"""
+        with self._lock:
+            cols = self.columns()
+            positions = None if event_ids is None else self._positions(event_ids)
+            positions, start = event_bulk.shift(cols, delta, positions)
+            count = self._batch(cols, positions, start, cols.duration[positions], frame_to_time=frame_to_time)
+        return self._commit_batch(count)
+
+    def rescale_fps(self, old_fps: float, new_fps: float, frame_to_time=None) -> int:
+        """
+        事件帧号按帧率变化整体换算（如事件按 60fps 标注、视频实为 30fps），返回修改数。
+        时间字段按 frame_to_time 重算，未给出时按 new_fps 计算。
+        帧率不是有限正数时抛出 ValueError，不做任何修改。
+        """
+        old_fps = event_bulk.check_fps(old_fps, "old_fps")
+        new_fps = event_bulk.check_fps(new_fps, "new_fps")
+        if frame_to_time is None:
+            frame_to_time = lambda f: f / new_fps
+        with self._lock:
+            cols = self.columns()
+            start, duration = event_bulk.rescale_fps(cols, old_fps, new_fps)
+            count = self._batch(cols, np.arange(len(cols)), start, duration, frame_to_time=frame_to_time)
+        return self._commit_batch(count)
+
+    def delete_events(self, event_ids) -> int:
+        """一次删除多条事件，返回删除数"""
+        with self._lock:
+            count = self._batch(self.columns(), drop=self._positions(event_ids))
+        return self._commit_batch(count)
+
+    def _batch(self, cols, positions=None, start=None, duration=None, drop=None, frame_to_time=None,
+               time=None, seconds=None) -> int:
+        """
+        应用一次批量修改并写成一条 "batch" 日志记录（调用方持锁）。
+        给出 frame_to_time 时按新帧号重算被修改事件的时间字段，算好的时间随记录写入日志，重放时不再换算。
+        :param cols: 修改前的 EventColumns
+        :return: 修改与删除的事件总数
+        """
+        positions = np.zeros(0, dtype=np.int64) if positions is None else np.asarray(positions, dtype=np.int64)
+        drop = np.zeros(0, dtype=np.int64) if drop is None else np.asarray(drop, dtype=np.int64)
+        if not len(positions) and not len(drop):
+            return 0
+        if len(positions) and frame_to_time is not None:
+            s = cols.start[positions] if start is None else start
+            d = cols.duration[positions] if duration is None else duration
+            time = np.asarray(frame_to_time(s), dtype=np.float64)
+            seconds = np.asarray(frame_to_time(s + d), dtype=np.float64) - time
+        n = len(self._records)
+        self._apply_batch(cols, positions, start, duration, time, seconds, drop)
+        if self.journal:
+            with perf.span("events.journal_batch"):
+                self._log(event_bulk.batch_record(n, positions, start, duration, time, seconds, drop))
+        return len(positions) + len(drop)
+
+    def _apply_batch(self, cols, positions, start=None, duration=None, time=None, seconds=None, drop=None):
+        """
+        作为一个事务应用批量修改（调用方持锁；重放 "batch" 日志记录也经由此处）：
+        先按位置记下新帧号与时间字段，再删除 drop 中的位置，最后按修改后的列更新区间索引。
+        改动只按列记入 _patch，不逐条生成记录：读取单条记录时才替换成新记录，序列化快照时逐条生成。
+        :param cols: 修改前的 EventColumns；positions / drop 均为修改前的列表位置
+        """
+        frames = start is not None and len(positions) > 0
+        if len(positions):
+            if self._patch is None:
+                self._patch = event_bulk.RecordPatch(len(self._records))
+            self._patch.mark(positions, start, duration, time, seconds)
+        starts, durations, group = cols.start, cols.duration, cols.group
+        if frames:
+            starts, durations = starts.copy(), durations.copy()
+            starts[positions] = start
+            durations[positions] = duration
+        if drop is not None and len(drop):
+            keep = np.ones(len(self._records), dtype=bool)
+            keep[drop] = False
+            dropped = [self._ids[i] for i in drop.tolist()]
+            flags = keep.tolist()
+            self._records = list(compress(self._records, flags))
+            self._ids = list(compress(self._ids, flags))
+            if self._patch is not None:
+                self._patch.keep(keep)
+            starts, durations, group = starts[keep], durations[keep], group[keep]
+            # 批量修改不改字段取值：字段索引只需去掉删除的事件，删除很多时整体重建更快
+            if len(dropped) * 8 > len(flags):
+                self._rebuild_fields()
+            else:
+                for eid in dropped:
+                    self.fields.remove(eid)
+            if not frames:
+                self.intervals.remove_many(dropped)
+        self._cols = event_bulk.EventColumns(starts, durations, group, cols.group_names)
+        if frames:
+            self.intervals.rebuild_columns(self._ids, starts, starts + durations)
+        self._dirty = True
+
+    def _commit_batch(self, count: int) -> int:
+        """批量修改后（锁外）发出一次 "reset" 通知；新快照留给后台压缩线程写出"""
+        if count:
+            self._notify("reset", None)
+        return count
 
 
 if __name__ == "__main__":
@@ -0,0 +1,251 @@
+# event_recorder/core/event_merge.py
+"""
+多个标注员的事件文件流式合并（外部排序 + k 路归并），内存占用与文件总大小无关。
+
+    python -m event_recorder.core.event_merge 标注员A/events.json 标注员B/events.json ... --out merged.json
+
+1. 切分：进程池并行流式读取各输入文件，每攒满 MERGE_RUN_EVENTS 条按 (视频, highlight_frame, ...) 排序，
+   写成一个有序段（临时 JSON Lines 文件）
+2. 归并：heapq 对全部有序段做 k 路归并（段数超过 MERGE_FAN_IN 时先分批归并），流式写出合并结果
+3. 冲突：归并输出按视频与起点有序，扫描时只保留仍与当前事件重叠的事件，
+   报告不同输入文件之间区间不一致（同类型）或类型不一致（不同类型、高度重叠）的事件对
+
+每条合并后的事件带 "provenance": {"file": 来源文件, "index": 在来源文件中的位置}。
+视频以事件 save_path 的最后一级目录名区分（与界面保存事件时的约定一致）。
+"""
+
+import argparse
+import heapq
+import json
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from event_recorder.config import (
+    MERGE_RUN_EVENTS, MERGE_FAN_IN, MERGE_WORKERS, MERGE_SPAN_TOLERANCE_FRAMES, MERGE_CONFLICT_IOU
+)
+from event_recorder.core.event_index import event_span
+from event_recorder.core.event_store import iter_json_array, write_events_json
+
+
+def video_key(evt: dict) -> str:
+    """事件所属视频：save_path 的最后一级目录名"""
+    path = str(evt.get("save_path") or "").rstrip("/\\")
+    return os.path.basename(path.replace("\\", "/"))
+
+
+def _sort_key(evt: dict, source: int, index: int):
+    start, end = event_span(evt)
+    return [video_key(evt), start, end - start, source, index]
+
+
+def _write_run(run_dir: str, name: str, items) -> str:
+    items.sort(key=lambda item: item[0])
+    path = os.path.join(run_dir, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        for item in items:
+            f.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+    return path
+
+
+def split_runs(events_path: str, source: int, run_dir: str, run_events: int = MERGE_RUN_EVENTS):
+    """
+    进程池任务：流式读取一个事件文件，切成若干有序段。
+    每行为 [排序键, 事件]，事件已附带 provenance。
+    :return: 有序段文件路径列表
+    """
+    runs, items = [], []
+    for index, evt in enumerate(iter_json_array(events_path)):
+        if not isinstance(evt, dict):
+            raise ValueError(f"事件文件格式错误：{events_path} 第 {index} 项不是对象")
+        if "provenance" not in evt:  # 再次合并已合并的文件时保留最初的来源
+            evt = dict(evt, provenance={"file": os.path.abspath(events_path), "index": index})
+        items.append((_sort_key(evt, source, index), evt))
+        if len(items) >= run_events:
+            runs.append(_write_run(run_dir, f"s{source:05d}_{len(runs):05d}.jsonl", items))
+            items = []
+    if items or not runs:
+        runs.append(_write_run(run_dir, f"s{source:05d}_{len(runs):05d}.jsonl", items))
+    return runs
+
+
+def _read_run(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            key, evt = json.loads(line)
+            yield key, evt
+
+
+def _merge_runs(paths):
+    """k 路归并若干有序段，产出 (排序键, 事件)"""
+    return heapq.merge(*(_read_run(p) for p in paths), key=lambda item: item[0])
+
+
+def _reduce_runs(runs, run_dir: str, fan_in: int = MERGE_FAN_IN):
+    """段数超过 fan_in 时分批归并成更大的段，直到能一次打开全部段"""
+    level = 0
+    while len(runs) > fan_in:
+        merged = []
+        for k in range(0, len(runs), fan_in):
+            batch = runs[k:k + fan_in]
+            path = os.path.join(run_dir, f"m{level:02d}_{len(merged):05d}.jsonl")
+            with open(path, 'w', encoding='utf-8') as f:
+                for item in _merge_runs(batch):
+                    f.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+                    f.write("\n")
+            for p in batch:
+                os.remove(p)
+            merged.append(path)
+        runs = merged
+        level += 1
+    return runs
+
+
+class ConflictDetector:
+    """
+    在按 (视频, 起点) 有序的事件流上检测不同来源之间的分歧：
+    - span：同 game_type / event_type、区间重叠，但起点或终点相差超过 tolerance 帧
+    - type：event_type 不同、区间交并比 >= iou
+    只保留结束帧不早于当前起点的活动事件，内存与同时重叠的事件数相当。
+    """
+
+    def __init__(self, tolerance: int = MERGE_SPAN_TOLERANCE_FRAMES, iou: float = MERGE_CONFLICT_IOU):
+        self.tolerance = tolerance
+        self.iou = iou
+        self.counts = {"span": 0, "type": 0, "agree": 0}
+        self._video = None
+        self._active = []  # (结束帧, 起点, 来源序号, 事件)
+
+    def feed(self, key, evt: dict):
+        """送入下一条事件，返回与之前事件的冲突记录列表"""
+        video, start, duration, source, _ = key
+        end = start + duration
+        if video != self._video:
+            self._video = video
+            self._active = []
+        self._active = [a for a in self._active if a[0] >= start]
+        found = []
+        for a_end, a_start, a_source, other in self._active:
+            if a_source == source:
+                continue
+            same_kind = (other.get("game_type"), other.get("event_type")) == (evt.get("game_type"), evt.get("event_type"))
+            if same_kind:
+                if abs(a_start - start) <= self.tolerance and abs(a_end - end) <= self.tolerance:
+                    self.counts["agree"] += 1
+                    continue
+                kind = "span"
+            else:
+                inter = min(a_end, end) - max(a_start, start)
+                union = max(a_end, end) - min(a_start, start)
+                if union <= 0 or inter / union < self.iou:
+                    continue
+                kind = "type"
+            self.counts[kind] += 1
+            found.append({
+                "kind": kind,
+                "video": video,
+                "a": {"span": [a_start, a_end], "event_type": other.get("event_type"),
+                      "provenance": other.get("provenance")},
+                "b": {"span": [start, end], "event_type": evt.get("event_type"),
+                      "provenance": evt.get("provenance")},
+            })
+        self._active.append((end, start, source, evt))
+        return found
+
+
+def merge_event_files(inputs, out_path: str, report_path: str = None, workers=MERGE_WORKERS,
+                      run_events: int = MERGE_RUN_EVENTS, fan_in: int = MERGE_FAN_IN,
+                      tolerance: int = MERGE_SPAN_TOLERANCE_FRAMES, iou: float = MERGE_CONFLICT_IOU,
+                      on_progress=None) -> dict:
+    """
+    合并多个事件文件。
+    :param inputs: 事件文件路径列表（顺序决定同一位置事件的先后）
+    :param report_path: 冲突报告（JSON Lines，每行一对分歧事件）；为 None 时只统计
+    :param on_progress: 可选回调 on_progress(阶段, 已完成, 总数)，阶段为 "split" / "merge"
+    :return: 汇总 {"inputs", "events", "runs", "conflicts": {"span", "type", "agree"}}
+    """
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    os.makedirs(out_dir, exist_ok=True)
+    run_dir = tempfile.mkdtemp(prefix=".merge_", dir=out_dir)
+    try:
+        runs = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(split_runs, path, k, run_dir, run_events) for k, path in enumerate(inputs)]
+            for done, fut in enumerate(futures, 1):
+                runs.extend(fut.result())
+                if on_progress:
+                    on_progress("split", done, len(futures))
+        run_count = len(runs)
+        runs = _reduce_runs(runs, run_dir, fan_in)
+
+        detector = ConflictDetector(tolerance, iou)
+        report = open(report_path, 'w', encoding='utf-8') if report_path else None
+        count = 0
+
+        def merged():
+            nonlocal count
+            for key, evt in _merge_runs(runs):
+                for conflict in detector.feed(key, evt):
+                    if report:
+                        report.write(json.dumps(conflict, ensure_ascii=False) + "\n")
+                count += 1
+                if on_progress and count % 100_000 == 0:
+                    on_progress("merge", count, 0)
+                yield evt
+
+        try:
+            tmp = out_path + ".tmp"
+            write_events_json(tmp, merged())
+            os.replace(tmp, out_path)
+        finally:
+            if report:
+                report.close()
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    return {"inputs": len(inputs), "events": count, "runs": run_count, "conflicts": detector.counts}
+
+
+def find_event_files(paths):
+    """展开输入：文件原样保留，目录递归查找其中的 events.json"""
+    found = []
+    for p in paths:
+        if os.path.isdir(p):
+            found.extend(sorted(
+                os.path.join(dirpath, "events.json")
+                for dirpath, _, files in os.walk(p) if "events.json" in files
+            ))
+        else:
+            found.append(p)
+    return found
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="流式合并多个标注员的事件文件并报告分歧")
+    parser.add_argument("inputs", nargs="+", help="事件文件，或包含 events.json 的目录")
+    parser.add_argument("--out", required=True, help="合并结果文件")
+    parser.add_argument("--report", default=None, help="冲突报告（JSON Lines）")
+    parser.add_argument("--workers", type=int, default=MERGE_WORKERS, help="并行切分输入的进程数")
+    parser.add_argument("--tolerance", type=int, default=MERGE_SPAN_TOLERANCE_FRAMES,
+                        help="同类型事件起止帧允许的差异（帧）")
+    parser.add_argument("--iou", type=float, default=MERGE_CONFLICT_IOU, help="不同类型事件视为冲突的交并比")
+    args = parser.parse_args(argv)
+
+    inputs = find_event_files(args.inputs)
+    if not inputs:
+        print("没有找到事件文件")
+        return 1
+    summary = merge_event_files(
+        inputs, args.out, args.report, args.workers, tolerance=args.tolerance, iou=args.iou,
+        on_progress=lambda stage, d, t: print(f"切分 {d}/{t}" if stage == "split" else f"已合并 {d} 条")
+    )
+    c = summary["conflicts"]
+    print(f"输入 {summary['inputs']} 个文件，合并 {summary['events']} 条事件（{summary['runs']} 个有序段）")
+    print(f"区间不一致 {c['span']}，类型冲突 {c['type']}，一致 {c['agree']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+# event_recorder/core/event_search.py
+
+from operator import attrgetter
+
+from event_recorder.config import SEARCH_GRAM_SIZE
+from event_recorder.core.event_store import _MISSING
+from event_recorder.core.lazy_import import lazy_import
+np = lazy_import("numpy")
+
+# 按取值精确匹配的字段（取值高度重复，倒排表很短）
+KEYWORD_FIELDS = ("game_type", "event_type", "language", "event_text")
+
+_PAD_HEAD = "\x02"  # 首尾填充，使短文本与首尾字符也落在某个 n-gram 中
+_PAD_TAIL = "\x03"
+
+
+def _normalize(value) -> str:
+    if value is None or value is _MISSING:
+        return ""
+    return value if isinstance(value, str) else str(value)
+
+
+def field_value(rec, field: str) -> str:
+    """事件字段的索引取值：缺失或 None 为空串，非字符串转为字符串"""
+    return _normalize(rec.get(field))
+
+
+def _field_column(records, field: str):
+    """一列字段的索引取值；不同的原始值通常很少，规范化只对每个不同值做一次"""
+    raw = list(map(attrgetter(field), records))
+    try:
+        norm = {v: _normalize(v) for v in set(raw)}
+    except TypeError:  # 存在不可哈希的取值（列表等），逐个规范化
+        return [_normalize(v) for v in raw]
+    return [norm[v] for v in raw]
+
+
+def _group_ids(ids, values) -> dict:
+    """取值 -> 事件ID列表：取值编码为整数后稳定排序、分段，不逐个追加"""
+    if not len(values):
+        return {}
+    distinct = list(dict.fromkeys(values))
+    code = {v: i for i, v in enumerate(distinct)}
+    keys = np.fromiter(map(code.__getitem__, values), dtype=np.int64, count=len(values))
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    bounds = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    groups = np.split(np.asarray(ids, dtype=np.int64)[order], bounds)
+    return {distinct[keys[g]]: group.tolist() for g, group in zip(np.r_[0, bounds].tolist(), groups)}
+
+
+def comment_grams(text: str, n: int = SEARCH_GRAM_SIZE):
+    """备注（已转小写）的 n-gram 集合（首尾填充）；中文无空格分词，按字符 n-gram 切分对中英文一视同仁"""
+    if not text:
+        return set()
+    padded = _PAD_HEAD + text + _PAD_TAIL
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+class EventFieldIndex:
+    """
+    事件字段倒排索引：
+    - _postings[字段][取值]：该取值的事件ID集合（KEYWORD_FIELDS，精确匹配）
+    - _grams[n-gram]：备注含该 n-gram 的事件ID集合（备注子串查询）
+
+    加载或批量删除后调用 invalidate(source) 记下事件来源，由调用方在后台线程建立：
+    prepare() 持锁取出 (事件ID, 记录) 列表，build() 在锁外整体建立，install() 持锁换入，
+    期间的单条增删改先暂存，换入时补上。调用方应等进行中的后台建立（building）完成再查询，
+    没有后台建立时查询当场从 source() 建立。
+    建立之后的单条增删改增量维护。
+    查询把各条件的候选集合按从小到大求交，只对最终候选核对备注原文，
+    耗时与命中数相当，与事件总数无关。
+    """
+
+    def __init__(self, gram_size: int = SEARCH_GRAM_SIZE):
+        self.gram_size = gram_size
+        self._postings = {f: {} for f in KEYWORD_FIELDS}
+        self._grams = {}
+        self._entries = {}  # 事件ID -> (各字段取值..., 小写备注)，删除与核对备注时使用
+        self._source = None  # 返回 (事件ID, 记录) 序列的函数；不为 None 表示索引待建立
+        self._gen = 0  # 每次丢弃或当场建立索引时自增，作废进行中的后台建立
+        self._backlog = None  # 后台建立期间暂存的单条改动 [(事件ID, 记录或 None), ...]
+
+    def invalidate(self, source):
+        """丢弃索引，之后由 source() 给出的 (事件ID列表, 记录列表) 重建"""
+        for postings in self._postings.values():
+            postings.clear()
+        self._grams.clear()
+        self._entries.clear()
+        self._source = source
+        self._gen += 1
+        self._backlog = None
+
+    def _ensure(self):
+        if self._source is None:
+            return
+        source, self._source = self._source, None
+        self._gen += 1
+        self._backlog = None
+        self._build(*source())
+
+    # ---------- 后台建立 ----------
+    def prepare(self):
+        """
+        开始后台建立（调用方持锁）：返回 (代号, 事件ID列表, 记录列表)；
+        索引无需建立或已有后台建立进行中时返回 None。此后的单条增删改暂存，install 时补上。
+        """
+        if self._source is None or self._backlog is not None:
+            return None
+        self._backlog = []
+        ids, records = self._source()
+        return self._gen, list(ids), list(records)
+
+    @property
+    def building(self) -> bool:
+        """后台建立进行中（已 prepare，尚未 install / cancel）"""
+        return self._source is not None and self._backlog is not None
+
+    def cancel(self, job):
+        """后台建立失败：放弃暂存，之后的查询当场建立"""
+        if job[0] == self._gen:
+            self._backlog = None
+
+    def build(self, job) -> "EventFieldIndex":
+        """由 prepare 的结果建立一份独立的索引（不访问本索引，可在锁外执行）"""
+        built = EventFieldIndex(self.gram_size)
+        built._build(job[1], job[2])
+        return built
+
+    def install(self, job, built: "EventFieldIndex") -> bool:
+        """换入后台建立的索引并补上期间的改动（调用方持锁）；期间索引已被丢弃或当场建立时放弃"""
+        if job[0] != self._gen or self._source is None:
+            return False
+        backlog = self._backlog
+        self._postings, self._grams, self._entries = built._postings, built._grams, built._entries
+        self._source = None
+        self._backlog = None
+        for eid, rec in backlog:
+            self.remove(eid)
+            if rec is not None:
+                self.add(eid, rec)
+        return True
+
+    def _build(self, ids, records):
+        """
+        整体建立：按列取值，取值与备注先按不同值分组（重复度很高），
+        规范化与 n-gram 切分只对每个不同值做一次
+        """
+        id_array = np.asarray(ids, dtype=np.int64)
+        columns = [_field_column(records, f) for f in KEYWORD_FIELDS]
+        comments = [c.lower() for c in _field_column(records, "comment")]
+        for field, values in zip(KEYWORD_FIELDS, columns):
+            postings = self._postings[field]
+            for value, group in _group_ids(id_array, values).items():
+                postings[value] = set(group)
+        grams = self._grams
+        for text, group in _group_ids(id_array, comments).items():
+            for gram in comment_grams(text, self.gram_size):
+                if gram in grams:
+                    grams[gram].update(group)
+                else:
+                    grams[gram] = set(group)
+        # 每个事件一个扁平元组：百万事件时对象数量直接决定建立耗时（含垃圾回收）
+        self._entries = dict(zip(ids, zip(*columns, comments)))
+
+    def add(self, eid: int, rec):
+        if self._source is not None:
+            # 索引待建立：当场建立时从来源读取最新事件，后台建立则换入时补上
+            if self._backlog is not None:
+                self._backlog.append((eid, rec))
+            return
+        values = tuple(field_value(rec, f) for f in KEYWORD_FIELDS)
+        comment = field_value(rec, "comment").lower()
+        self._entries[eid] = values + (comment,)
+        for value, postings in zip(values, self._postings.values()):
+            postings.setdefault(value, set()).add(eid)
+        for gram in comment_grams(comment, self.gram_size):
+            self._grams.setdefault(gram, set()).add(eid)
+
+    def remove(self, eid: int):
+        if self._source is not None:
+            if self._backlog is not None:
+                self._backlog.append((eid, None))
+            return
+        entry = self._entries.pop(eid, None)
+        if entry is None:
+            return
+        *values, comment = entry
+        for value, postings in zip(values, self._postings.values()):
+            self._discard(postings, value, eid)
+        for gram in comment_grams(comment, self.gram_size):
+            self._discard(self._grams, gram, eid)
+
+    def update(self, eid: int, rec):
+        self.remove(eid)
+        self.add(eid, rec)
+
+    @staticmethod
+    def _discard(postings: dict, key, eid: int):
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(eid)
+            if not ids:
+                del postings[key]
+
+    def __len__(self) -> int:
+        self._ensure()
+        return len(self._entries)
+
+    # ---------- 查询 ----------
+    def values(self, field: str):
+        """字段的全部取值及其事件数：[(取值, 数量), ...]，按数量降序（供筛选下拉框使用）"""
+        self._ensure()
+        postings = self._postings[field]
+        return sorted(((v, len(ids)) for v, ids in postings.items()), key=lambda item: (-item[1], item[0]))
+
+    def _comment_candidates(self, text: str):
+        """备注可能含 text 的事件ID集合（n-gram 求交的超集，需再核对原文）"""
+        n = self.gram_size
+        if len(text) >= n:
+            grams = sorted((self._grams.get(text[i:i + n], set()) for i in range(len(text) - n + 1)), key=len)
+            return set.intersection(*grams) if grams else set()
+        # 短于 n 的查询：并上所有包含它的 n-gram（词表远小于事件数）
+        found = set()
+        for gram, ids in self._grams.items():
+            if text in gram:
+                found |= ids
+        return found
+
+    def search(self, comment: str = None, **fields):
+        """
+        按条件筛选事件ID：fields 为 KEYWORD_FIELDS 中字段的精确取值（取值为可迭代集合时匹配其中任一），
+        comment 为备注子串（不区分大小写）。条件为 None 或空串时忽略，全部忽略时返回全部事件ID。
+        :return: 事件ID集合
+        """
+        self._ensure()
+        sets = []
+        for field, wanted in fields.items():
+            if field not in self._postings:
+                raise KeyError(f"不支持按字段筛选：{field}")
+            if wanted is None or wanted == "":
+                continue
+            postings = self._postings[field]
+            if isinstance(wanted, str):
+                sets.append(postings.get(wanted, set()))
+            else:
+                sets.append(set().union(*(postings.get(v, set()) for v in wanted)))
+        text = comment.lower() if comment else ""
+        if text:
+            sets.append(self._comment_candidates(text))
+        if not sets:
+            return set(self._entries)
+        sets.sort(key=len)
+        result = set(sets[0])
+        for s in sets[1:]:
+            if not result:
+                break
+            result &= s
+        if text:
+            entries = self._entries
+            result = {eid for eid in result if text in entries[eid][-1]}
+        return result
+
+    def matches(self, eid: int, comment: str = None, **fields) -> bool:
+        """单个事件是否满足 search 的同一组条件（增量更新列表时逐条判断）"""
+        self._ensure()
+        entry = self._entries.get(eid)
+        if entry is None:
+            return False
+        *values, text = entry
+        for field, wanted in fields.items():
+            if wanted is None or wanted == "":
+                continue
+            value = values[KEYWORD_FIELDS.index(field)]
+            if value != wanted if isinstance(wanted, str) else value not in wanted:
+                return False
+        return not comment or comment.lower() in text
@@ -0,0 +1,235 @@
+# event_recorder/core/event_store.py
+
+import codecs
+import json
+import os
+import sys
+
+# 事件字段（导出顺序与 README 一致）
+EVENT_FIELDS = (
+    "game_type", "event_type", "highlight_frame", "highlight_time",
+    "duration_frames", "duration_seconds", "event_text",
+    "save_path", "language", "comment",
+)
+# 取值高度重复的字段，驻留为同一个字符串对象
+INTERNED_FIELDS = frozenset(("game_type", "event_type", "event_text", "save_path", "language"))
+
+_MISSING = object()  # 字段在原始数据中不存在（与值为 None 区分）
+
+# 流式读取的块大小（字节）
+STREAM_CHUNK_BYTES = 1 << 20
+
+
+class EventRecord:
+    """
+    紧凑的事件记录：固定字段放在 __slots__ 中，重复字符串驻留共享，
+    未知字段放入 extra。视为不可变：修改事件时整体替换记录。
+
+    提供 get / [] / in 等只读映射接口，读路径可直接当 dict 用；
+    需要真正的 dict（序列化、编辑）时调用 to_dict()。
+    """
+    __slots__ = EVENT_FIELDS + ("extra",)
+
+    def __init__(self):
+        for name in EVENT_FIELDS:
+            setattr(self, name, _MISSING)
+        self.extra = None
+
+    @classmethod
+    def from_dict(cls, evt: dict) -> "EventRecord":
+        if not isinstance(evt, dict):
+            raise ValueError(f"事件文件格式错误：事件应为对象，实际得到 {type(evt)}")
+        rec = cls()
+        extra = None
+        for key, value in evt.items():
+            if key in INTERNED_FIELDS and isinstance(value, str):
+                setattr(rec, key, sys.intern(value))
+            elif key in _FIELD_SET:
+                setattr(rec, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        rec.extra = extra
+        return rec
+
+    def replace(self, **changes) -> "EventRecord":
+        """返回修改了若干固定字段的新记录（原记录不变）"""
+        rec = EventRecord.__new__(EventRecord)
+        for name in EventRecord.__slots__:
+            setattr(rec, name, getattr(self, name))
+        for key, value in changes.items():
+            setattr(rec, key, value)
+        return rec
+
+    def to_dict(self) -> dict:
+        d = {}
+        for name in EVENT_FIELDS:
+            value = getattr(self, name)
+            if value is not _MISSING:
+                d[name] = value
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        if self.extra:
+            return self.extra.get(key, default)
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def __repr__(self) -> str:
+        return f"EventRecord({self.to_dict()!r})"
+
+
+_FIELD_SET = frozenset(EVENT_FIELDS)
+
+
+def is_candidate(evt) -> bool:
+    """是否为自动检测产生、尚未被确认的候选事件（"confirmed": false）"""
+    return evt.get("confirmed") is False
+
+
+class EventsView:
+    """
+    EventManager.events 的惰性列表视图：按需把记录转换为 dict，
+    兼容原先 list-of-dict 的读取方式（len / 下标 / 切片 / 迭代）。
+    """
+
+    def __init__(self, records):
+        self._records = records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __bool__(self) -> bool:
+        return bool(self._records)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [r.to_dict() for r in self._records[idx]]
+        return self._records[idx].to_dict()
+
+    def __iter__(self):
+        for r in self._records:
+            yield r.to_dict()
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"EventsView({len(self._records)} events)"
+
+
+def iter_json_array(file_path: str, on_progress=None, hasher=None, chunk_size: int = STREAM_CHUNK_BYTES):
+    """
+    流式解析根节点为数组的 JSON 文件，逐个产出数组元素，内存占用与单个元素大小相当。
+    :param on_progress: 可选回调 on_progress(已读字节数, 文件总字节数)
+    :param hasher: 可选的 hashlib 对象，读取的原始字节会同时喂给它
+    :raises ValueError: 根节点不是数组或 JSON 格式错误
+    """
+    total = os.path.getsize(file_path)
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf = ""
+    pos = 0
+    read = 0
+    eof = False
+    started = False
+
+    with open(file_path, 'rb') as f:
+        def fill():
+            nonlocal buf, pos, read, eof
+            raw = f.read(chunk_size)
+            if hasher is not None:
+                hasher.update(raw)
+            read += len(raw)
+            eof = not raw
+            buf = buf[pos:] + utf8.decode(raw, final=eof)
+            pos = 0
+            if on_progress:
+                on_progress(read, total)
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        fill()
+        if buf.startswith("\ufeff"):
+            pos = 1
+        skip_ws()
+        if pos >= len(buf):
+            raise ValueError("事件文件格式错误：文件为空")
+        if buf[pos] != "[":
+            raise ValueError(f"事件文件格式错误：根节点应为列表，实际以 {buf[pos]!r} 开头")
+        pos += 1
+        while True:
+            skip_ws()
+            if pos >= len(buf):
+                raise ValueError("事件文件格式错误：数组未闭合")
+            ch = buf[pos]
+            if ch == "]":
+                return
+            if started:
+                if ch != ",":
+                    raise ValueError(f"事件文件格式错误：第 {read} 字节附近缺少逗号")
+                pos += 1
+                skip_ws()
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    # 元素恰好止于缓冲区末尾时可能被截断（如数字），再读一块确认
+                    if end < len(buf) or eof:
+                        break
+                except json.JSONDecodeError:
+                    if eof:
+                        raise ValueError(f"事件文件格式错误：第 {read} 字节附近 JSON 无效")
+                fill()
+            pos = end
+            started = True
+            yield value
+
+
+
+def write_events_json(file_path: str, records, hasher=None):
+    """
+    逐条序列化事件并写入 file_path，输出与 json.dump(events, indent=4, ensure_ascii=False) 逐字节一致，
+    但不在内存中拼出整份文本。
+    :param records: EventRecord 或 dict 的可迭代对象
+    :param hasher: 可选的 hashlib 对象，写出的字节会同时喂给它（用于快照摘要）
+    """
+    def emit(text: str):
+        data = text.encode('utf-8')
+        if hasher is not None:
+            hasher.update(data)
+        f.write(data)
+
+    with open(file_path, 'wb') as f:
+        first = True
+        for rec in records:
+            evt = rec.to_dict() if isinstance(rec, EventRecord) else rec
+            body = json.dumps(evt, ensure_ascii=False, indent=4).replace("\n", "\n    ")
+            emit(("[\n    " if first else ",\n    ") + body)
+            first = False
+        emit("[]" if first else "\n]")
+        f.flush()
+        os.fsync(f.fileno())
@@ -0,0 +1,379 @@
+# event_recorder/core/export_clips.py
+"""
+无界面的事件截图/片段导出工具。
+
+    python -m event_recorder.core.export_clips --job 视频.mp4 events.json [--job ...] [--mode frames|clip|both]
+
+每个视频在独立进程中处理：把所有事件窗口 [highlight_frame, highlight_frame + duration_frames]
+排序合并为若干连续区段，每个区段只跳转一次、顺序解码一遍，解码出的帧分发给覆盖它的事件，
+由写线程池写到各事件的 save_path。只导出属于该视频的事件（save_path 最后一级目录名与视频名相同，
+与合并工具的约定一致；没有 save_path 的事件视为属于该视频）。
+已完成的事件记录在进度旁路文件中，中断后重新运行会跳过它们。
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait as wait_futures
+
+import cv2
+
+from event_recorder.config import (
+    DEFAULT_SAVE_DIR, EXPORT_WORKERS, EXPORT_WRITER_THREADS, EXPORT_MAX_PENDING_FRAMES,
+    EXPORT_IMAGE_EXT, EXPORT_CLIP_FOURCC
+)
+from event_recorder.core.event_index import event_span
+from event_recorder.core.event_logic import EventManager
+from event_recorder.core.event_merge import video_key
+from event_recorder.core.event_store import is_candidate
+from event_recorder.core.media_cache import cache_path, write_json_atomic
+from event_recorder.core.video_core import VideoCore
+
+EXPORT_MODES = ("frames", "clip", "both")
+
+# 进度文件至少间隔多久（秒）落盘一次
+_PROGRESS_FLUSH_S = 2.0
+
+
+def event_key(evt, mode: str, frame_step: int) -> str:
+    """事件导出任务的标识：事件内容或导出参数变化后视为新任务"""
+    payload = json.dumps(evt.to_dict() if hasattr(evt, "to_dict") else evt,
+                         ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(f"{payload}|{mode}|{frame_step}".encode("utf-8")).hexdigest()[:16]
+
+
+def event_output_name(video_path: str, evt) -> str:
+    """事件输出文件（夹）名：<视频名>_<高光帧>_<事件类型>"""
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    etype = re.sub(r'[\\/:*?"<>|\s]+', "_", str(evt.get("event_type") or "event"))
+    return f"{stem}_{int(evt.get('highlight_frame') or 0)}_{etype}"
+
+
+def load_event_file(events_path: str) -> EventManager:
+    """以只读方式（不写日志）载入一个事件文件"""
+    events_path = os.path.abspath(events_path)
+    manager = EventManager(save_dir=os.path.dirname(events_path), journal=False)
+    manager.load_events(events_path)
+    return manager
+
+
+def merge_windows(windows):
+    """
+    合并重叠或相邻的事件窗口。
+    :param windows: (start, end, 任务) 序列，闭区间
+    :return: [(start, end, [(start, end, 任务), ...]), ...]，按起点排序
+    """
+    runs = []
+    for start, end, item in sorted(windows, key=lambda w: (w[0], w[1])):
+        if runs and start <= runs[-1][1] + 1:
+            run = runs[-1]
+            run[1] = max(run[1], end)
+            run[2].append((start, end, item))
+        else:
+            runs.append([start, end, [(start, end, item)]])
+    return [tuple(r) for r in runs]
+
+
+class _ExportProgress:
+    """导出进度旁路文件：已完成事件的标识集合，以视频文件标识为键"""
+
+    def __init__(self, video_path: str):
+        self.path = cache_path(video_path, "export")
+        self.done = set()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.done = set(json.load(f).get("done", []))
+        except (OSError, ValueError):
+            pass
+
+    def mark(self, key: str):
+        self.done.add(key)
+        self._dirty = True
+        if time.monotonic() - self._last_flush >= _PROGRESS_FLUSH_S:
+            self.flush()
+
+    def flush(self):
+        if self._dirty:
+            write_json_atomic(self.path, {"done": sorted(self.done)})
+            self._dirty = False
+        self._last_flush = time.monotonic()
+
+
+class _FrameSink:
+    """把窗口内每 step 帧写成一张截图，写文件交给共享线程池"""
+
+    def __init__(self, out_dir: str, start: int, step: int, pool, slots):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.start = start
+        self.step = step
+        self._pool = pool
+        self._slots = slots
+        self._futures = []
+        self._closed = False
+
+    def write(self, idx: int, frame):
+        if self._closed:
+            raise RuntimeError("截图窗口已关闭")
+        if (idx - self.start) % self.step:
+            return
+        path = os.path.join(self.out_dir, f"frame_{idx:06d}{EXPORT_IMAGE_EXT}")
+        self._slots.acquire()
+        fut = self._pool.submit(_imwrite, path, frame)
+        fut.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(fut)
+
+    def close(self):
+        """窗口结束：不再接受新帧，已提交的截图仍由线程池写完"""
+        self._closed = True
+
+    def done(self) -> bool:
+        return self._closed and all(f.done() for f in self._futures)
+
+    def wait(self):
+        wait_futures(self._futures)
+
+    def error(self):
+        for f in self._futures:
+            if f.done() and f.exception() is not None:
+                return f.exception()
+        return None
+
+
+class _ClipSink:
+    """把窗口内的帧按顺序编码为一个视频片段；编码在专用线程中进行"""
+
+    def __init__(self, path: str, fps: float, size):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*EXPORT_CLIP_FOURCC), fps, size)
+        self._queue = queue.Queue(maxsize=EXPORT_MAX_PENDING_FRAMES)
+        self._error = None
+        if not self._writer.isOpened():
+            self._error = IOError(f"无法创建片段：{path}")
+        self._thread = threading.Thread(target=self._run, name="ClipWriter", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                frame = self._queue.get()
+                if frame is None:
+                    break
+                if self._error is None:
+                    self._writer.write(frame)
+        finally:
+            self._writer.release()
+
+    def write(self, idx: int, frame):
+        self._queue.put(frame)
+
+    def close(self):
+        self._queue.put(None)
+
+    def done(self) -> bool:
+        return not self._thread.is_alive()
+
+    def wait(self):
+        self._thread.join()
+
+    def error(self):
+        return self._error
+
+
+def _imwrite(path: str, frame):
+    if not cv2.imwrite(path, frame):
+        raise IOError(f"写入截图失败：{path}")
+
+
+def export_video(video_path: str, events_path: str, mode: str = "frames", frame_step: int = 1,
+                 writer_threads: int = EXPORT_WRITER_THREADS, on_progress=None) -> dict:
+    """
+    导出一个视频的全部事件。
+    :param mode: "frames" 截图 / "clip" 片段 / "both"
+    :param frame_step: 截图模式下每隔多少帧取一张
+    :param on_progress: 可选回调 on_progress(已完成事件数, 事件总数)
+    :return: {"video", "events", "skipped", "exported", "failed", "errors"}
+    """
+    if mode not in EXPORT_MODES:
+        raise ValueError(f"不支持的导出模式：{mode}")
+    frame_step = max(1, int(frame_step))
+    manager = load_event_file(events_path)
+
+    video = VideoCore(cache_bytes=0)  # 单遍顺序解码，不需要帧缓存
+    info = video.open(video_path, index=False)  # 每个区段只 seek 一次，用不到关键帧索引与时间戳表
+    last = info['total_frames'] - 1
+    progress = _ExportProgress(video_path)
+
+    summary = {"video": video_path, "events": 0, "skipped": 0, "exported": 0, "failed": 0, "errors": []}
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    windows = []
+    for eid in manager.event_ids():
+        evt = manager.get_record(eid)
+        if is_candidate(evt):
+            continue  # 未确认的自动候选不导出
+        owner = video_key(evt)
+        if owner and owner != stem:
+            continue  # 共用的事件文件中属于其他视频的事件
+        summary["events"] += 1
+        key = event_key(evt, mode, frame_step)
+        if key in progress.done:
+            summary["skipped"] += 1
+            continue
+        start, end = event_span(evt)
+        if start > last:
+            summary["failed"] += 1
+            summary["errors"].append(f"事件起点 {start} 超出视频长度 {last + 1}")
+            continue
+        windows.append((start, min(end, last), (key, evt)))
+
+    finished = summary["skipped"] + summary["failed"]
+
+    def settle(pending, wait=False):
+        """回收已写完的事件：成功则记入进度"""
+        nonlocal finished
+        still = []
+        for key, sinks in pending:
+            if wait:
+                for s in sinks:
+                    s.wait()
+            if not all(s.done() for s in sinks):
+                still.append((key, sinks))
+                continue
+            errors = [s.error() for s in sinks if s.error() is not None]
+            if errors:
+                summary["failed"] += 1
+                summary["errors"].extend(str(e) for e in errors)
+            else:
+                summary["exported"] += 1
+                progress.mark(key)
+            finished += 1
+            if on_progress:
+                on_progress(finished, summary["events"])
+        return still
+
+    slots = threading.BoundedSemaphore(EXPORT_MAX_PENDING_FRAMES)
+    pending = []
+    try:
+        with ThreadPoolExecutor(max_workers=writer_threads) as pool:
+            for run_start, run_end, members in merge_windows(windows):
+                # 按起点排序的窗口依次打开；每帧只写给当前覆盖它的窗口
+                members = sorted(members, key=lambda m: m[0])
+                active = []
+                nxt = 0
+                ret, frame = video.get_frame(run_start, backstep_cache=False)
+                idx = run_start
+                while True:
+                    if not ret:
+                        break
+                    while nxt < len(members) and members[nxt][0] <= idx:
+                        start, end, (key, evt) = members[nxt]
+                        active.append((end, key, _open_sinks(
+                            video_path, evt, mode, start, frame_step, info, pool, slots)))
+                        nxt += 1
+                    for _, _, sinks in active:
+                        for s in sinks:
+                            s.write(idx, frame)
+                    for item in [a for a in active if a[0] <= idx]:
+                        active.remove(item)
+                        for s in item[2]:
+                            s.close()
+                        pending.append((item[1], item[2]))
+                    if idx >= run_end:
+                        break
+                    ret, frame = video.read_frame()
+                    idx += 1
+                    pending = settle(pending)
+                if idx < run_end or not ret:
+                    # 视频提前结束或解码失败：区段内未写完的事件记为失败
+                    for end, key, sinks in active:
+                        for s in sinks:
+                            s.close()
+                        pending.append((key, sinks + [_Failed(f"解码失败：第 {idx} 帧")]))
+                    for start, end, (key, evt) in members[nxt:]:
+                        pending.append((key, [_Failed(f"解码失败：第 {idx} 帧")]))
+            pending = settle(pending, wait=True)
+    finally:
+        progress.flush()
+        video.release()
+    return summary
+
+
+class _Failed:
+    """表示无法完成的事件"""
+
+    def __init__(self, message: str):
+        self._error = IOError(message)
+
+    def done(self) -> bool:
+        return True
+
+    def wait(self):
+        pass
+
+    def error(self):
+        return self._error
+
+
+def _open_sinks(video_path: str, evt, mode: str, start: int, frame_step: int, info: dict, pool, slots):
+    out_dir = evt.get("save_path") or DEFAULT_SAVE_DIR
+    name = event_output_name(video_path, evt)
+    sinks = []
+    if mode in ("frames", "both"):
+        sinks.append(_FrameSink(os.path.join(out_dir, name), start, frame_step, pool, slots))
+    if mode in ("clip", "both"):
+        sinks.append(_ClipSink(os.path.join(out_dir, name + ".mp4"), info['fps'],
+                               (info['width'], info['height'])))
+    return sinks
+
+
+def export_all(jobs, mode: str = "frames", frame_step: int = 1, workers=EXPORT_WORKERS, on_result=None):
+    """
+    并行导出多个视频，每个视频一个进程。
+    :param jobs: [(视频路径, 事件文件路径), ...]
+    :param on_result: 可选回调 on_result(summary)，每个视频完成时调用
+    :return: 各视频的 summary 列表（按完成顺序）
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(export_video, v, e, mode, frame_step): v for v, e in jobs}
+        for fut in as_completed(futures):
+            try:
+                summary = fut.result()
+            except Exception as e:
+                summary = {"video": futures[fut], "events": 0, "skipped": 0, "exported": 0,
+                           "failed": 0, "errors": [str(e)]}
+            results.append(summary)
+            if on_result:
+                on_result(summary)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="按事件列表导出截图/片段到各事件的 save_path")
+    parser.add_argument("--job", nargs=2, action="append", required=True, metavar=("VIDEO", "EVENTS"),
+                        help="视频文件及其事件文件，可重复指定")
+    parser.add_argument("--mode", choices=EXPORT_MODES, default="frames", help="导出截图、片段或两者")
+    parser.add_argument("--frame-step", type=int, default=1, help="截图间隔帧数")
+    parser.add_argument("--workers", type=int, default=EXPORT_WORKERS, help="并行处理的视频数")
+    args = parser.parse_args(argv)
+
+    def report(s):
+        print(f"{s['video']}: 导出 {s['exported']}，跳过 {s['skipped']}，失败 {s['failed']} / 共 {s['events']}")
+        for err in s["errors"]:
+            print(f"  {err}", file=sys.stderr)
+
+    results = export_all([tuple(j) for j in args.job], args.mode, args.frame_step, args.workers, report)
+    return 1 if any(s["errors"] for s in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
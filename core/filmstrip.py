@@ -0,0 +1,135 @@
+# event_recorder/core/filmstrip.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from event_recorder.core.lazy_import import lazy_import
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+from event_recorder.config import (
+    FILMSTRIP_INTERVAL_SECONDS, FILMSTRIP_THUMB_WIDTH, FILMSTRIP_WORKERS
+)
+from event_recorder.core.media_cache import content_identity, cache_path, temp_path
+
+# 每个进程任务负责的缩略图数量
+_CHUNK_SAMPLES = 64
+# 相邻采样间距不超过该帧数时顺序 grab 前进，否则 seek
+_GRAB_AHEAD_MAX = 300
+
+
+class Filmstrip:
+    """
+    低分辨率缩略图胶片条：每 step 帧一张，整体存为一个 (N, h, w, 3) 的 uint8 数组（BGR），
+    以内存映射方式读取，拖动预览时不触碰全分辨率解码器。
+    """
+
+    def __init__(self, thumbs, step: int):
+        self.thumbs = thumbs
+        self.step = max(1, int(step))
+
+    def get(self, frame_idx: int):
+        """返回离 frame_idx 最近的缩略图"""
+        i = int(round(frame_idx / self.step))
+        return self.thumbs[max(0, min(len(self.thumbs) - 1, i))]
+
+    def sample(self, count: int):
+        """沿整个视频均匀取 count 张缩略图，用于绘制胶片条行"""
+        if count <= 0 or not len(self.thumbs):
+            return self.thumbs[:0]
+        pick = np.linspace(0, len(self.thumbs) - 1, count).round().astype(np.intp)
+        return self.thumbs[pick]
+
+    def __len__(self) -> int:
+        return len(self.thumbs)
+
+
+def filmstrip_params(fps: float, width: int, height: int):
+    """返回 (采样步长帧数, 缩略图宽, 缩略图高)"""
+    step = max(1, int(round(fps * FILMSTRIP_INTERVAL_SECONDS)))
+    tw = FILMSTRIP_THUMB_WIDTH
+    th = max(1, int(round(tw * height / max(width, 1))))
+    return step, tw, th
+
+
+def _filmstrip_file(filepath: str, step: int, tw: int) -> str:
+    identity = content_identity(filepath)
+    return cache_path(filepath, f"filmstrip{step}x{tw}", ".npy", identity=identity)
+
+
+def _decode_samples(filepath: str, indices, size):
+    """
+    进程池任务：解码 indices 中的帧并缩小到 size=(w, h)。
+    相邻采样间距较小时顺序 grab 前进，否则 seek。
+    """
+    cap = cv2.VideoCapture(filepath)
+    tw, th = size
+    out = np.zeros((len(indices), th, tw, 3), dtype=np.uint8)
+    pos = -1
+    try:
+        for i, idx in enumerate(indices):
+            if pos < 0 or idx < pos or idx - pos > _GRAB_AHEAD_MAX:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+                pos = idx
+            while pos < idx and cap.grab():
+                pos += 1
+            ret, frame = cap.read()
+            if not ret:
+                break
+            pos += 1
+            cv2.resize(frame, (tw, th), dst=out[i], interpolation=cv2.INTER_AREA)
+    finally:
+        cap.release()
+    return out
+
+
+def load_filmstrip(filepath: str, fps: float, width: int, height: int):
+    """读取已缓存的胶片条；不存在时返回 None"""
+    step, tw, _ = filmstrip_params(fps, width, height)
+    return _open_filmstrip(_filmstrip_file(filepath, step, tw), step)
+
+
+def _open_filmstrip(npy: str, step: int):
+    if not os.path.exists(npy):
+        return None
+    try:
+        return Filmstrip(np.load(npy, mmap_mode='r'), step)
+    except (OSError, ValueError):
+        return None
+
+
+def build_filmstrip(filepath: str, total_frames: int, fps: float, width: int, height: int,
+                    workers=FILMSTRIP_WORKERS, on_progress=None):
+    """
+    读取或生成视频的胶片条。
+    缓存以视频内容标识为键，同一文件再次打开时直接复用；
+    生成时把采样帧分块交给进程池并行解码，结果逐块写入内存映射文件。
+    :param on_progress: 可选回调 on_progress(已完成张数, 总张数)
+    """
+    step, tw, th = filmstrip_params(fps, width, height)
+    npy = _filmstrip_file(filepath, step, tw)
+    cached = _open_filmstrip(npy, step)
+    if cached is not None:
+        return cached
+
+    indices = list(range(0, max(total_frames, 1), step))
+    tmp = temp_path(npy, ".npy")
+    out = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.uint8, shape=(len(indices), th, tw, 3))
+
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_decode_samples, filepath, indices[i:i + _CHUNK_SAMPLES], (tw, th)): i
+            for i in range(0, len(indices), _CHUNK_SAMPLES)
+        }
+        for fut in as_completed(futures):
+            start = futures[fut]
+            chunk = fut.result()
+            out[start:start + len(chunk)] = chunk
+            done += len(chunk)
+            if on_progress:
+                on_progress(done, len(indices))
+    out.flush()
+    del out
+    os.replace(tmp, npy)
+    return _open_filmstrip(npy, step)
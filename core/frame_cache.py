@@ -0,0 +1,65 @@
+# event_recorder/core/frame_cache.py
+
+import threading
+from collections import OrderedDict
+
+
+class FrameCache:
+    """
+    已解码帧的 LRU 缓存，按字节数而非帧数限制容量。
+
+    - key 为帧索引，value 为只读的 numpy 帧数组
+    - 超出 max_bytes 时按最久未使用顺序淘汰
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(0, int(max_bytes))
+        self._frames = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, idx: int):
+        """命中则返回帧并刷新其 LRU 位置，否则返回 None"""
+        with self._lock:
+            frame = self._frames.get(idx)
+            if frame is not None:
+                self._frames.move_to_end(idx)
+            return frame
+
+    def put(self, idx: int, frame):
+        """缓存一帧；单帧超过容量上限时不缓存"""
+        size = frame.nbytes
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._frames.pop(idx, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._frames[idx] = frame
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def resize(self, max_bytes: int):
+        """调整容量上限；缩小时按最久未使用顺序淘汰到新上限以内"""
+        with self._lock:
+            self.max_bytes = max(0, int(max_bytes))
+            while self._bytes > self.max_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __contains__(self, idx: int) -> bool:
+        return idx in self._frames
+
+    def __len__(self) -> int:
+        return len(self._frames)
@@ -0,0 +1,195 @@
+# event_recorder/core/hud_detect.py
+"""
+HUD 区域变化检测：只分析 config.json 中 overlays 标出的屏幕区域，自动给出候选事件。
+
+每帧解码后立即裁剪出各 ROI、转灰度并缩小（HUD_DETECT_SCALE），按块堆叠成 (n, h, w) 数组，
+用批量 NumPy 运算算出相邻帧的变化分数（平均绝对差）与相似度（归一化相关系数）。
+视频切成若干块由进程池并行分析；变化显著的帧按时间聚合成候选事件，
+以 "confirmed": False 写入事件列表，由标注员确认或拒绝。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from event_recorder.core.lazy_import import lazy_import
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+from event_recorder.config import (
+    DEFAULT_LANGUAGE, DEFAULT_SAVE_DIR,
+    HUD_DETECT_SCALE, HUD_DETECT_FRAME_STRIDE, HUD_DETECT_CHUNK_FRAMES, HUD_DETECT_WORKERS,
+    HUD_DETECT_SENSITIVITY, HUD_DETECT_MIN_CHANGE, HUD_DETECT_MERGE_SECONDS
+)
+
+# MAD 换算为标准差的系数
+_MAD_TO_STD = 1.4826
+
+
+def overlay_rois(overlays, width: int, height: int):
+    """把 overlays 转为整数像素 ROI [(标签, x1, y1, x2, y2), ...]，裁剪到画面内，丢弃空区域"""
+    rois = []
+    for ov in overlays or []:
+        try:
+            x1, x2 = sorted((int(round(float(ov["x1"]))), int(round(float(ov["x2"])))))
+            y1, y2 = sorted((int(round(float(ov["y1"]))), int(round(float(ov["y2"])))))
+        except (KeyError, TypeError, ValueError):
+            continue
+        x1, x2 = max(0, x1), min(width, x2)
+        y1, y2 = max(0, y1), min(height, y2)
+        if x2 - x1 >= 2 and y2 - y1 >= 2:
+            rois.append((str(ov.get("text") or "hud"), x1, y1, x2, y2))
+    return rois
+
+
+def _roi_scores(filepath: str, start: int, end: int, rois, scale: float, stride: int):
+    """
+    进程池任务：分析 [start, end) 中每 stride 帧的 ROI。
+    :return: (帧索引 (m,), 变化分数 (R, m), 相似度 (R, m))；
+             块首帧与前一个采样帧比较，视频第 0 帧的变化记为 0、相似度记为 1
+    """
+    first = max(0, start - stride)  # 多读一个采样帧作为差分基准
+    idxs = list(range(first, end, stride))
+    sizes = [(max(1, int((x2 - x1) * scale)), max(1, int((y2 - y1) * scale))) for _, x1, y1, x2, y2 in rois]
+    crops = [np.empty((len(idxs), h, w), dtype=np.uint8) for w, h in sizes]
+
+    cap = cv2.VideoCapture(filepath)
+    n = 0
+    try:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+        pos = first
+        for k, idx in enumerate(idxs):
+            while pos < idx and cap.grab():
+                pos += 1
+            ret, frame = cap.read()
+            if not ret:
+                break
+            pos += 1
+            for r, (_, x1, y1, x2, y2) in enumerate(rois):
+                gray = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2GRAY)
+                cv2.resize(gray, sizes[r], dst=crops[r][k], interpolation=cv2.INTER_AREA)
+            n = k + 1
+    finally:
+        cap.release()
+
+    frames = np.asarray(idxs[1:n], dtype=np.int64)
+    change = np.zeros((len(rois), max(0, n - 1)), dtype=np.float32)
+    similarity = np.ones((len(rois), max(0, n - 1)), dtype=np.float32)
+    for r in range(len(rois)):
+        if n < 2:
+            break
+        a = crops[r][:n].reshape(n, -1).astype(np.float32)
+        change[r] = np.abs(np.diff(a, axis=0)).mean(axis=1) / 255.0
+        centered = a - a.mean(axis=1, keepdims=True)
+        norms = np.linalg.norm(centered, axis=1)
+        dots = np.einsum('ij,ij->i', centered[1:], centered[:-1])
+        denom = norms[1:] * norms[:-1]
+        similarity[r] = np.where(denom > 1e-6, dots / np.maximum(denom, 1e-6), 1.0)
+    if start == 0 and n:
+        frames = np.concatenate(([0], frames))
+        change = np.concatenate((np.zeros((len(rois), 1), np.float32), change), axis=1)
+        similarity = np.concatenate((np.ones((len(rois), 1), np.float32), similarity), axis=1)
+    return frames, change, similarity
+
+
+def analyze_hud(filepath: str, rois, total_frames: int, scale: float = HUD_DETECT_SCALE,
+                stride: int = HUD_DETECT_FRAME_STRIDE, chunk_frames: int = HUD_DETECT_CHUNK_FRAMES,
+                workers=HUD_DETECT_WORKERS, on_progress=None):
+    """
+    分块并行计算全片的 ROI 分数。
+    :param on_progress: 可选回调 on_progress(已完成块数, 总块数)
+    :return: (帧索引 (m,), 变化分数 (R, m), 相似度 (R, m))，按帧排序
+    """
+    stride = max(1, int(stride))
+    chunk = max(stride, int(chunk_frames) // stride * stride)
+    starts = list(range(0, max(total_frames, 1), chunk))
+    parts = [None] * len(starts)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_roi_scores, filepath, s, min(s + chunk, total_frames), rois, scale, stride): i
+            for i, s in enumerate(starts)
+        }
+        for done, fut in enumerate(as_completed(futures), 1):
+            parts[futures[fut]] = fut.result()
+            if on_progress:
+                on_progress(done, len(starts))
+    frames = np.concatenate([p[0] for p in parts])
+    change = np.concatenate([p[1] for p in parts], axis=1)
+    similarity = np.concatenate([p[2] for p in parts], axis=1)
+    return frames, change, similarity
+
+
+def propose_candidates(frames, change, similarity, labels, fps: float,
+                       sensitivity: float = HUD_DETECT_SENSITIVITY, min_change: float = HUD_DETECT_MIN_CHANGE,
+                       merge_seconds: float = HUD_DETECT_MERGE_SECONDS):
+    """
+    按 ROI 找出显著变化的帧并聚合为区间：
+    - 变化分数 > max(min_change, 中位数 + sensitivity × MAD) 或相似度显著低于常态，视为活跃帧
+    - 活跃帧间隔不超过 merge_seconds 的合并为同一区间（HUD 出现到消失）
+    :return: [(标签, 起始帧, 结束帧, 峰值变化, 最低相似度), ...]，按起始帧排序
+    """
+    gap = max(1, int(round(merge_seconds * fps)))
+    found = []
+    for r, label in enumerate(labels):
+        c, s = change[r], similarity[r]
+        if not len(c):
+            continue
+        c_med = np.median(c)
+        c_thr = max(min_change, c_med + sensitivity * _MAD_TO_STD * np.median(np.abs(c - c_med)))
+        s_med = np.median(s)
+        s_thr = s_med - sensitivity * _MAD_TO_STD * np.median(np.abs(s - s_med))
+        active = np.flatnonzero((c > c_thr) | ((s < s_thr) & (c > min_change)))
+        if not len(active):
+            continue
+        breaks = np.flatnonzero(np.diff(frames[active]) > gap) + 1
+        for group in np.split(active, breaks):
+            found.append((label, int(frames[group[0]]), int(frames[group[-1]]),
+                          float(c[group].max()), float(s[group].min())))
+    found.sort(key=lambda f: (f[1], f[0]))
+    return found
+
+
+def detect_candidates(filepath: str, overlays, video_info: dict, game_type: str = "",
+                      save_path: str = None, on_progress=None, frame_to_time=None, **params):
+    """
+    对一个视频运行 HUD 检测，返回可直接交给 EventManager.add_event 的候选事件（"confirmed": False）。
+    :param video_info: VideoCore.open 的返回值（width / height / fps / total_frames）
+    :param frame_to_time: 帧号数组 -> 秒数数组的换算（如 VideoCore.frame_to_time），未给出时按 fps 计算
+    :param params: 透传给 analyze_hud / propose_candidates 的阈值参数
+    """
+    fps = video_info['fps'] or 1.0
+    rois = overlay_rois(overlays, video_info['width'], video_info['height'])
+    if not rois:
+        return []
+    analyze_keys = ("scale", "stride", "chunk_frames", "workers")
+    frames, change, similarity = analyze_hud(
+        filepath, rois, video_info['total_frames'], on_progress=on_progress,
+        **{k: v for k, v in params.items() if k in analyze_keys}
+    )
+    found = propose_candidates(
+        frames, change, similarity, [r[0] for r in rois], fps,
+        **{k: v for k, v in params.items() if k not in analyze_keys}
+    )
+    if not found:
+        return []
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    save_path = save_path or os.path.join(DEFAULT_SAVE_DIR, stem)
+    if frame_to_time is None:
+        frame_to_time = lambda f: f / fps
+    t0 = np.asarray(frame_to_time(np.array([f[1] for f in found], dtype=np.int64)), dtype=np.float64)
+    t1 = np.asarray(frame_to_time(np.array([f[2] for f in found], dtype=np.int64)), dtype=np.float64)
+    return [
+        {
+            "game_type": game_type or "",
+            "event_type": label,
+            "highlight_frame": start,
+            "highlight_time": start_t,
+            "duration_frames": end - start,
+            "duration_seconds": end_t - start_t,
+            "event_text": "",
+            "save_path": save_path,
+            "language": DEFAULT_LANGUAGE,
+            "comment": f"自动检测 变化 {peak:.3f} 相似度 {low:.3f}",
+            "confirmed": False,
+        }
+        for (label, start, end, peak, low), start_t, end_t in zip(found, t0.tolist(), t1.tolist())
+    ]
@@ -0,0 +1,101 @@
+# event_recorder/core/keyframe_index.py
+
+import bisect
+import json
+import os
+
+from event_recorder.core.lazy_import import lazy_import
+cv2 = lazy_import("cv2")
+
+from event_recorder.core import timestamps
+from event_recorder.core.media_cache import file_identity, cache_path, write_json_atomic
+
+
+class KeyframeIndex:
+    """
+    关键帧（GOP 起点）索引：记录所有关键帧的帧索引，支持查找不晚于目标帧的最近关键帧。
+    """
+
+    def __init__(self, keyframes):
+        self.keyframes = sorted(set(int(k) for k in keyframes)) or [0]
+        if self.keyframes[0] != 0:
+            self.keyframes.insert(0, 0)
+
+    def floor(self, frame_idx: int) -> int:
+        """返回 <= frame_idx 的最近关键帧"""
+        i = bisect.bisect_right(self.keyframes, frame_idx) - 1
+        return self.keyframes[max(i, 0)]
+
+    def __len__(self) -> int:
+        return len(self.keyframes)
+
+
+def scan_packets(filepath: str):
+    """
+    以原始包模式（CAP_PROP_FORMAT=-1）逐包 grab，不解码像素，一遍读出
+    每帧的关键帧标记与显示时间戳（毫秒，解码顺序）。
+    :return: (关键帧列表，后端不支持关键帧标记时为 None；时间戳列表，无法以原始包模式打开时为 None)
+    """
+    try:
+        cap = cv2.VideoCapture(filepath, cv2.CAP_FFMPEG, [cv2.CAP_PROP_FORMAT, -1])
+    except cv2.error:
+        return None, None
+    if not cap.isOpened():
+        return None, None
+    flag = getattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME", None)
+    try:
+        keyframes, stamps = [], []
+        idx = 0
+        while cap.grab():
+            if flag is not None and cap.get(flag) > 0:
+                keyframes.append(idx)
+            stamps.append(cap.get(cv2.CAP_PROP_POS_MSEC))
+            idx += 1
+        return (keyframes if flag is not None and keyframes else None), stamps
+    finally:
+        cap.release()
+
+
+def scan_keyframes(filepath: str):
+    """只取关键帧列表；当前 OpenCV 后端不支持时返回 None"""
+    return scan_packets(filepath)[0]
+
+
+def _load_cached(filepath: str, identity: dict, sidecar: str):
+    if not os.path.exists(sidecar):
+        return None
+    try:
+        with open(sidecar, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("identity") == identity:
+            return KeyframeIndex(data["keyframes"])
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+
+def load_or_build(filepath: str):
+    """
+    读取视频旁路缓存中的关键帧索引与逐帧时间戳表（均以路径、大小、修改时间为键）；
+    任一缓存缺失或失效时做一遍原始包扫描，同时得到两者并写入缓存。
+    :return: (KeyframeIndex 或 None, timestamps.TimestampTable 或 None)
+    """
+    identity = file_identity(filepath)
+    sidecar = cache_path(filepath, "keyframes", identity=identity)
+    index = _load_cached(filepath, identity, sidecar)
+    has_pts, table = timestamps.load_cached(filepath)
+    if index is not None and has_pts:
+        return index, table
+
+    keyframes, stamps = scan_packets(filepath)
+    if index is None and keyframes is not None:
+        try:
+            write_json_atomic(sidecar, {"identity": identity, "keyframes": keyframes})
+        except OSError:
+            pass
+        index = KeyframeIndex(keyframes)
+    if not has_pts and stamps is not None:
+        pts = timestamps.from_stamps(stamps)
+        timestamps.save(filepath, pts)
+        table = timestamps.TimestampTable(pts) if pts is not None else None
+    return index, table
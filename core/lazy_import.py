@@ -0,0 +1,64 @@
+# event_recorder/core/lazy_import.py
+
+import importlib
+import sys
+import threading
+import types
+
+_lock = threading.RLock()
+
+
+class _LazyModule(types.ModuleType):
+    """
+    模块占位：第一次访问属性时导入真正的模块，并把其全部属性复制到自身，
+    之后的属性访问与普通模块相同，没有额外开销。
+    """
+
+    def __getattr__(self, attr):
+        real = _load(self)
+        return getattr(real, attr)
+
+
+def _load(proxy: _LazyModule):
+    name = proxy.__name__
+    with _lock:
+        real = proxy.__dict__.get("_lazy_real")
+        if real is None:
+            # 先撤下占位再导入，避免模块自身的导入逻辑（如 cv2 的 bootstrap）看到占位
+            if sys.modules.get(name) is proxy:
+                del sys.modules[name]
+            try:
+                real = importlib.import_module(name)
+            except BaseException:
+                sys.modules.setdefault(name, proxy)
+                raise
+            proxy.__dict__.update(real.__dict__)
+            proxy.__dict__["_lazy_real"] = real
+    return real
+
+
+def lazy_import(name: str):
+    """
+    返回模块 name 的惰性占位：第一次访问其属性时才真正执行导入。
+    用于 cv2 / numpy / PIL 等导入耗时的模块，使主窗口先于它们出现。
+
+    占位登记在 sys.modules 中，在真正导入之前，其他模块的普通 import 得到的也是同一个占位；
+    模块已导入时直接返回真正的模块。模块是否存在要到第一次使用时才检查。
+    """
+    with _lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        proxy = _LazyModule(name)
+        sys.modules[name] = proxy
+        return proxy
+
+
+def is_loaded(name: str) -> bool:
+    """模块 name 是否已真正导入（惰性占位尚未被访问时为 False）"""
+    module = sys.modules.get(name)
+    if module is None:
+        return False
+    if isinstance(module, _LazyModule):
+        return "_lazy_real" in module.__dict__
+    return True
@@ -0,0 +1,79 @@
+# event_recorder/core/media_cache.py
+
+import hashlib
+import json
+import os
+import tempfile
+
+from event_recorder.config import CACHE_DIR
+
+
+def file_identity(path: str) -> dict:
+    """
+    以 路径 + 文件大小 + 修改时间 标识一个视频文件，文件被替换或修改后标识随之变化。
+    """
+    st = os.stat(path)
+    return {
+        "path": os.path.abspath(path),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+    }
+
+
+def content_identity(path: str, sample_bytes: int = 1 << 20) -> dict:
+    """
+    以 文件大小 + 首尾各 sample_bytes 字节的摘要 标识视频内容，
+    文件被移动或重命名后仍能命中同一份缓存。
+    """
+    size = os.path.getsize(path)
+    h = hashlib.sha1(str(size).encode("ascii"))
+    with open(path, 'rb') as f:
+        h.update(f.read(sample_bytes))
+        if size > sample_bytes:
+            f.seek(max(size - sample_bytes, sample_bytes))
+            h.update(f.read(sample_bytes))
+    return {"size": size, "content": h.hexdigest()}
+
+
+def cache_path(path: str, kind: str, ext: str = ".json", identity: dict = None) -> str:
+    """
+    返回视频 path 的某类缓存文件路径（CACHE_DIR/<视频名>.<标识摘要>.<kind><ext>）。
+    """
+    identity = identity or file_identity(path)
+    digest = hashlib.sha1(
+        json.dumps(identity, sort_keys=True).encode("utf-8")
+    ).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f"{stem}.{digest}.{kind}{ext}")
+
+
+def temp_path(file_path: str, ext: str = "") -> str:
+    """
+    与 file_path 同目录、名字唯一的临时文件（mkstemp 创建），写完后 os.replace 到 file_path。
+    多个线程或进程同时生成同一份缓存时各写各的临时文件，不会互相覆盖。
+    :param ext: 临时文件的扩展名（np.save 等按扩展名决定是否追加后缀，需与其一致）
+    """
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(file_path) + ".", suffix=".tmp" + ext, dir=directory)
+    os.close(fd)
+    return tmp
+
+
+def write_json_atomic(file_path: str, data):
+    """先写临时文件再原子替换，避免中途崩溃留下半个文件"""
+    tmp = temp_path(file_path)
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, file_path)
+    except BaseException:
+        _remove_quietly(tmp)
+        raise
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
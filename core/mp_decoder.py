@@ -0,0 +1,482 @@
+# event_recorder/core/mp_decoder.py
+"""
+多进程共享内存解码：用于单个 VideoCapture 来不及解码的 4K / 高帧率视频。
+
+视频按 MP_DECODE_SEGMENT_FRAMES 帧切成段，由若干解码进程各自用独立的 VideoCapture 解码，
+像素直接写入一块共享内存中的帧槽位；进程间只传递 (帧索引) 这样的小消息，帧数据不经 pickle、不复制。
+MultiProcessDecoder 的取帧接口与 VideoCore 一致（open / get_frame / get_preview_frame /
+read_frame / seek_frame / frame_to_time / time_to_frame / release），播放、导出与分析都可直接替换使用。
+"""
+
+import ctypes
+import math
+import multiprocessing as mp
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+from event_recorder.core.lazy_import import lazy_import
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+from event_recorder.config import (
+    FRAME_CACHE_MAX_BYTES, PREFETCH_MAX_BYTES, PREFETCH_MAX_FRAMES, DECODE_BACKEND,
+    MP_DECODE_AUTO_PIXEL_RATE, MP_DECODE_WORKERS, MP_DECODE_SEGMENT_FRAMES, MP_DECODE_STALL_S,
+    MP_DECODE_SHM_BYTES, MP_DECODE_SHM_FRACTION, MP_DECODE_SHM_MAX_BYTES
+)
+from event_recorder.core import keyframe_index, probe, timestamps
+from event_recorder.core.video_core import VideoCore
+
+
+def _decode_worker(wid: int, filepath: str, shm_name: str, shape, tasks, results):
+    """
+    解码进程：按任务 (段起点, 起点前的关键帧, 槽位列表) 顺序解码一段，逐帧写入共享内存槽位。
+    每解码一帧回报 ("frame", wid, 帧索引)，整段结束回报 ("done", wid, 段起点, 实际帧数)。
+    段起点恰为上次解码结束的位置时不 seek，直接续读。
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    slots = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    cap = cv2.VideoCapture(filepath)
+    pos = 0
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            start, key, slot_ids = task
+            if pos != start:
+                if not key <= pos < start:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, key)
+                    pos = key
+                while pos < start and cap.grab():
+                    pos += 1
+            n = 0
+            if pos == start:
+                for slot in slot_ids:
+                    dst = slots[slot]
+                    ret, frame = cap.read(dst)
+                    if not ret:
+                        break
+                    if frame.ctypes.data != dst.ctypes.data:
+                        dst[...] = frame
+                    results.put(("frame", wid, start + n))
+                    pos += 1
+                    n += 1
+            results.put(("done", wid, start, n))
+    finally:
+        cap.release()
+        del slots
+        shm.close()
+
+
+class _Segment:
+    __slots__ = ("start", "slots", "wid", "done")
+
+    def __init__(self, start: int, slots, wid: int):
+        self.start = start
+        self.slots = slots
+        self.wid = wid
+        self.done = False
+
+
+class MultiProcessDecoder:
+    """
+    多进程解码后端，接口与 VideoCore 相同。
+
+    - 请求某帧时，调度该帧所在段及其后若干段（每个空闲进程一段）并行解码；
+      段起点与某进程上次结束位置相同时优先交给它，避免重复 seek
+    - 有关键帧索引时，任务附带段起点之前最近的关键帧，进程从关键帧 grab 前进到段起点
+    - 槽位不足时按最近最少使用顺序回收已解码完的段，但不回收当前位置附近
+      （向后保留预取缓冲区可能持有的帧数，向前为调度窗口）的段
+    - 返回的帧是共享内存槽位的只读视图：槽位被回收前有效，需要长期保存时请先 copy()
+    - 解码进程与共享内存在第一次取帧时创建，suspend() / release() 时回收
+    - 等待中的段所属进程意外退出，或超过 MP_DECODE_STALL_S 秒没有任何进度时，结束进程池，
+      本视频此后改由单进程 VideoCore 解码
+    """
+
+    def __init__(self, workers=MP_DECODE_WORKERS, segment_frames: int = MP_DECODE_SEGMENT_FRAMES,
+                 shm_bytes: int = MP_DECODE_SHM_BYTES):
+        self.requested_workers = workers
+        self.segment_frames = max(1, int(segment_frames))
+        self.shm_bytes = shm_bytes
+        self.frame_rate = 0
+        self.total_frames = 0
+        self.width = 0
+        self.height = 0
+        self.filepath = None
+        self.keyframes = None
+        self.timestamps = None
+        self._fallback = None  # 进程池失效后接手解码的 VideoCore
+        self._lock = threading.RLock()
+        self._pos = 0
+        self._open_gen = 0
+        self._procs = []
+        self._reset_pool()
+
+    def _reset_pool(self):
+        self._shm = None
+        self._slots = None
+        self._tasks = []
+        self._results = None
+        self._procs = []
+        self._idle = []  # 空闲进程 ID
+        self._worker_pos = []  # 各进程上次解码结束的位置
+        self._free = []  # 空闲槽位
+        self._segments = {}  # 段起点 -> _Segment（调度中或已解码）
+        self._recent = OrderedDict()  # 已解码完的段起点，最近访问的在末尾
+        self._frames = {}  # 帧索引 -> 槽位（已就绪）
+        self._last = 0  # 最近一次请求的帧
+
+    # ---------- 打开 / 关闭 ----------
+    def open(self, filepath: str):
+        """
+        打开并校验视频文件（校验规则与 VideoCore 相同，共用探测缓存）
+        :raises ValueError: 格式、分辨率或帧率不支持
+        :raises IOError: 无法打开文件
+        :raises MemoryError: 可用共享内存不足以容纳最小的解码池
+        """
+        meta = probe.cached_probe(filepath)
+        if not meta["ok"]:
+            if meta["reason"].startswith("无法打开视频"):
+                raise IOError(meta["reason"])
+            raise ValueError(meta["reason"])
+        self._pool_size(meta["width"], meta["height"])  # 先确认预算足够，失败时保持原状态
+
+        with self._lock:
+            self.release()
+            self.frame_rate = meta["fps"]
+            self.total_frames = meta["total_frames"]
+            self.width = meta["width"]
+            self.height = meta["height"]
+            self.filepath = filepath
+            self._open_gen += 1
+            gen = self._open_gen
+        threading.Thread(
+            target=self._build_indexes, args=(filepath, gen),
+            name="VideoIndexes", daemon=True
+        ).start()
+        return {
+            'width': self.width,
+            'height': self.height,
+            'fps': self.frame_rate,
+            'total_frames': self.total_frames
+        }
+
+    def _build_indexes(self, filepath: str, gen: int):
+        """后台线程：一遍原始包扫描（或读缓存）得到关键帧索引与逐帧时间戳表；期间若已切换视频则丢弃结果"""
+        try:
+            index, table = keyframe_index.load_or_build(filepath)
+        except Exception:
+            index, table = None, None
+        with self._lock:
+            if gen == self._open_gen:
+                self.keyframes = index
+                self.timestamps = table
+
+    def _shm_budget(self) -> int:
+        """共享内存预算（字节）：显式给出时直接使用，否则按当前可用内存估算"""
+        if self.shm_bytes:
+            return int(self.shm_bytes)
+        return int(min(MP_DECODE_SHM_MAX_BYTES, available_memory() * MP_DECODE_SHM_FRACTION))
+
+    def _pool_size(self, width: int = None, height: int = None):
+        """
+        按共享内存预算确定 (进程数, 槽位数, 向后保留帧数)
+        :raises MemoryError: 预算放不下一个解码进程加上向后保留的段
+        """
+        frame_bytes = (width or self.width) * (height or self.height) * 3
+        keep_behind = min(PREFETCH_MAX_FRAMES, math.ceil(PREFETCH_MAX_BYTES / max(frame_bytes, 1))) + 2
+        keep_segs = math.ceil(keep_behind / self.segment_frames) + 1
+        seg_bytes = max(frame_bytes * self.segment_frames, 1)
+        budget = self._shm_budget()
+        available = budget // seg_bytes - keep_segs - 1
+        if available < 1:
+            need = (keep_segs + 2) * seg_bytes
+            raise MemoryError(f"共享内存不足：多进程解码至少需要 {need >> 20} MB，当前预算 {budget >> 20} MB")
+        workers = max(1, min(self.requested_workers or os.cpu_count() or 1, available))
+        return workers, self.segment_frames * (workers + keep_segs + 1), keep_behind
+
+    def _ensure_started(self):
+        if self._procs or not self.filepath:
+            return
+        workers, nslots, self._keep_behind = self._pool_size()
+        shape = (nslots, self.height, self.width, 3)
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        self._slots = np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf)
+        ctx = mp.get_context()
+        self._results = ctx.Queue()
+        for wid in range(workers):
+            tasks = ctx.Queue()
+            proc = ctx.Process(
+                target=_decode_worker, args=(wid, self.filepath, self._shm.name, shape, tasks, self._results),
+                name=f"MpDecoder-{wid}", daemon=True
+            )
+            proc.start()
+            self._tasks.append(tasks)
+            self._procs.append(proc)
+        self._idle = list(range(workers))
+        self._worker_pos = [0] * workers
+        self._free = list(range(nslots))
+
+    def suspend(self):
+        """结束解码进程并释放共享内存（保留打开的视频，下次取帧时重新创建）"""
+        with self._lock:
+            for tasks in self._tasks:
+                tasks.put(None)
+            for proc in self._procs:
+                proc.join(timeout=2.0)
+                if proc.is_alive():
+                    proc.terminate()
+            if self._fallback is not None:
+                self._fallback.frame_cache.clear()
+            if self._shm is not None:
+                self._slots = None
+                try:
+                    self._shm.close()
+                except BufferError:
+                    pass  # 调用方仍持有帧视图：映射随最后一个视图一起释放
+                self._shm.unlink()
+            self._reset_pool()
+
+    def release(self):
+        """释放视频资源"""
+        with self._lock:
+            self.suspend()
+            if self._fallback is not None:
+                self._fallback.release()
+                self._fallback = None
+            self._pos = 0
+            self.keyframes = None
+            self.timestamps = None
+            self.filepath = None
+            self._open_gen += 1
+
+    # ---------- 取帧 ----------
+    def get_frame(self, frame_idx: int, should_abort=None, backstep_cache: bool = True):
+        """
+        读取指定帧：已就绪时直接返回槽位视图，否则调度解码并等待。
+        :param should_abort: 可选回调，等待途中返回 True 时放弃本次读取并返回 (False, None)
+        :param backstep_cache: 与 VideoCore 接口兼容；已解码的段本身即可用于回退
+        """
+        with self._lock:
+            if not self.filepath or not 0 <= frame_idx < self.total_frames:
+                return False, None
+            if self._fallback is not None:
+                return self._fallback_frame(frame_idx, should_abort, backstep_cache)
+            self._ensure_started()
+            self._last = frame_idx
+            start = frame_idx - frame_idx % self.segment_frames
+            deadline = time.monotonic() + MP_DECODE_STALL_S
+            while True:
+                if self._drain(block=False):
+                    deadline = time.monotonic() + MP_DECODE_STALL_S
+                slot = self._frames.get(frame_idx)
+                if slot is not None:
+                    if start in self._recent:
+                        self._recent.move_to_end(start)
+                    self._schedule(start)
+                    self._pos = frame_idx + 1
+                    frame = self._slots[slot]
+                    frame.flags.writeable = False
+                    return True, frame
+                seg = self._segments.get(start)
+                if seg is not None and seg.done:
+                    return False, None  # 该帧无法解码（视频提前结束）
+                self._schedule(start)
+                if should_abort is not None and should_abort():
+                    return False, None
+                if self._drain(block=True):
+                    deadline = time.monotonic() + MP_DECODE_STALL_S
+                elif self._stalled(self._segments.get(start), deadline):
+                    self._fail()
+                    return self._fallback_frame(frame_idx, should_abort, backstep_cache)
+
+    def _stalled(self, seg, deadline: float) -> bool:
+        """等待的段是否已无法完成：负责它的进程已退出，或超过期限没有任何进度"""
+        if time.monotonic() > deadline:
+            return True
+        return seg is not None and not seg.done and not self._procs[seg.wid].is_alive()
+
+    def _fail(self):
+        """进程池失效：结束全部解码进程，改由单进程 VideoCore 解码本视频（调用方持锁）"""
+        self.suspend()
+        core = VideoCore()
+        core.open(self.filepath)
+        self._fallback = core
+
+    def _fallback_frame(self, frame_idx: int, should_abort, backstep_cache: bool):
+        ret, frame = self._fallback.get_frame(frame_idx, should_abort, backstep_cache)
+        if ret:
+            self._pos = frame_idx + 1
+        return ret, frame
+
+    def is_cached(self, frame_idx: int) -> bool:
+        """帧是否已解码就绪（无需等待即可取得）"""
+        with self._lock:
+            if self._fallback is not None:
+                return self._fallback.is_cached(frame_idx)
+            return frame_idx in self._frames
+
+    def get_preview_frame(self, frame_idx: int):
+        """
+        廉价预览：已就绪时返回精确帧，否则解码不晚于目标的最近关键帧。
+        :return: (ret, frame, 实际帧索引)
+        """
+        with self._lock:
+            if frame_idx in self._frames:
+                ret, frame = self.get_frame(frame_idx)
+                return ret, frame, frame_idx
+        kf = self.keyframes
+        key = kf.floor(frame_idx) if kf is not None else frame_idx
+        ret, frame = self.get_frame(key)
+        return ret, frame, key
+
+    def read_frame(self):
+        """读取当前位置的帧"""
+        with self._lock:
+            return self.get_frame(self._pos)
+
+    def next_frame(self):
+        """读取下一帧"""
+        return self.read_frame()
+
+    def seek_frame(self, frame_idx: int):
+        """跳转至指定帧，不读取"""
+        with self._lock:
+            self._pos = frame_idx
+
+    def frame_to_time(self, frame_idx):
+        """
+        将帧数转换为秒：时间戳表就绪后按逐帧 PTS 查表（可变帧率准确），否则按恒定帧率计算。
+        frame_idx 可为整数或数组，数组时一次换算全部。
+        """
+        return timestamps.frame_to_time(frame_idx, self.frame_rate, self.timestamps)
+
+    def time_to_frame(self, seconds):
+        """将时间（秒，标量或数组）转换为显示时间最接近的帧数"""
+        return timestamps.time_to_frame(seconds, self.frame_rate, self.timestamps)
+
+    # ---------- 调度 ----------
+    def _schedule(self, start: int):
+        """把 start 起的若干段交给空闲进程：先是请求所在段，再依次向后"""
+        seg_frames = self.segment_frames
+        for k in range(len(self._procs)):
+            if not self._idle:
+                return
+            s = start + k * seg_frames
+            if s >= self.total_frames:
+                return
+            if s in self._segments:
+                continue
+            count = min(seg_frames, self.total_frames - s)
+            if len(self._free) < count and not self._evict(count, start):
+                return
+            slots = [self._free.pop() for _ in range(count)]
+            wid = self._idle_at(s)
+            if wid is None:
+                wid = self._idle[0]
+            self._idle.remove(wid)
+            kf = self.keyframes
+            key = kf.floor(s) if kf is not None else s
+            self._segments[s] = _Segment(s, slots, wid)
+            self._tasks[wid].put((s, key, slots))
+
+    def _idle_at(self, pos: int):
+        for wid in self._idle:
+            if self._worker_pos[wid] == pos:
+                return wid
+        return None
+
+    def _evict(self, count: int, start: int) -> bool:
+        """回收已解码完的段直到至少有 count 个空闲槽位；当前位置附近的段不回收"""
+        low = self._last - self._keep_behind
+        high = start + len(self._procs) * self.segment_frames
+        for s in list(self._recent):
+            if len(self._free) >= count:
+                break
+            if s + self.segment_frames > low and s < high:
+                continue
+            seg = self._segments.pop(s)
+            del self._recent[s]
+            for i, slot in enumerate(seg.slots):
+                self._frames.pop(s + i, None)
+            self._free.extend(seg.slots)
+        return len(self._free) >= count
+
+    def _drain(self, block: bool) -> int:
+        """处理解码进程的回报，返回处理的条数；block=True 时至少等待一条（最多 50ms）"""
+        count = 0
+        while True:
+            try:
+                msg = self._results.get(timeout=0.05) if block else self._results.get_nowait()
+            except queue.Empty:
+                return count
+            block = False
+            count += 1
+            if msg[0] == "frame":
+                _, _, idx = msg
+                seg = self._segments.get(idx - idx % self.segment_frames)
+                if seg is not None:
+                    self._frames[idx] = seg.slots[idx - seg.start]
+            else:
+                _, wid, start, n = msg
+                seg = self._segments[start]
+                seg.done = True
+                # 未能解码的尾部槽位立即归还
+                self._free.extend(seg.slots[n:])
+                del seg.slots[n:]
+                self._recent[start] = True
+                self._worker_pos[wid] = start + n
+                self._idle.append(wid)
+
+
+def available_memory() -> int:
+    """当前可用物理内存（字节）；Linux 上同时受 /dev/shm 剩余空间限制。无法获取时返回 0"""
+    if sys.platform == "win32":
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                        ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                        ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                        ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                        ("ullAvailExtendedVirtual", ctypes.c_ulonglong)]
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return int(status.ullAvailPhys)
+        return 0
+    try:
+        available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        available = 0
+    if os.path.isdir("/dev/shm"):
+        try:
+            available = min(available, shutil.disk_usage("/dev/shm").free)
+        except OSError:
+            pass
+    return max(0, available)
+
+
+def open_decoder(filepath: str, cache_bytes: int = FRAME_CACHE_MAX_BYTES, backend: str = DECODE_BACKEND):
+    """
+    按 backend 打开视频，返回 (解码器, VideoCore.open 格式的 info)。
+    auto：按探测元数据（不打开 VideoCore）判断，宽 × 高 × fps 超过 MP_DECODE_AUTO_PIXEL_RATE
+    且共享内存预算足够时使用多进程解码，否则使用 VideoCore；进程池运行中失效时也会退回单进程解码。
+    """
+    if backend == "multiprocess":
+        decoder = MultiProcessDecoder()
+        return decoder, decoder.open(filepath)
+    if backend == "auto":
+        meta = probe.cached_probe(filepath)
+        if meta["ok"] and meta["width"] * meta["height"] * meta["fps"] > MP_DECODE_AUTO_PIXEL_RATE:
+            decoder = MultiProcessDecoder()
+            try:
+                return decoder, decoder.open(filepath)
+            except MemoryError:
+                pass  # 共享内存不足：退回单进程解码
+    core = VideoCore(cache_bytes)
+    return core, core.open(filepath)
@@ -0,0 +1,125 @@
+# event_recorder/core/perf.py
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from event_recorder.config import PERF_ENABLED, PERF_WINDOW, PERF_TRACE_MAX_EVENTS
+
+
+class _NullSpan:
+    """关闭记录时 span() 返回的共享空上下文"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("rec", "name", "t0")
+
+    def __init__(self, rec, name: str):
+        self.rec = rec
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.rec.record(self.name, self.t0, time.perf_counter())
+        return False
+
+
+class PerfRecorder:
+    """
+    分阶段耗时记录：
+    - span(name)：with 语句包住一个阶段；关闭记录时返回共享的空上下文，开销只有一次属性判断
+    - 每个阶段保留最近 window 次耗时，stats() 给出滚动分位数
+    - 同时记录 trace 事件，export_trace() 写出 Chrome Trace Event 格式的 JSON，
+      可用 chrome://tracing 或 Perfetto 打开
+    阶段名按 "模块.阶段" 命名，点号前的部分作为 trace 分类。
+    """
+
+    def __init__(self, enabled: bool = PERF_ENABLED, window: int = PERF_WINDOW,
+                 trace_max: int = PERF_TRACE_MAX_EVENTS):
+        self.enabled = enabled
+        self.window = window
+        self._samples = {}  # 阶段名 -> deque[耗时（秒）]
+        self._lock = threading.Lock()  # 保护 _samples 的键集合（新增阶段、遍历、清空）
+        self._trace = deque(maxlen=trace_max)  # (阶段名, 开始, 结束, 线程ID)
+        self._origin = time.perf_counter()
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, t0: float, t1: float):
+        """记录一次耗时（perf_counter 时间戳，秒）"""
+        samples = self._samples.get(name)
+        if samples is None:
+            with self._lock:
+                samples = self._samples.setdefault(name, deque(maxlen=self.window))
+        samples.append(t1 - t0)
+        self._trace.append((name, t0, t1, threading.get_ident()))
+
+    def stats(self) -> dict:
+        """{阶段名: {"n", "p50_ms", "p95_ms", "p99_ms", "max_ms"}}，按阶段名排序"""
+        # 其他线程可能正在新增阶段：持锁复制一份再遍历
+        with self._lock:
+            items = sorted(self._samples.items())
+        out = {}
+        for name, samples in items:
+            ms = sorted(s * 1000.0 for s in list(samples))
+            if not ms:
+                continue
+            last = len(ms) - 1
+            out[name] = {
+                "n": len(ms),
+                "p50_ms": ms[last // 2],
+                "p95_ms": ms[int(last * 0.95)],
+                "p99_ms": ms[int(last * 0.99)],
+                "max_ms": ms[-1],
+            }
+        return out
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+        self._trace.clear()
+
+    def export_trace(self, path: str) -> int:
+        """写出 Chrome Trace Event 格式（完整事件 ph="X"，时间单位微秒），返回事件数"""
+        events = list(self._trace)
+        pid = os.getpid()
+        trace = [
+            {
+                "name": name, "cat": name.split(".", 1)[0], "ph": "X", "pid": pid, "tid": tid,
+                "ts": (t0 - self._origin) * 1e6, "dur": (t1 - t0) * 1e6,
+            }
+            for name, t0, t1, tid in events
+        ]
+        names = {}
+        for t in threading.enumerate():
+            names[t.ident] = t.name
+        trace += [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}}
+            for tid, tname in names.items() if tid is not None
+        ]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+
+# 进程内共享的记录器
+perf = PerfRecorder()
@@ -0,0 +1,69 @@
+# event_recorder/core/playback_clock.py
+
+import math
+import time
+from collections import deque
+
+from event_recorder.config import PLAYBACK_MAX_DISPLAY_FPS
+
+
+class PlaybackClock:
+    """
+    单调媒体时钟：把墙钟时间映射为“此刻应显示的帧”。
+
+    - 媒体位置 = 起始帧 + 已过墙钟时间 × 帧率 × 倍速，不受渲染耗时影响
+    - 显示速率上限为 max_display_fps；倍速超过上限时按 stride 跳帧
+    - 记录实际显示时刻，统计实际帧率与目标帧率
+    """
+
+    def __init__(self, fps: float, speed: float = 1.0,
+                 max_display_fps: float = PLAYBACK_MAX_DISPLAY_FPS):
+        self.fps = fps if fps > 0 else 1.0
+        self.speed = speed if speed > 0 else 1.0
+        self.max_display_fps = max_display_fps
+        self._t0 = time.perf_counter()
+        self._f0 = 0
+        self._shown = deque(maxlen=240)  # 最近的显示时刻
+
+    def start(self, frame_idx: int, speed: float = None):
+        """以 frame_idx 为当前位置重新对齐时钟"""
+        if speed is not None and speed > 0:
+            self.speed = speed
+        self._t0 = time.perf_counter()
+        self._f0 = frame_idx
+        self._shown.clear()
+
+    @property
+    def media_rate(self) -> float:
+        """每秒墙钟时间推进的帧数"""
+        return self.fps * self.speed
+
+    @property
+    def stride(self) -> int:
+        """每次显示前进的帧数"""
+        return max(1, math.ceil(self.media_rate / self.max_display_fps))
+
+    @property
+    def target_fps(self) -> float:
+        """目标显示帧率"""
+        return self.media_rate / self.stride
+
+    def due_frame(self, now: float = None) -> int:
+        """此刻应显示的帧索引"""
+        now = time.perf_counter() if now is None else now
+        return self._f0 + int((now - self._t0) * self.media_rate)
+
+    def time_of(self, frame_idx: int) -> float:
+        """frame_idx 应被显示的墙钟时刻（perf_counter 时间）"""
+        return self._t0 + (frame_idx - self._f0) / self.media_rate
+
+    def record_display(self, now: float = None):
+        self._shown.append(time.perf_counter() if now is None else now)
+
+    @property
+    def achieved_fps(self) -> float:
+        """最近一段时间的实际显示帧率"""
+        if len(self._shown) < 2:
+            return 0.0
+        span = self._shown[-1] - self._shown[0]
+        return (len(self._shown) - 1) / span if span > 0 else 0.0
@@ -0,0 +1,170 @@
+# event_recorder/core/prefetch.py
+
+import threading
+from collections import deque
+
+from event_recorder.config import PREFETCH_MAX_BYTES, PREFETCH_MAX_FRAMES
+from event_recorder.core.perf import perf
+
+
+class FramePrefetcher:
+    """
+    后台解码线程：围绕 VideoCore 预先解码后续帧，放入有界环形缓冲区。
+
+    - start(idx, stride)：清空缓冲区，从 idx 开始按 stride 向后解码
+    - hold(idx)：暂停时围绕当前帧 idx 预取：逐帧填满后续帧，随后把前一帧（及其前面几帧）
+      解码进 VideoCore 的帧缓存，逐帧前进、后退都不必同步解码
+    - pop(idx)：取出缓冲区中的第 idx 帧；未就绪时返回 None，由调用方同步解码
+    - pop_due(due)：按播放时钟取出不晚于 due 的最新一帧，丢弃已来不及显示的帧；
+      生产落后时直接跳到 due，不再解码注定显示不了的帧
+    - flush()：停止生产并清空缓冲区（跳转、倍速变化、切换视频时调用）
+    - 缓冲区同时受帧数与字节数上限约束
+    """
+
+    def __init__(self, video_core, max_bytes: int = PREFETCH_MAX_BYTES,
+                 max_frames: int = PREFETCH_MAX_FRAMES):
+        self.video_core = video_core
+        self.max_bytes = max_bytes
+        self.max_frames = max_frames
+        self._buffer = deque()  # (帧索引, 帧)
+        self._bytes = 0
+        self._frame_bytes = 0  # 最近一帧的大小，用于判断是否还能放下下一帧
+        self._next_idx = 0
+        self._stride = 1
+        self._active = False
+        self._back = None  # 缓冲区填满后要解码进帧缓存的回退帧
+        self._running = True
+        self._gen = 0  # 每次 start/flush 自增，丢弃过期的解码结果
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="FramePrefetcher", daemon=True)
+        self._thread.start()
+
+    def start(self, start_idx: int, stride: int = 1):
+        """清空缓冲区并从 start_idx 开始预取"""
+        with self._cond:
+            self._reset()
+            self._next_idx = max(0, int(start_idx))
+            self._stride = max(1, int(stride))
+            self._active = True
+            self._cond.notify_all()
+
+    def hold(self, idx: int):
+        """暂停时预取 idx 之后的帧与 idx 前一帧；缓冲区已从 idx + 1 开始逐帧预取时保留"""
+        idx = max(0, int(idx))
+        with self._cond:
+            head = self._buffer[0][0] if self._buffer else self._next_idx
+            if not (self._active and self._stride == 1 and head == idx + 1):
+                self._reset()
+                self._next_idx = idx + 1
+                self._stride = 1
+                self._active = True
+            self._back = idx - 1 if idx > 0 else None
+            self._cond.notify_all()
+
+    def flush(self):
+        """停止预取并清空缓冲区"""
+        with self._cond:
+            self._reset()
+            self._cond.notify_all()
+
+    def pop(self, idx: int):
+        """
+        取出第 idx 帧：丢弃缓冲区中早于 idx 的帧；
+        队首恰为 idx 时返回该帧，否则返回 None（缓冲区保持不变）
+        """
+        with self._cond:
+            while self._buffer and self._buffer[0][0] < idx:
+                self._discard_head()
+            if self._buffer and self._buffer[0][0] == idx:
+                frame = self._discard_head()
+                self._cond.notify_all()
+                return frame
+            return None
+
+    def pop_due(self, due: int):
+        """
+        取出不晚于 due 的最新一帧，返回 (帧索引, 帧)；
+        队首尚未到显示时刻或缓冲区为空时返回 (None, None)
+        """
+        with self._cond:
+            if not self._buffer:
+                if self._active and self._next_idx < due:
+                    self._next_idx = due
+                return None, None
+            while len(self._buffer) > 1 and self._buffer[1][0] <= due:
+                self._discard_head()
+            if self._buffer[0][0] > due:
+                return None, None
+            idx = self._buffer[0][0]
+            frame = self._discard_head()
+            self._cond.notify_all()
+            return idx, frame
+
+    def stop(self):
+        """结束后台线程"""
+        with self._cond:
+            self._running = False
+            self._reset()
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def _reset(self):
+        self._gen += 1
+        self._active = False
+        self._back = None
+        self._buffer.clear()
+        self._bytes = 0
+
+    def _discard_head(self):
+        _, frame = self._buffer.popleft()
+        self._bytes -= frame.nbytes
+        return frame
+
+    def _full(self) -> bool:
+        if len(self._buffer) >= self.max_frames:
+            return True
+        return bool(self._buffer) and self._bytes + self._frame_bytes > self.max_bytes
+
+    def _has_work(self) -> bool:
+        return (self._active and not self._full()) or self._back is not None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._has_work():
+                    self._cond.wait()
+                if not self._running:
+                    return
+                gen = self._gen
+                back = None
+                if not self._active or self._full():
+                    # 后续帧已备好：轮到回退帧
+                    back, self._back = self._back, None
+                idx = self._next_idx
+
+            if back is not None:
+                # 解码进帧缓存即可（目标之前的几帧随之缓存），不进缓冲区
+                if not self.video_core.is_cached(back):
+                    with perf.span("prefetch.backstep"):
+                        self.video_core.get_frame(back)
+                continue
+
+            # 跳帧时中间帧只 grab 不 retrieve，也不为回退缓存
+            with perf.span("prefetch.decode"):
+                ret, frame = self.video_core.get_frame(idx, backstep_cache=False)
+
+            with self._cond:
+                if gen != self._gen:
+                    continue
+                if not ret:
+                    # 到达视频末尾或读取失败，停止生产
+                    self._active = False
+                    continue
+                self._buffer.append((idx, frame))
+                self._bytes += frame.nbytes
+                self._frame_bytes = frame.nbytes
+                self._next_idx = max(self._next_idx, idx + self._stride)
@@ -0,0 +1,229 @@
+# event_recorder/core/probe.py
+"""
+批量探测与校验视频文件。
+
+    python -m event_recorder.core.probe 目录 [--workers N] [--out 结果.json]
+
+与 VideoCore.open 使用同一套规则（格式、分辨率、帧率）。探测结果写入持久缓存
+（以 路径 + 大小 + 修改时间 为键），再次扫描只探测新增或变化的文件；
+GUI 打开已探测过的文件时直接使用缓存的元数据。
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from event_recorder.core.lazy_import import lazy_import
+cv2 = lazy_import("cv2")
+
+from event_recorder.config import (
+    ACCEPTED_RESOLUTIONS, ACCEPTED_FRAMERATES, ACCEPTED_FORMATS, CACHE_DIR,
+    PROBE_EXTENSIONS, PROBE_WORKERS
+)
+from event_recorder.core.media_cache import file_identity, write_json_atomic
+
+PROBE_CACHE_FILE = os.path.join(CACHE_DIR, "probe_cache.json")
+
+
+def check_format(filepath: str):
+    """扩展名不受支持时返回拒绝原因，否则返回 None"""
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext not in ACCEPTED_FORMATS:
+        return f"不支持的格式：{ext}"
+    return None
+
+
+def check_stream(width: int, height: int, fps: float):
+    """分辨率或帧率不受支持时返回拒绝原因，否则返回 None"""
+    if (width, height) not in ACCEPTED_RESOLUTIONS:
+        return f"不支持的分辨率：{width}x{height}"
+    if int(round(fps)) not in ACCEPTED_FRAMERATES:
+        return f"不支持的帧率：{fps}"
+    return None
+
+
+def probe_capture(cap, filepath: str) -> dict:
+    """从已打开的 VideoCapture 读取元数据并按规则校验"""
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    reason = check_stream(width, height, fps)
+    return {
+        "path": os.path.abspath(filepath),
+        "width": width,
+        "height": height,
+        "fps": fps,
+        "total_frames": total,
+        "duration": total / fps if fps > 0 else 0.0,
+        "ok": reason is None,
+        "reason": reason,
+    }
+
+
+def _rejected(filepath: str, reason: str) -> dict:
+    return {
+        "path": os.path.abspath(filepath), "width": 0, "height": 0, "fps": 0.0,
+        "total_frames": 0, "duration": 0.0, "ok": False, "reason": reason,
+    }
+
+
+def probe_file(filepath: str) -> dict:
+    """
+    探测单个文件（进程池任务）：返回尺寸、帧率、帧数、时长及是否通过校验与拒绝原因。
+    无法打开的文件同样返回结果而不抛异常，reason 以 "无法打开视频" 开头。
+    """
+    reason = check_format(filepath)
+    if reason:
+        return _rejected(filepath, reason)
+    cap = cv2.VideoCapture(filepath)
+    try:
+        if not cap.isOpened():
+            return _rejected(filepath, f"无法打开视频：{filepath}")
+        return probe_capture(cap, filepath)
+    finally:
+        cap.release()
+
+
+def cached_probe(filepath: str) -> dict:
+    """探测单个文件，优先使用默认缓存中的结果；新结果写回缓存（缓存不可写不影响返回）"""
+    cache = default_cache()
+    meta = cache.get(filepath)
+    if meta is None or not meta["ok"]:
+        meta = probe_file(filepath)
+        try:
+            cache.put(filepath, meta)
+            cache.save()
+        except OSError:
+            pass
+    return meta
+
+
+class ProbeCache:
+    """
+    探测结果的持久缓存：绝对路径 -> {"size", "mtime_ns", "result"}。
+    文件大小或修改时间变化后条目失效。保存时与磁盘上的最新内容合并，
+    GUI 与命令行工具可交替写入。
+    """
+
+    def __init__(self, path: str = PROBE_CACHE_FILE):
+        self.path = path
+        self._entries = self._read()
+        self._dirty = {}
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, filepath: str):
+        """缓存命中且文件未变化时返回探测结果，否则返回 None"""
+        try:
+            ident = file_identity(filepath)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(ident["path"])
+        if entry and entry.get("size") == ident["size"] and entry.get("mtime_ns") == ident["mtime_ns"]:
+            return entry.get("result")
+        return None
+
+    def put(self, filepath: str, result: dict):
+        ident = file_identity(filepath)
+        entry = {"size": ident["size"], "mtime_ns": ident["mtime_ns"], "result": result}
+        with self._lock:
+            self._entries[ident["path"]] = entry
+            self._dirty[ident["path"]] = entry
+
+    def save(self):
+        """把本进程新增的条目合并进磁盘上的缓存文件"""
+        with self._lock:
+            if not self._dirty:
+                return
+            merged = self._read()
+            merged.update(self._dirty)
+            self._entries.update(merged)
+            self._dirty = {}
+        write_json_atomic(self.path, merged)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache() -> ProbeCache:
+    """进程内共享的默认探测缓存"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ProbeCache()
+        return _default_cache
+
+
+def find_videos(root: str, extensions=PROBE_EXTENSIONS):
+    """递归列出 root 下扩展名属于 extensions 的文件（排序后返回）"""
+    found = []
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in extensions:
+                found.append(os.path.join(dirpath, name))
+    return sorted(found)
+
+
+def probe_paths(paths, workers=PROBE_WORKERS, cache: ProbeCache = None, on_progress=None):
+    """
+    批量探测：缓存命中的直接返回，其余交给进程池并行探测并写回缓存。
+    :param on_progress: 可选回调 on_progress(已完成数, 总数)
+    :return: 与 paths 顺序一致的结果列表
+    """
+    cache = cache or default_cache()
+    results = [cache.get(p) for p in paths]
+    todo = [i for i, r in enumerate(results) if r is None]
+    done = len(paths) - len(todo)
+    if on_progress:
+        on_progress(done, len(paths))
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk = max(1, len(todo) // (4 * (os.cpu_count() or 1)))
+            for i, result in zip(todo, pool.map(probe_file, [paths[i] for i in todo], chunksize=chunk)):
+                results[i] = result
+                try:
+                    cache.put(paths[i], result)
+                except OSError:
+                    pass  # 探测期间文件被删除
+                done += 1
+                if on_progress:
+                    on_progress(done, len(paths))
+        cache.save()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="批量探测并校验目录下的视频文件")
+    parser.add_argument("root", help="要扫描的目录")
+    parser.add_argument("--workers", type=int, default=PROBE_WORKERS, help="探测进程数")
+    parser.add_argument("--out", help="把全部结果写入该 JSON 文件")
+    args = parser.parse_args(argv)
+
+    paths = find_videos(args.root)
+    results = probe_paths(paths, args.workers)
+    accepted = [r for r in results if r["ok"]]
+    for r in results:
+        if not r["ok"]:
+            print(f"拒绝 {r['path']}：{r['reason']}")
+    print(f"共 {len(results)} 个文件，通过 {len(accepted)}，拒绝 {len(results) - len(accepted)}")
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+    return 0 if len(accepted) == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
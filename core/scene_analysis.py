@@ -0,0 +1,208 @@
+# event_recorder/core/scene_analysis.py
+"""
+镜头切换与活跃度分析，用于时间轴导航。
+
+按 SCENE_SAMPLE_FPS 采样帧，缩小到 SCENE_ANALYSIS_WIDTH 宽后由进程池分块解码，
+每块批量算出 色相×饱和度 直方图与亮度图；主进程用向量化运算得到相邻采样帧的
+直方图距离（镜头切换）与平均绝对差（画面运动量 → 活跃度曲线）。结果按视频内容缓存为 .npz。
+"""
+
+import bisect
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from event_recorder.core.lazy_import import lazy_import
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+from event_recorder.config import (
+    SCENE_SAMPLE_FPS, SCENE_ANALYSIS_WIDTH, SCENE_CHUNK_SAMPLES, SCENE_WORKERS,
+    SCENE_CUT_SENSITIVITY, SCENE_CUT_MIN_DISTANCE, SCENE_MIN_CUT_GAP_S
+)
+from event_recorder.core.media_cache import content_identity, cache_path, temp_path
+
+# 色相 × 饱和度 直方图的分箱数
+_HUE_BINS = 16
+_SAT_BINS = 4
+_MAD_TO_STD = 1.4826
+
+
+class SceneAnalysis:
+    """
+    一个视频的镜头切换与活跃度：
+    - cuts：镜头切换所在帧（升序）
+    - frames / activity：采样帧索引与对应的活跃度（0~1，按画面运动量归一化）
+    """
+
+    def __init__(self, frames, activity, cuts):
+        self.frames = np.asarray(frames, dtype=np.int64)
+        self.activity = np.asarray(activity, dtype=np.float32)
+        self.cuts = [int(c) for c in cuts]
+
+    def next_cut(self, frame_idx: int):
+        """严格晚于 frame_idx 的第一个镜头切换帧，没有则返回 None"""
+        i = bisect.bisect_right(self.cuts, frame_idx)
+        return self.cuts[i] if i < len(self.cuts) else None
+
+    def prev_cut(self, frame_idx: int):
+        """严格早于 frame_idx 的最后一个镜头切换帧，没有则返回 None"""
+        i = bisect.bisect_left(self.cuts, frame_idx)
+        return self.cuts[i - 1] if i > 0 else None
+
+    def activity_bins(self, total_frames: int, bins: int):
+        """把 [0, total_frames) 均分为 bins 段，返回每段内的最大活跃度（用于绘制热度条）"""
+        bins = max(1, int(bins))
+        out = np.zeros(bins, dtype=np.float32)
+        if not len(self.frames) or total_frames <= 0:
+            return out
+        b = np.clip((self.frames * (bins / float(total_frames))).astype(np.int64), 0, bins - 1)
+        np.maximum.at(out, b, self.activity)
+        return out
+
+
+def sample_step(fps: float) -> int:
+    return max(1, int(round((fps or 1.0) / SCENE_SAMPLE_FPS)))
+
+
+def _analysis_file(filepath: str, step: int) -> str:
+    return cache_path(filepath, f"scene{step}x{SCENE_ANALYSIS_WIDTH}", ".npz",
+                      identity=content_identity(filepath))
+
+
+def _sample_features(filepath: str, indices, size):
+    """
+    进程池任务：用独立的 VideoCapture 解码 indices 中的帧并缩小到 size=(w, h)，
+    批量计算每帧的 色相×饱和度 直方图（归一化）与灰度图。
+    块内采样帧有序且间距小：只在块首 seek 一次，之后 grab 前进（与 filmstrip 相同，不建索引、不写探测缓存）。
+    :return: (实际解码到的帧索引, 直方图 (n, bins), 灰度 (n, h, w))
+    """
+    w, h = size
+    hsv = np.empty((len(indices), h, w, 3), dtype=np.uint8)
+    cap = cv2.VideoCapture(filepath)
+    n = 0
+    pos = -1
+    try:
+        for k, idx in enumerate(indices):
+            if pos < 0 or idx < pos:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+                pos = idx
+            while pos < idx and cap.grab():
+                pos += 1
+            ret, frame = cap.read()
+            if not ret:
+                break
+            pos += 1
+            small = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(small, cv2.COLOR_BGR2HSV, dst=hsv[k])
+            n = k + 1
+    finally:
+        cap.release()
+    hsv = hsv[:n]
+    if not n:
+        return [], np.zeros((0, _HUE_BINS * _SAT_BINS), np.float32), hsv[..., 2]
+    # 批量直方图：每帧的分箱号加上帧偏移后一次 bincount
+    nb = _HUE_BINS * _SAT_BINS
+    hue = (hsv[..., 0].astype(np.int32) * _HUE_BINS) // 180
+    sat = (hsv[..., 1].astype(np.int32) * _SAT_BINS) // 256
+    codes = (hue * _SAT_BINS + sat).reshape(n, -1) + (np.arange(n, dtype=np.int32) * nb)[:, None]
+    hist = np.bincount(codes.ravel(), minlength=n * nb).reshape(n, nb).astype(np.float32)
+    hist /= max(1, w * h)
+    gray = hsv[..., 2]
+    return list(indices[:n]), hist, gray
+
+
+def analyze_video(filepath: str, total_frames: int, fps: float, width: int, height: int,
+                  workers=SCENE_WORKERS, on_progress=None) -> SceneAnalysis:
+    """
+    采样分析整个视频：采样帧分块交给进程池，块之间重叠一帧以便跨块比较。
+    - 镜头切换：相邻采样帧直方图的 L1 距离 /2 显著高于常态且为局部最大
+    - 活跃度：相邻采样帧亮度平均绝对差，按 99 分位归一化
+    :param on_progress: 可选回调 on_progress(已完成块数, 总块数)
+    """
+    step = sample_step(fps)
+    w = SCENE_ANALYSIS_WIDTH
+    h = max(1, int(round(w * height / max(width, 1))))
+    indices = list(range(0, max(total_frames, 1), step))
+    chunks = [indices[max(0, i - 1):i + SCENE_CHUNK_SAMPLES] for i in range(0, len(indices), SCENE_CHUNK_SAMPLES)]
+
+    parts = [None] * len(chunks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_sample_features, filepath, c, (w, h)): k for k, c in enumerate(chunks)}
+        for done, fut in enumerate(as_completed(futures), 1):
+            parts[futures[fut]] = fut.result()
+            if on_progress:
+                on_progress(done, len(chunks))
+
+    frames, dist, motion = [], [], []
+    for k, (idx, hist, gray) in enumerate(parts):
+        if len(idx) < 2:
+            continue
+        # 每块的第一帧（除首块外）是上一块的末帧，只用于差分
+        d = np.abs(np.diff(hist, axis=0)).sum(axis=1) / 2.0
+        m = np.abs(np.diff(gray.astype(np.int16), axis=0)).mean(axis=(1, 2)) / 255.0
+        if k == 0:
+            frames.append(np.asarray(idx[:1]))
+            dist.append(np.zeros(1, np.float32))
+            motion.append(np.zeros(1, np.float32))
+        frames.append(np.asarray(idx[1:]))
+        dist.append(d.astype(np.float32))
+        motion.append(m.astype(np.float32))
+    if not frames:
+        return SceneAnalysis([], [], [])
+    frames = np.concatenate(frames)
+    dist = np.concatenate(dist)
+    motion = np.concatenate(motion)
+    return SceneAnalysis(frames, _activity_curve(motion), _find_cuts(frames, dist, fps))
+
+
+def _activity_curve(motion):
+    if not len(motion):
+        return motion
+    kernel = np.ones(3, dtype=np.float32) / 3
+    smooth = np.convolve(motion, kernel, mode='same')
+    top = np.percentile(smooth, 99)
+    return np.clip(smooth / top, 0.0, 1.0) if top > 0 else np.zeros_like(smooth)
+
+
+def _find_cuts(frames, dist, fps: float):
+    """直方图距离的局部最大值中，超过自适应阈值的作为镜头切换；相距过近时只保留较强者"""
+    if len(dist) < 3:
+        return []
+    med = np.median(dist)
+    thr = max(SCENE_CUT_MIN_DISTANCE, med + SCENE_CUT_SENSITIVITY * _MAD_TO_STD * np.median(np.abs(dist - med)))
+    peak = np.zeros(len(dist), dtype=bool)
+    peak[1:-1] = (dist[1:-1] >= dist[:-2]) & (dist[1:-1] > dist[2:])
+    cand = np.flatnonzero(peak & (dist > thr))
+    gap = SCENE_MIN_CUT_GAP_S * (fps or 1.0)
+    cuts = []
+    for i in cand[np.argsort(-dist[cand], kind='stable')]:
+        f = int(frames[i])
+        if all(abs(f - c) >= gap for c in cuts):
+            cuts.append(f)
+    return sorted(cuts)
+
+
+def load_scene_analysis(filepath: str, fps: float):
+    """读取已缓存的分析结果；不存在时返回 None"""
+    path = _analysis_file(filepath, sample_step(fps))
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as z:
+            return SceneAnalysis(z["frames"], z["activity"], z["cuts"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def build_scene_analysis(filepath: str, total_frames: int, fps: float, width: int, height: int,
+                         workers=SCENE_WORKERS, on_progress=None) -> SceneAnalysis:
+    """读取或生成视频的镜头切换与活跃度分析（以视频内容标识为键缓存为 .npz）"""
+    cached = load_scene_analysis(filepath, fps)
+    if cached is not None:
+        return cached
+    result = analyze_video(filepath, total_frames, fps, width, height, workers, on_progress)
+    path = _analysis_file(filepath, sample_step(fps))
+    tmp = temp_path(path, ".npz")
+    np.savez(tmp, frames=result.frames, activity=result.activity, cuts=np.asarray(result.cuts, dtype=np.int64))
+    os.replace(tmp, path)
+    return result
@@ -0,0 +1,195 @@
+# event_recorder/core/session.py
+
+import hashlib
+import os
+from collections import OrderedDict
+
+from event_recorder.config import (
+    DEFAULT_SAVE_DIR, FRAME_CACHE_MAX_BYTES, SESSION_MAX_OPEN_VIDEOS, SESSION_IDLE_CACHE_BYTES
+)
+from event_recorder.core.event_logic import EventManager
+from event_recorder.core.event_merge import video_key
+from event_recorder.core.event_store import write_events_json
+from event_recorder.core.mp_decoder import open_decoder
+
+
+class VideoState:
+    """
+    会话中一个视频的状态：
+    - core：打开的解码句柄（VideoCore 或 MultiProcessDecoder）；被淘汰后为 None，切回时重新打开
+    - info：VideoCore.open 的返回值
+    - position：上次显示的帧
+    - events：该视频自己的 EventManager（事件存放于 VideoSession.events_dir(filepath)）
+    - filmstrip / scenes：界面生成的旁路数据，切回时直接复用
+    """
+
+    def __init__(self, filepath: str, events: EventManager):
+        self.filepath = filepath
+        self.name = os.path.splitext(os.path.basename(filepath))[0]
+        self.core = None
+        self.info = None
+        self.position = 0
+        self.events = events
+        self.filmstrip = None
+        self.scenes = None
+        self.pending = set()  # 正在后台生成的旁路数据名（"filmstrip" / "scenes"）
+
+    @property
+    def is_open(self) -> bool:
+        return self.core is not None
+
+
+class VideoSession:
+    """
+    多视频标注会话：在若干视频之间切换时保留各自的解码句柄、播放位置、帧缓存与事件列表。
+
+    - 打开的 VideoCore 句柄数不超过 max_open，超出时按最久未使用顺序释放（状态与事件保留）
+    - 当前视频的帧缓存使用完整容量，其余打开的视频缩小到 idle_cache_bytes，
+      切回时最近看过的帧仍在缓存中，无需重新解码
+    - 每个视频一个 EventManager，事件目录以 视频名 + 绝对路径摘要 区分，
+      不同文件夹下的同名视频不会共用同一份事件文件与日志
+    - 视频第一次加入时若其事件目录尚无事件文件，从旧布局迁移：
+      save_root/<视频名>/events.json，或默认事件文件中 save_path 指向该视频的事件；
+      迁移后从原处移除，同一事件不会同时出现在两处
+    """
+
+    def __init__(self, max_open: int = SESSION_MAX_OPEN_VIDEOS,
+                 cache_bytes: int = FRAME_CACHE_MAX_BYTES, idle_cache_bytes: int = SESSION_IDLE_CACHE_BYTES,
+                 save_root: str = None, default_events: EventManager = None):
+        """
+        :param default_events: 默认事件文件（save_root/events.json）的 EventManager；
+            给出时迁移读取其内存中的事件（含未压缩的日志），否则直接读文件
+        """
+        self.max_open = max(1, int(max_open))
+        self.cache_bytes = cache_bytes
+        self.idle_cache_bytes = idle_cache_bytes
+        self.save_root = save_root or DEFAULT_SAVE_DIR
+        self.default_events = default_events
+        self._videos = OrderedDict()  # 规范化路径 -> VideoState，按加入顺序
+        self._lru = OrderedDict()  # 打开句柄的规范化路径，最近使用的在末尾
+        self.current = None
+
+    @staticmethod
+    def _key(filepath: str) -> str:
+        return os.path.normcase(os.path.abspath(filepath))
+
+    def events_dir(self, filepath: str) -> str:
+        """视频的事件目录：save_root/<视频名>.<绝对路径摘要>"""
+        stem = os.path.splitext(os.path.basename(filepath))[0]
+        digest = hashlib.sha1(self._key(filepath).encode("utf-8")).hexdigest()[:10]
+        return os.path.join(self.save_root, f"{stem}.{digest}")
+
+    def _open_events(self, filepath: str) -> EventManager:
+        save_dir = self.events_dir(filepath)
+        events_file = os.path.join(save_dir, "events.json")
+        if not os.path.exists(events_file) and not os.path.exists(events_file + ".journal"):
+            self._migrate(filepath, events_file)
+        return EventManager(save_dir=save_dir)
+
+    def _migrate(self, filepath: str, events_file: str):
+        """
+        把旧布局中属于该视频的事件写入 events_file，并从原处移除：
+        - save_root/<视频名>/events.json：整份迁移，原文件改名为 events.json.migrated
+        - 否则取默认事件文件中 save_path 指向该视频的事件，写入后从默认事件中删除
+        """
+        stem = os.path.splitext(os.path.basename(filepath))[0]
+        legacy_dir = os.path.join(self.save_root, stem)
+        legacy_file = os.path.join(legacy_dir, "events.json")
+        if os.path.exists(legacy_file):
+            old = EventManager(save_dir=legacy_dir)  # 重放可能残留的日志
+            try:
+                events = list(old.events)
+            finally:
+                old.close()
+            self._write_migrated(events_file, events)
+            os.replace(legacy_file, legacy_file + ".migrated")
+            return
+
+        source = self.default_events
+        if source is None:
+            default_file = os.path.join(self.save_root, "events.json")
+            if not os.path.exists(default_file) and not os.path.exists(default_file + ".journal"):
+                return
+            source = EventManager(save_dir=self.save_root)
+        try:
+            picked = [(eid, evt) for eid, evt in zip(source.event_ids(), source.events) if video_key(evt) == stem]
+            if picked:
+                self._write_migrated(events_file, [evt for _, evt in picked])
+                source.delete_events([eid for eid, _ in picked])
+        finally:
+            if source is not self.default_events:
+                source.close()
+
+    @staticmethod
+    def _write_migrated(events_file: str, events: list):
+        if events:
+            os.makedirs(os.path.dirname(events_file), exist_ok=True)
+            write_events_json(events_file, events)
+
+    def videos(self):
+        """按加入顺序返回会话中的全部 VideoState"""
+        return list(self._videos.values())
+
+    def get(self, filepath: str):
+        return self._videos.get(self._key(filepath))
+
+    def activate(self, filepath: str) -> VideoState:
+        """
+        切换到视频 filepath（不在会话中则加入），返回其状态。
+        :raises ValueError / IOError: 同 VideoCore.open；失败时会话保持不变
+        """
+        key = self._key(filepath)
+        state = self._videos.get(key)
+        if state is None or not state.is_open:
+            core, info = open_decoder(filepath, self.cache_bytes)
+            if state is None:
+                state = VideoState(filepath, self._open_events(filepath))
+                self._videos[key] = state
+            state.core, state.info = core, info
+            state.position = min(state.position, max(0, info['total_frames'] - 1))
+
+        if self.current is not None and self.current is not state and self.current.is_open:
+            idle = self.current.core
+            if hasattr(idle, "suspend"):
+                idle.suspend()  # 多进程解码：非当前视频不占用解码进程与共享内存
+            else:
+                idle.frame_cache.resize(self.idle_cache_bytes)
+        if hasattr(state.core, "frame_cache"):
+            state.core.frame_cache.resize(self.cache_bytes)
+        self._lru[key] = True
+        self._lru.move_to_end(key)
+        self.current = state
+        self._evict()
+        return state
+
+    def _evict(self):
+        while len(self._lru) > self.max_open:
+            key, _ = self._lru.popitem(last=False)
+            state = self._videos[key]
+            state.core.release()
+            state.core = None
+
+    def remove(self, filepath: str):
+        """把视频移出会话：释放句柄并关闭其 EventManager（落盘未压缩的日志）"""
+        key = self._key(filepath)
+        state = self._videos.pop(key, None)
+        if state is None:
+            return
+        self._lru.pop(key, None)
+        if state.core is not None:
+            state.core.release()
+            state.core = None
+        state.events.close()
+        if self.current is state:
+            self.current = None
+
+    def close(self):
+        """关闭会话中的全部视频"""
+        for state in self.videos():
+            self.remove(state.filepath)
+
+    def __len__(self) -> int:
+        return len(self._videos)
+
+    def __contains__(self, filepath: str) -> bool:
+        return self._key(filepath) in self._videos
@@ -0,0 +1,105 @@
+# event_recorder/core/timestamps.py
+
+import os
+
+from event_recorder.core.lazy_import import lazy_import
+np = lazy_import("numpy")
+
+from event_recorder.core.media_cache import file_identity, cache_path, temp_path
+
+
+class TimestampTable:
+    """
+    逐帧显示时间戳（PTS）表：pts[i] 为第 i 帧相对第 0 帧的秒数。
+    可变帧率视频的帧号/时间换算以此为准；换算函数同时接受标量与数组。
+    """
+
+    def __init__(self, pts):
+        pts = np.asarray(pts, dtype=np.float64)
+        self.pts = pts - pts[0] if len(pts) else pts
+
+    def frame_to_time(self, frames):
+        """帧号（标量或数组）转秒数；超出范围的帧号按首尾帧外推"""
+        f = np.asarray(frames, dtype=np.int64)
+        last = len(self.pts) - 1
+        t = self.pts[np.clip(f, 0, last)]
+        if last > 0:
+            step = (self.pts[-1] - self.pts[0]) / last
+            t = np.where(f > last, self.pts[-1] + (f - last) * step, t)
+        return t.item() if t.ndim == 0 else t
+
+    def time_to_frame(self, seconds):
+        """秒数（标量或数组）转显示时间最接近的帧号"""
+        s = np.asarray(seconds, dtype=np.float64)
+        i = np.clip(np.searchsorted(self.pts, s), 1, max(1, len(self.pts) - 1))
+        prev = self.pts[i - 1]
+        nxt = self.pts[np.minimum(i, len(self.pts) - 1)]
+        idx = np.where(np.abs(s - prev) <= np.abs(nxt - s), i - 1, i)
+        idx = np.clip(idx, 0, len(self.pts) - 1)
+        return int(idx) if idx.ndim == 0 else idx.astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.pts)
+
+
+def frame_to_time(frames, fps: float, table: TimestampTable = None):
+    """帧号转秒数：有时间戳表时查表，否则按恒定帧率计算；标量进标量出，数组进数组出"""
+    if table is not None:
+        return table.frame_to_time(frames)
+    if np.ndim(frames) == 0:
+        return frames / fps if fps > 0 else 0.0
+    f = np.asarray(frames, dtype=np.float64)
+    return f / fps if fps > 0 else np.zeros_like(f)
+
+
+def time_to_frame(seconds, fps: float, table: TimestampTable = None):
+    """秒数转最接近的帧号：有时间戳表时查表，否则按恒定帧率计算"""
+    if table is not None:
+        return table.time_to_frame(seconds)
+    if np.ndim(seconds) == 0:
+        return int(round(seconds * fps)) if fps > 0 else 0
+    s = np.asarray(seconds, dtype=np.float64)
+    return np.rint(s * fps).astype(np.int64) if fps > 0 else np.zeros(s.shape, np.int64)
+
+
+def from_stamps(stamps_ms):
+    """
+    由逐包读到的显示时间戳（毫秒，解码顺序）得到按显示顺序排列的秒数数组；
+    时间戳全部缺失（均为 0）时返回 None。扫描与关键帧索引在同一遍原始包读取中完成（keyframe_index.scan_packets）。
+    """
+    pts = np.sort(np.asarray(stamps_ms, dtype=np.float64)) / 1000.0
+    if len(pts) < 2 or not pts[-1] > pts[0]:
+        return None
+    return pts
+
+
+def _sidecar(filepath: str) -> str:
+    return cache_path(filepath, "pts", ".npy", identity=file_identity(filepath))
+
+
+def load_cached(filepath: str):
+    """
+    读取视频旁路缓存中的时间戳表（以路径、大小、修改时间为键）。
+    :return: (是否命中缓存, TimestampTable 或 None)；命中但视频没有可用时间戳时表为 None
+    """
+    sidecar = _sidecar(filepath)
+    if not os.path.exists(sidecar):
+        return False, None
+    try:
+        pts = np.load(sidecar)
+    except (OSError, ValueError):
+        return False, None
+    return True, (TimestampTable(pts) if len(pts) >= 2 else None)
+
+
+def save(filepath: str, pts):
+    """写入时间戳缓存；pts 为 None 时写入空表，记录该视频没有可用时间戳，避免每次打开都重新扫描"""
+    sidecar = _sidecar(filepath)
+    tmp = None
+    try:
+        tmp = temp_path(sidecar, ".npy")
+        np.save(tmp, np.zeros(0, np.float64) if pts is None else pts)
+        os.replace(tmp, sidecar)
+    except OSError:
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
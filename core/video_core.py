@@ -1,7 +1,10 @@
-import math
-import os
-import cv2
-from event_recorder.config import ACCEPTED_RESOLUTIONS, ACCEPTED_FRAMERATES, ACCEPTED_FORMATS
+import threading
+from event_recorder.core.lazy_import import lazy_import
+cv2 = lazy_import("cv2")
+from event_recorder.config import FRAME_CACHE_MAX_BYTES, SEQUENTIAL_SKIP_MAX, BACKSTEP_CACHE_FRAMES
+from event_recorder.core.frame_cache import FrameCache
+from event_recorder.core import keyframe_index, probe, timestamps
+from event_recorder.core.probe import check_format, probe_capture
 
 class VideoCore:
     """
@@ -11,47 +14,77 @@ class VideoCore:
     - 打开视频并校验格式、分辨率、帧率
     - 读取当前帧、跳转至指定帧/时间
     - 帧数与时间互转
+    - 跟踪解码器位置：目标恰为下一帧时跳过 seek 直接顺序读取
+    - 按字节数限制的 LRU 帧缓存：回退、重看已解码范围时无需重新解码
+    - 解码器访问由可重入锁保护，可被后台预取线程与主线程同时使用
+    - 打开后在后台用一遍原始包扫描建立关键帧索引与逐帧时间戳表（带旁路缓存），
+      随机跳转时从最近关键帧向前解码，帧号/时间按逐帧 PTS 换算
+    - 校验规则与批量探测（core.probe）共用，已探测过的文件直接使用缓存的元数据
     """
-    def __init__(self):
+    def __init__(self, cache_bytes: int = FRAME_CACHE_MAX_BYTES):
         self.cap = None
         self.frame_rate = 0
         self.total_frames = 0
         self.width = 0
         self.height = 0
+        self.frame_cache = FrameCache(cache_bytes)
+        self._pos = 0  # 解码器下一次 read() 将返回的帧索引
+        self._lock = threading.RLock()
+        self.filepath = None
+        self.keyframes = None  # KeyframeIndex，后台建立完成前为 None
+        self.timestamps = None  # TimestampTable，后台建立完成前为 None（按恒定帧率换算）
+        self._open_gen = 0  # 每次打开视频自增，用于丢弃旧视频的索引结果
 
-    def open(self, filepath: str):
+    def open(self, filepath: str, index: bool = True):
         """
         打开并校验视频文件
         :param filepath: 视频文件路径
+        :param index: 是否在后台建立关键帧索引与时间戳表；只顺序读一遍的批处理传 False，不做额外的全文件扫描
         :raises ValueError: 格式、分辨率或帧率不支持
         :raises IOError: 无法打开文件
         """
-        ext = os.path.splitext(filepath)[1].lower()
-        if ext not in ACCEPTED_FORMATS:
-            raise ValueError(f"不支持的格式：{ext}")
+        reason = check_format(filepath)
+        if reason:
+            raise ValueError(reason)
+
+        # 已探测过且文件未变化：直接使用缓存的元数据与校验结论
+        cache = probe.default_cache()
+        meta = cache.get(filepath)
+        if meta is not None and not meta["ok"] and not meta["reason"].startswith("无法打开视频"):
+            raise ValueError(meta["reason"])
 
         cap = cv2.VideoCapture(filepath)
         if not cap.isOpened():
             raise IOError(f"无法打开视频：{filepath}")
 
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-        if (width, height) not in ACCEPTED_RESOLUTIONS:
-            cap.release()
-            raise ValueError(f"不支持的分辨率：{width}x{height}")
-        if int(round(fps)) not in ACCEPTED_FRAMERATES:
+        if meta is None or not meta["ok"]:
+            meta = probe_capture(cap, filepath)
+            try:
+                cache.put(filepath, meta)
+                cache.save()
+            except OSError:
+                pass  # 缓存不可写不影响打开
+        if not meta["ok"]:
             cap.release()
-            raise ValueError(f"不支持的帧率：{fps}")
-
-        # 校验通过，保存属性
-        self.cap = cap
-        self.frame_rate = fps
-        self.total_frames = total
-        self.width = width
-        self.height = height
+            raise ValueError(meta["reason"])
+        fps, width, height, total = meta["fps"], meta["width"], meta["height"], meta["total_frames"]
+
+        # 校验通过，释放旧视频并保存属性
+        with self._lock:
+            self.release()
+            self.cap = cap
+            self.frame_rate = fps
+            self.total_frames = total
+            self.width = width
+            self.height = height
+            self.filepath = filepath
+            self._open_gen += 1
+            gen = self._open_gen
+        if index:
+            threading.Thread(
+                target=self._build_indexes, args=(filepath, gen),
+                name="VideoIndexes", daemon=True
+            ).start()
         return {
             'width': width,
             'height': height,
@@ -60,18 +93,110 @@ class VideoCore:
         }
 
     def read_frame(self):
-        """读取当前帧"""
-        if not self.cap:
-            return False, None
-        ret, frame = self.cap.read()
+        """
+        读取当前帧并写入缓存。
+        返回的帧为只读数组（与缓存共享内存），需要修改时请先 copy()。
+        """
+        with self._lock:
+            if not self.cap:
+                return False, None
+            idx = self._pos
+            ret, frame = self.cap.read()
+            if not ret:
+                return ret, frame
+            self._pos = idx + 1
+            frame.flags.writeable = False
+            self.frame_cache.put(idx, frame)
         return ret, frame
 
-    def get_frame(self, frame_idx: int):
-        """跳转并读取指定帧"""
-        if not self.cap:
-            return False, None
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-        return self.read_frame()
+    def get_frame(self, frame_idx: int, should_abort=None, backstep_cache: bool = True):
+        """
+        读取指定帧：
+        - 缓存命中直接返回
+        - 目标恰为解码器下一帧时顺序读取，不做 seek
+        - 否则跳转后读取
+        :param should_abort: 可选回调，向前解码途中返回 True 时放弃本次读取并返回 (False, None)
+        :param backstep_cache: 向前解码时是否缓存目标之前的几帧（倍速播放跳帧时关闭）
+        """
+        frame = self.frame_cache.get(frame_idx)
+        if frame is not None:
+            return True, frame
+        with self._lock:
+            if not self.cap:
+                return False, None
+            if frame_idx != self._pos:
+                if not self._seek_for_read(frame_idx, should_abort, backstep_cache):
+                    return False, None
+            return self.read_frame()
+
+    def is_cached(self, frame_idx: int) -> bool:
+        """帧是否已在帧缓存中（无需解码即可取得）"""
+        return frame_idx in self.frame_cache
+
+    def get_preview_frame(self, frame_idx: int):
+        """
+        廉价预览：缓存命中时返回精确帧，否则只解码不晚于目标的最近关键帧。
+        :return: (ret, frame, 实际帧索引)
+        """
+        frame = self.frame_cache.get(frame_idx)
+        if frame is not None:
+            return True, frame, frame_idx
+        kf = self.keyframes
+        key = kf.floor(frame_idx) if kf is not None else frame_idx
+        ret, frame = self.get_frame(key)
+        return ret, frame, key
+
+    def _seek_for_read(self, target: int, should_abort=None, backstep_cache: bool = True) -> bool:
+        """
+        让解码器停在 target 之前：
+        - 目标在当前解码位置前方且属于同一 GOP：复用解码器状态，直接 grab 前进
+        - 有关键帧索引：跳到最近的前置关键帧，再向前解码到目标
+        - 无索引：距离较近时 grab 前进，否则交给 OpenCV 的通用 seek
+        :return: 被 should_abort 中止或解码失败时返回 False
+        """
+        kf = self.keyframes
+        ahead = target - self._pos
+        if kf is None:
+            if 0 < ahead <= SEQUENTIAL_SKIP_MAX:
+                return self._skip_to(target, should_abort, backstep_cache)
+            self.seek_frame(target)
+            return True
+        key = kf.floor(target)
+        if ahead > 0 and key <= self._pos:
+            return self._skip_to(target, should_abort, backstep_cache)
+        self.seek_frame(key)
+        return self._skip_to(target, should_abort, backstep_cache)
+
+    def _skip_to(self, target: int, should_abort=None, backstep_cache: bool = True) -> bool:
+        """
+        从当前位置顺序前进到 target（只 grab 不 retrieve）；最后几帧解码并缓存，便于随后逐帧回退
+        :return: 到达 target 时返回 True；被 should_abort 中止或 grab / read 失败（如视频提前结束）时返回 False
+        """
+        tail = BACKSTEP_CACHE_FRAMES if backstep_cache else 0
+        while self._pos < target:
+            if should_abort is not None and should_abort():
+                return False
+            idx = self._pos
+            if target - idx <= tail and idx not in self.frame_cache:
+                ret, _ = self.read_frame()
+            else:
+                ret = self.cap.grab()
+                if ret:
+                    self._pos = idx + 1
+            if not ret:
+                return False
+        return True
+
+    def _build_indexes(self, filepath: str, gen: int):
+        """后台线程：一遍原始包扫描（或读缓存）得到关键帧索引与逐帧时间戳表；期间若已切换视频则丢弃结果"""
+        try:
+            index, table = keyframe_index.load_or_build(filepath)
+        except Exception:
+            index, table = None, None
+        with self._lock:
+            if gen == self._open_gen:
+                self.keyframes = index
+                self.timestamps = table
 
     def next_frame(self):
         """读取下一帧"""
@@ -79,24 +204,32 @@ class VideoCore:
 
     def seek_frame(self, frame_idx: int):
         """跳转至指定帧，不读取"""
-        if not self.cap:
-            return
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-
-    def frame_to_time(self, frame_idx: int) -> float:
-        """将帧数转换为秒"""
-        if self.frame_rate <= 0:
-            return 0.0
-        return frame_idx / self.frame_rate
-
-    def time_to_frame(self, seconds: float) -> int:
-        """将时间（秒）转换为最接近的帧数"""
-        if self.frame_rate <= 0:
-            return 0
-        return int(round(seconds * self.frame_rate))
+        with self._lock:
+            if not self.cap:
+                return
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+            self._pos = frame_idx
+
+    def frame_to_time(self, frame_idx):
+        """
+        将帧数转换为秒：时间戳表就绪后按逐帧 PTS 查表（可变帧率准确），否则按恒定帧率计算。
+        frame_idx 可为整数或数组，数组时一次换算全部。
+        """
+        return timestamps.frame_to_time(frame_idx, self.frame_rate, self.timestamps)
+
+    def time_to_frame(self, seconds):
+        """将时间（秒，标量或数组）转换为显示时间最接近的帧数"""
+        return timestamps.time_to_frame(seconds, self.frame_rate, self.timestamps)
 
     def release(self):
         """释放视频资源"""
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        with self._lock:
+            if self.cap:
+                self.cap.release()
+                self.cap = None
+            self.frame_cache.clear()
+            self._pos = 0
+            self.keyframes = None
+            self.timestamps = None
+            self.filepath = None
+            self._open_gen += 1
@@ -101,7 +101,9 @@ class EventDialog(tk.Toplevel):
             self.entry_path.insert(0, path)
 
     def _save(self):
-        evt = {
+        # 以原事件为底更新，保留对话框不编辑的字段（confirmed、provenance 及未知字段）
+        evt = dict(self.prefill)
+        evt.update({
             "game_type":       self.cb_game.get(),
             "event_type":      self.cb_event.get() if self.cb_event.get()!="Others" else self.entry_other.get(),
             "highlight_frame": int(self.entry_frame.get()),
@@ -112,6 +114,6 @@ class EventDialog(tk.Toplevel):
             "comment":         self.entry_comment.get(),
             "highlight_time":   None,
             "duration_seconds": None,
-        }
+        })
         self.on_save(evt)
         self.destroy()
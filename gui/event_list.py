@@ -0,0 +1,254 @@
+# event_recorder/gui/event_list.py
+
+import bisect
+import tkinter as tk
+from tkinter import ttk
+
+from event_recorder.core.event_store import is_candidate
+
+CANDIDATE_FG = "#d08000"  # 未确认候选事件的行颜色
+
+EVENT_COLUMNS = [
+    "game_type", "event_type", "highlight_frame", "highlight_time",
+    "duration_frames", "duration_seconds", "event_text",
+    "save_path", "language", "comment"
+]
+
+
+def event_row_values(e: dict):
+    """事件在列表中的显示值"""
+    return (
+        e.get("game_type",""),
+        e.get("event_type",""),
+        e.get("highlight_frame",""),
+        f"{e.get('highlight_time',0) or 0:.2f}",
+        e.get("duration_frames",""),
+        f"{e.get('duration_seconds',0) or 0:.2f}",
+        e.get("event_text",""),
+        e.get("save_path",""),
+        e.get("language",""),
+        e.get("comment","")
+    )
+
+
+def _column_key(evt: dict, column: str):
+    v = evt.get(column, "")
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return (0, v, "")
+    return (1, 0, str(v))
+
+
+class EventListView(tk.Frame):
+    """
+    虚拟化、增量更新的事件列表：
+    - 只在 Treeview 中保留可见窗口内的 height 行，滚动时换入换出
+    - 订阅 EventManager 的差异通知，只处理变化的事件，不整表重建
+    - 点击表头按列排序（排序键列表 + 二分插入维护顺序，不重建 Tk 行）
+    - set_filter 只显示满足条件的事件（候选集合由 EventManager 的倒排索引给出）
+    - 行 iid 为稳定的事件ID，右键菜单等按事件ID操作
+    """
+
+    def __init__(self, master, manager, height: int = 8, **kw):
+        super().__init__(master, **kw)
+        self.manager = manager
+        self.height = height
+        self.sort_column = None  # None 表示按添加顺序（事件ID）
+        self.sort_reverse = False
+        self.criteria = None  # 筛选条件（EventManager.search 的关键字参数），None 表示显示全部
+        self._order = []  # 显示顺序的事件ID
+        self._keys = []  # 与 _order 平行的排序键，保证严格递增
+        self._key_of = {}  # 事件ID -> 排序键
+        self._offset = 0  # 第一个可见行在 _order 中的位置
+        self._shown = {}  # 当前 Tk 行：事件ID -> (显示值, 行标签)
+        self._render_pending = False
+
+        self.tree = ttk.Treeview(self, columns=EVENT_COLUMNS, show='headings', height=height)
+        for c in EVENT_COLUMNS:
+            self.tree.heading(c, text=c, command=lambda col=c: self.sort_by(col))
+            self.tree.column(c, anchor=tk.CENTER, width=100)
+        self.tree.tag_configure('candidate', foreground=CANDIDATE_FG)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.tree.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.scrollbar.pack(side=tk.LEFT, fill=tk.Y)
+        for seq in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(seq, self._on_wheel)
+
+        manager.subscribe(self.on_events_changed)
+        self.reset()
+
+    def set_manager(self, manager):
+        """改为显示另一个 EventManager 的事件（切换视频时）"""
+        self.manager.unsubscribe(self.on_events_changed)
+        self.manager = manager
+        manager.subscribe(self.on_events_changed)
+        self._offset = 0
+        self.reset()
+
+    def set_filter(self, criteria=None):
+        """
+        只显示满足条件的事件，如 {"event_type": "Revive", "language": "zh_CN", "comment": "残血"}；
+        空值条件忽略，None 或全部为空时显示全部事件
+        """
+        criteria = {k: v for k, v in (criteria or {}).items() if v}
+        self.criteria = criteria or None
+        self._offset = 0
+        self.reset()
+
+    # ---------- 数据变化 ----------
+    def on_events_changed(self, op: str, eid):
+        """EventManager 差异通知"""
+        if op == "reset":
+            self.reset()
+            return
+        if op in ("update", "delete"):
+            self._detach(eid)
+        if op in ("add", "update") and (self.criteria is None or self.manager.matches(eid, **self.criteria)):
+            self._attach(eid)
+        self._schedule_render()
+
+    def reset(self):
+        """按当前排序方式重建顺序（加载新事件文件、切换排序列时）"""
+        if self.criteria is None:
+            ids = self.manager.event_ids()
+        else:
+            ids = list(self.manager.search(**self.criteria))
+        self._key_of = {eid: self._sort_key(eid) for eid in ids}
+        self._order = sorted(ids, key=self._key_of.__getitem__)
+        self._keys = [self._key_of[eid] for eid in self._order]
+        self._offset = min(self._offset, max(0, len(self._order) - self.height))
+        self._shown_invalidate()
+        self._schedule_render()
+
+    def _sort_key(self, eid: int):
+        if self.sort_column is None:
+            key = (eid,)
+        else:
+            key = (_column_key(self.manager.get_record(eid), self.sort_column), eid)
+        if self.sort_reverse:
+            return _Reversed(key)
+        return key
+
+    def _attach(self, eid: int):
+        key = self._sort_key(eid)
+        i = bisect.bisect_left(self._keys, key)
+        self._keys.insert(i, key)
+        self._order.insert(i, eid)
+        self._key_of[eid] = key
+        if i < self._offset:
+            self._offset += 1
+        if eid in self._shown:
+            self._shown[eid] = None  # 已显示的行需刷新显示值
+
+    def _detach(self, eid: int):
+        key = self._key_of.pop(eid, None)
+        if key is None:
+            return
+        i = bisect.bisect_left(self._keys, key)
+        del self._keys[i]
+        del self._order[i]
+        if i < self._offset:
+            self._offset -= 1
+
+    # ---------- 排序 ----------
+    def sort_by(self, column: str):
+        """点击表头：同一列再次点击切换升降序"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column, self.sort_reverse = column, False
+        self.reset()
+
+    # ---------- 滚动 ----------
+    def yview(self, *args):
+        """Scrollbar 回调：moveto 比例 / scroll n units|pages"""
+        total = len(self._order)
+        if args and args[0] == 'moveto':
+            offset = int(float(args[1]) * total)
+        elif args and args[0] == 'scroll':
+            step = int(args[1]) * (self.height if args[2] == 'pages' else 1)
+            offset = self._offset + step
+        else:
+            return
+        self.scroll_to(offset)
+
+    def scroll_to(self, offset: int):
+        offset = max(0, min(int(offset), max(0, len(self._order) - self.height)))
+        if offset != self._offset:
+            self._offset = offset
+            self._schedule_render()
+
+    def see(self, eid: int):
+        """滚动使事件 eid 可见"""
+        key = self._key_of.get(eid)
+        if key is None:
+            return
+        i = bisect.bisect_left(self._keys, key)
+        if not (self._offset <= i < self._offset + self.height):
+            self.scroll_to(i - self.height // 2)
+
+    def _on_wheel(self, event):
+        if getattr(event, 'num', None) == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll_to(self._offset - 3)
+        else:
+            self.scroll_to(self._offset + 3)
+        return "break"
+
+    # ---------- 渲染 ----------
+    def _schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _shown_invalidate(self):
+        self._shown = {eid: None for eid in self._shown}
+
+    def _render(self):
+        """只同步可见窗口内的行：删除移出的、插入移入的、更新值变化的"""
+        self._render_pending = False
+        visible = self._order[self._offset:self._offset + self.height]
+        wanted = set(visible)
+        for eid in list(self._shown):
+            if eid not in wanted:
+                self.tree.delete(str(eid))
+                del self._shown[eid]
+        for pos, eid in enumerate(visible):
+            evt = self.manager.get_record(eid)
+            values = event_row_values(evt)
+            tags = ('candidate',) if is_candidate(evt) else ()
+            iid = str(eid)
+            if eid not in self._shown:
+                self.tree.insert('', pos, iid=iid, values=values, tags=tags)
+            else:
+                if self._shown[eid] != (values, tags):
+                    self.tree.item(iid, values=values, tags=tags)
+                if self.tree.index(iid) != pos:
+                    self.tree.move(iid, '', pos)
+            self._shown[eid] = (values, tags)
+        total = len(self._order)
+        if total:
+            self.scrollbar.set(self._offset / total, min(1.0, (self._offset + self.height) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    # ---------- 查询 ----------
+    def event_id_at(self, y: int):
+        """屏幕 y 坐标处行的事件ID，没有则返回 None"""
+        row = self.tree.identify_row(y)
+        return int(row) if row else None
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+class _Reversed:
+    """降序排序键包装：比较结果取反，使二分查找仍可用于降序列表"""
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
@@ -1,17 +1,35 @@
-import math
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from PIL import Image, ImageTk
-import cv2
 import json
 import os
+import threading
+import time
 
-from skimage.color.rgb_colors import cyan
+# cv2 / numpy / PIL 导入耗时，首次使用（打开视频、渲染）时才真正导入，主窗口先出现
+from event_recorder.core.lazy_import import lazy_import
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+Image = lazy_import("PIL.Image")
+ImageTk = lazy_import("PIL.ImageTk")
 
 from event_recorder.core.video_core import VideoCore
 from event_recorder.core.event_logic import EventManager
-from event_recorder.config import DEFAULT_SAVE_DIR
+from event_recorder.core.prefetch import FramePrefetcher
+from event_recorder.core.playback_clock import PlaybackClock
+from event_recorder.core.filmstrip import build_filmstrip
+from event_recorder.core.scene_analysis import build_scene_analysis
+from event_recorder.core.session import VideoSession
+from event_recorder.core.perf import perf
+from event_recorder.core.hud_detect import detect_candidates
+from event_recorder.core.event_store import is_candidate
+from event_recorder.config import (
+    DEFAULT_SAVE_DIR, FILMSTRIP_ROW_HEIGHT, EVENT_STRIP_HEIGHT, ACTIVITY_STRIP_HEIGHT, EVENT_FILTER_DELAY_MS
+)
 from event_recorder.gui.event_dialog import EventDialog
+from event_recorder.gui.seek_scheduler import SeekScheduler
+from event_recorder.gui.renderer import FrameRenderer, hex_to_rgb
+from event_recorder.gui.event_list import EventListView
+from event_recorder.gui.perf_hud import PerfHud
 
 # 主题色
 DARK_BG       = "#2e2e2e"
@@ -20,6 +38,9 @@ VIDEO_BG      = "#a6acb2"  # 视频区背景
 BTN_NORMAL_BG = "#485d70"  # 其他按钮
 BTN_HIGHLIGHT_BG = "#b0beca"  # 添加/开始/结束按钮
 BTN_FG        = "#b6cadc"
+EVENT_STRIP_COLOR = (0, 224, 255)  # 事件分布条颜色（RGB）
+ACTIVITY_LOW_COLOR  = (40, 60, 140)   # 活跃度热度条：低活跃（RGB）
+ACTIVITY_HIGH_COLOR = (255, 96, 32)   # 活跃度热度条：高活跃（RGB）
 
 class MainWindow(tk.Tk):
     def __init__(self):
@@ -32,21 +53,48 @@ class MainWindow(tk.Tk):
         self.bind('<Left>',  lambda e: self.step_frame(-1))
         self.bind('<Right>', lambda e: self.step_frame(1))
         self.bind('<Up>', lambda e: self.toggle_play())
+        # PageUp / PageDown 跳到上一个 / 下一个事件的起点
+        self.bind('<Prior>', lambda e: self.jump_to_event(-1))
+        self.bind('<Next>',  lambda e: self.jump_to_event(1))
+        # Shift+左右箭头跳到上一个 / 下一个镜头切换
+        self.bind('<Shift-Left>',  lambda e: self.jump_to_cut(-1))
+        self.bind('<Shift-Right>', lambda e: self.jump_to_cut(1))
+        # F3 性能 HUD，F4 导出 trace，F5 清空耗时记录
+        self.bind('<F3>', lambda e: self.perf_hud.toggle())
+        self.bind('<F4>', lambda e: self.export_trace())
+        self.bind('<F5>', lambda e: perf.reset())
+        # Ctrl+Tab 切换到会话中的下一个视频
+        self.bind('<Control-Tab>', lambda e: self.cycle_video(1))
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # 核心状态
-        self.video_core = VideoCore()  # VideoCore 实例，负责视频的加载、读取和基本操作
-        self.event_manager = EventManager()  # EventManager 实例，负责事件的管理、添加、删除、保存等逻辑
+        self.event_manager = EventManager()  # 当前视频的 EventManager；未加载视频时为默认目录下的事件
+        self.default_event_manager = self.event_manager
+        self.after_idle(self._warn_load_error, self.event_manager)
+        # 多视频会话：各视频的解码句柄（LRU）、位置与事件列表；新视频的事件从默认事件中迁移
+        self.session = VideoSession(default_events=self.default_event_manager)
+        self.video_core = VideoCore()  # 当前视频的 VideoCore，切换视频时换成会话中的句柄
+        self.prefetcher = FramePrefetcher(self.video_core)  # 后台预解码线程，播放/逐帧时直接取用已解码帧
+        self.seeker = SeekScheduler(self, self.video_core, self._on_seek_frame)  # 异步跳转调度，只解码最新目标
+        self.renderer = FrameRenderer(VIDEO_BG)  # 渲染阶段：先缩放再叠加 overlay，复用缓冲区
+        self.photo = None  # 视频面板上复用的 PhotoImage
         self.current_frame_idx = 0  # 当前展示的帧索引（整数，从 0 开始）
         self.playing = False  # 播放状态标志，True 表示正在播放，False 表示已暂停
         self.after_id = None  # tkinter after 调度返回的 ID，用于取消定时任务
         self.playback_speed = 1  # 播放倍速，1x/2x/4x/8x
+        self.clock = PlaybackClock(1)  # 播放媒体时钟，按墙钟时间决定应显示的帧
         self.event_texts = []
         self.total_frames = 0  # 视频的总帧数，在加载视频后由 VideoCore 赋值
         self.start_frame = 0  # 记录事件的起始帧
         self.frame_rate = 1  # 视频的帧率（FPS），在加载视频后由 VideoCore 赋值
         self.updating_scale = False  # 进度条更新标志，True 时跳过 seek 回调，避免递归调用
         self.game_types = []  # 从配置文件加载的游戏类型列表
+        self.filmstrip = None  # 当前视频的缩略图胶片条，后台生成完成前为 None
+        self.scenes = None  # 当前视频的镜头切换与活跃度分析，后台完成前为 None
         self.event_types = []  # 从配置文件加载的事件类型列表
+        self.overlays = []  # 从配置文件加载的 HUD 区域
+        self._detect_result = None  # 后台 HUD 检测交回的 (视频路径, 候选事件列表或异常)
+        self._detect_progress = (0, 0)
 
         # 主布局
         main_frame = tk.Frame(self, bg=DARK_BG)
@@ -71,6 +119,10 @@ class MainWindow(tk.Tk):
         tk.Button(left_bar, text="加载事件",   command=self.load_events, **normal_btn_opts).pack(pady=5)
         tk.Button(left_bar, text="加载配置",   command=self.load_config, **normal_btn_opts).pack(pady=5)
         tk.Button(left_bar, text="保存事件",   command=self.save_events, **normal_btn_opts).pack(pady=5)
+        self.btn_detect = tk.Button(left_bar, text="检测候选", command=self.detect_hud_events, **normal_btn_opts)
+        self.btn_detect.pack(pady=5)
+        tk.Button(left_bar, text="重算时间",   command=self.retime_events, **normal_btn_opts).pack(pady=5)
+        tk.Button(left_bar, text="合并重叠",   command=self.merge_events, **normal_btn_opts).pack(pady=5)
         tk.Frame(left_bar, bg=DARK_BG, height=20).pack()
 
         tk.Button(left_bar, text="+ 添加事件", command=self.add_event,   **highlight_btn_opts).pack(pady=5)
@@ -89,6 +141,22 @@ class MainWindow(tk.Tk):
         video_container.pack_propagate(False)
         self.video_panel = tk.Label(video_container, bg=VIDEO_BG)
         self.video_panel.pack(fill=tk.BOTH, expand=True)
+        self.perf_hud = PerfHud(video_container)
+
+        # 缩略图胶片条（进度条上方）
+        self.filmstrip_row = tk.Canvas(right_frame, height=FILMSTRIP_ROW_HEIGHT, bg=DARK_BG, highlightthickness=0)
+        self.filmstrip_row.pack(side=tk.TOP, fill=tk.X, padx=5)
+        self.filmstrip_row.bind('<Configure>', lambda e: self._draw_filmstrip_row())
+
+        # 活跃度热度条（镜头/画面运动分析结果）
+        self.activity_strip = tk.Canvas(right_frame, height=ACTIVITY_STRIP_HEIGHT, bg=DARK_BG, highlightthickness=0)
+        self.activity_strip.pack(side=tk.TOP, fill=tk.X, padx=5, pady=(2, 0))
+        self.activity_strip.bind('<Configure>', lambda e: self._draw_activity_strip())
+
+        # 事件分布条（按帧区间索引的密度直方图绘制）
+        self.event_strip = tk.Canvas(right_frame, height=EVENT_STRIP_HEIGHT, bg=DARK_BG, highlightthickness=0)
+        self.event_strip.pack(side=tk.TOP, fill=tk.X, padx=5, pady=(2, 0))
+        self.event_strip.bind('<Configure>', lambda e: self._draw_event_strip())
 
         # 播放控制 + 进度
         ctrl = tk.Frame(right_frame, bg=DARK_BG)
@@ -134,99 +202,299 @@ class MainWindow(tk.Tk):
         status.pack(side=tk.TOP, fill=tk.X, padx=5, pady=(0,5))
         self.lbl_video_name  = tk.Label(status, text="名称: N/A", bg=DARK_BG, fg=DARK_FG)
         self.lbl_video_name.pack(side=tk.LEFT, padx=10)
+        self.video_selector = ttk.Combobox(status, state="readonly", width=24)
+        self.video_selector.pack(side=tk.LEFT, padx=5)
+        self.video_selector.bind("<<ComboboxSelected>>", lambda e: self.select_video(self.video_selector.current()))
         self.lbl_resolution  = tk.Label(status, text="分辨率: N/A", bg=DARK_BG, fg=DARK_FG)
         self.lbl_resolution.pack(side=tk.LEFT, padx=10)
         self.lbl_frame_info  = tk.Label(status, text="帧: 0/0", bg=DARK_BG, fg=DARK_FG)
         self.lbl_frame_info.pack(side=tk.LEFT, padx=10)
         self.lbl_time_info   = tk.Label(status, text="时间: 0.00/0.00", bg=DARK_BG, fg=DARK_FG)
         self.lbl_time_info.pack(side=tk.LEFT, padx=10)
-
-        # 事件列表（表头 + 内容）
-        cols = [
-            "game_type", "event_type", "highlight_frame", "highlight_time",
-            "duration_frames", "duration_seconds", "event_text",
-            "save_path", "language", "comment"
-        ]
-        self.tree = ttk.Treeview(right_frame, columns=cols, show='headings', height=8)
-        for c in cols:
-            self.tree.heading(c, text=c)
-            self.tree.column(c, anchor=tk.CENTER, width=100)
-        self.tree.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
-        self.tree.bind('<Button-3>', self.show_event_menu)
-
-        self._refresh_event_list()
+        self.lbl_fps_info    = tk.Label(status, text="", bg=DARK_BG, fg=DARK_FG)
+        self.lbl_fps_info.pack(side=tk.LEFT, padx=10)
+
+        # 筛选栏：各条件求交，输入停顿后刷新事件列表
+        filter_bar = tk.Frame(right_frame, bg=DARK_BG)
+        filter_bar.pack(side=tk.TOP, fill=tk.X, padx=5, pady=(5,0))
+        self.filter_vars = {}
+        self._filter_job = None
+        for field in ("game_type", "event_type", "language", "event_text"):
+            tk.Label(filter_bar, text=f"{field}:", bg=DARK_BG, fg=DARK_FG).pack(side=tk.LEFT, padx=(5,2))
+            var = tk.StringVar()
+            box = ttk.Combobox(filter_bar, textvariable=var, width=12)
+            box.configure(postcommand=lambda b=box, f=field: b.configure(values=self._filter_choices(f)))
+            box.bind("<<ComboboxSelected>>", lambda e: self._apply_filter())
+            box.pack(side=tk.LEFT)
+            self.filter_vars[field] = var
+        tk.Label(filter_bar, text="备注包含:", bg=DARK_BG, fg=DARK_FG).pack(side=tk.LEFT, padx=(5,2))
+        self.filter_vars["comment"] = tk.StringVar()
+        tk.Entry(filter_bar, textvariable=self.filter_vars["comment"], width=16).pack(side=tk.LEFT)
+        for var in self.filter_vars.values():
+            var.trace_add("write", lambda *_: self._schedule_filter())
+        tk.Button(filter_bar, text="清除", command=self.clear_filter, **dict(normal_btn_opts, width=6)).pack(side=tk.LEFT, padx=5)
+        self.lbl_filter_count = tk.Label(filter_bar, text="", bg=DARK_BG, fg=DARK_FG)
+        self.lbl_filter_count.pack(side=tk.LEFT, padx=5)
+
+        # 事件列表（表头 + 内容）：虚拟化，按 EventManager 的差异通知增量更新
+        self.event_list = EventListView(right_frame, self.event_manager, height=8, bg=DARK_BG)
+        self.event_list.pack(side=tk.TOP, fill=tk.X, padx=5, pady=5)
+        self.event_list.tree.bind('<Button-3>', self.show_event_menu)
+
+        self._strip_pending = False
+        self.event_manager.subscribe(self._on_events_changed)
 
     def change_speed(self, val):
         try:
             self.playback_speed = int(val.rstrip('x'))
         except:
             self.playback_speed = 1
+        self._resync_playback()
+
+    def _resync_playback(self):
+        """播放中以当前帧重新对齐时钟，并按新的跳帧步长重新预取；暂停时围绕当前帧逐帧预取"""
+        if self.playing:
+            self.clock.start(self.current_frame_idx, self.playback_speed)
+            self.prefetcher.start(self.current_frame_idx + self.clock.stride, self.clock.stride)
+        else:
+            self.prefetcher.hold(self.current_frame_idx)
 
     def load_video(self):
         path = filedialog.askopenfilename(filetypes=[("Video Files", "*.mp4 *.mov *.avi")])
         if not path:
             return
-        info = self.video_core.open(path)
+        self.switch_video(path)
+
+    def select_video(self, index):
+        """视频选择框：切换到会话中的第 index 个视频"""
+        videos = self.session.videos()
+        if 0 <= index < len(videos):
+            self.switch_video(videos[index].filepath)
+
+    def cycle_video(self, step):
+        videos = self.session.videos()
+        if len(videos) < 2 or self.session.current is None:
+            return
+        self.select_video((videos.index(self.session.current) + step) % len(videos))
+
+    def switch_video(self, path):
+        """
+        切换到视频 path（不在会话中则打开并加入）：
+        保存当前视频的位置，换用目标视频的解码句柄与事件列表，回到它上次的位置。
+        """
+        if self.playing:
+            self.toggle_play()
+        self.prefetcher.flush()
+        self.seeker.cancel()
+        previous = self.session.current
+        if previous is not None:
+            previous.position = self.current_frame_idx
+        try:
+            state = self.session.activate(path)
+        except Exception as e:
+            return messagebox.showerror("错误", str(e))
+
+        self.video_core = state.core
+        self.prefetcher.video_core = state.core
+        self.seeker.video_core = state.core
+        self._set_event_manager(state.events)
         # 记录无扩展名的视频名，作为 save_path 子文件夹
-        self.current_video_name = os.path.splitext(os.path.basename(path))[0]
+        self.current_video_name = state.name
         self.lbl_video_name.config(text=f"名称: {self.current_video_name}")
+        self.video_selector.config(values=[v.name for v in self.session.videos()])
+        self.video_selector.current(self.session.videos().index(state))
 
+        info = state.info
         w, h = info['width'], info['height']
         self.lbl_resolution.config(text=f"分辨率: {w}x{h}")
 
         self.total_frames      = info['total_frames']
         self.frame_rate        = info['fps']
+        self.clock             = PlaybackClock(self.frame_rate, self.playback_speed)
         self.scale.config(to=self.total_frames - 1)
-        self.current_frame_idx = 0
-        self.show_frame(0)
+        self.current_frame_idx = state.position
+        self.show_frame(state.position)
+        self._draw_event_strip()
+        self._start_filmstrip(state)
+        self._start_scene_analysis(state)
+
+    def _set_event_manager(self, manager):
+        """换用另一个视频的 EventManager（事件列表与分布条随之切换）"""
+        if manager is self.event_manager:
+            return
+        self.event_manager.unsubscribe(self._on_events_changed)
+        self.event_manager = manager
+        manager.subscribe(self._on_events_changed)
+        self.event_list.set_manager(manager)
+        self._update_filter_count()
+        self._warn_load_error(manager)
+
+    def _warn_load_error(self, manager):
+        """事件文件无法读取时提示一次（损坏的文件已被移到一旁）"""
+        error, manager.load_error = manager.load_error, None
+        if error:
+            messagebox.showwarning("警告", error)
+
+    def _draw_event_strip(self):
+        """按事件覆盖密度绘制进度条上方的事件分布条"""
+        self.event_strip.delete("all")
+        w = self.event_strip.winfo_width()
+        if w <= 1 or self.total_frames <= 0:
+            return
+        dens = self.event_manager.intervals.density(self.total_frames, w)
+        if not dens.any():
+            return
+        level = (dens / dens.max())[:, None]
+        bg = np.array(hex_to_rgb(DARK_BG), dtype=np.float32)
+        fg = np.array(EVENT_STRIP_COLOR, dtype=np.float32)
+        row = np.where(dens[:, None] > 0, bg + (fg - bg) * (0.35 + 0.65 * level), bg).astype(np.uint8)
+        img = np.ascontiguousarray(np.broadcast_to(row, (EVENT_STRIP_HEIGHT, w, 3)))
+        self.event_strip_photo = ImageTk.PhotoImage(Image.fromarray(img))
+        self.event_strip.create_image(0, 0, anchor=tk.NW, image=self.event_strip_photo)
+
+    def jump_to_event(self, direction):
+        """跳到当前帧之前 / 之后最近一个事件的起点"""
+        intervals = self.event_manager.intervals
+        if direction > 0:
+            hit = intervals.next_after(self.current_frame_idx)
+        else:
+            hit = intervals.prev_before(self.current_frame_idx)
+        if hit is not None:
+            self._request_jump(hit[0])
+
+    def jump_to_cut(self, direction):
+        """跳到当前帧之前 / 之后最近的镜头切换（分析完成前不响应）"""
+        if self.scenes is None:
+            return
+        if direction > 0:
+            hit = self.scenes.next_cut(self.current_frame_idx)
+        else:
+            hit = self.scenes.prev_cut(self.current_frame_idx)
+        if hit is not None:
+            self._request_jump(hit)
 
-    def show_frame(self, idx):
+    def _start_scene_analysis(self, state):
         """
-        每次渲染一帧时：
-         1. 从 VideoCore 取出 frame
-         2. 在 frame 上画所有 self.overlays 定义的框 & 文本
-         3. 转成 PhotoImage 显示
+        在后台线程中读取或生成镜头切换与活跃度分析（内部使用进程池），不阻塞播放；
+        结果保存在视频状态上，切回该视频时直接复用
         """
-        ret, frame = self.video_core.get_frame(idx)
-        if not ret:
+        self.scenes = state.scenes
+        self._draw_activity_strip()
+        if state.scenes is None and "scenes" not in state.pending:
+            path, info = state.filepath, state.info
+            state.pending.add("scenes")
+
+            def job():
+                try:
+                    state.scenes = build_scene_analysis(path, info['total_frames'], info['fps'], info['width'], info['height'])
+                except Exception:
+                    state.scenes = None
+                finally:
+                    state.pending.discard("scenes")
+
+            threading.Thread(target=job, name="SceneAnalysis", daemon=True).start()
+        if "scenes" in state.pending:
+            self.after(200, self._check_scene_analysis, state)
+
+    def _check_scene_analysis(self, state):
+        if self.session.current is not state:
+            return  # 已切换视频，结果留在视频状态上
+        if "scenes" in state.pending:
+            self.after(200, self._check_scene_analysis, state)
+            return
+        self.scenes = state.scenes
+        self._draw_activity_strip()
+
+    def _draw_activity_strip(self):
+        """按活跃度曲线绘制进度条上方的热度条，镜头切换处画竖线"""
+        self.activity_strip.delete("all")
+        w = self.activity_strip.winfo_width()
+        if self.scenes is None or w <= 1 or self.total_frames <= 0:
+            return
+        level = self.scenes.activity_bins(self.total_frames, w)[:, None]
+        lo = np.array(ACTIVITY_LOW_COLOR, dtype=np.float32)
+        hi = np.array(ACTIVITY_HIGH_COLOR, dtype=np.float32)
+        row = (lo + (hi - lo) * level).astype(np.uint8)
+        cuts = np.asarray(self.scenes.cuts, dtype=np.int64)
+        if len(cuts):
+            row[np.clip(cuts * w // self.total_frames, 0, w - 1)] = 255
+        img = np.ascontiguousarray(np.broadcast_to(row, (ACTIVITY_STRIP_HEIGHT, w, 3)))
+        self.activity_strip_photo = ImageTk.PhotoImage(Image.fromarray(img))
+        self.activity_strip.create_image(0, 0, anchor=tk.NW, image=self.activity_strip_photo)
+
+    def _start_filmstrip(self, state):
+        """在后台线程中读取或生成缩略图胶片条（内部使用进程池），完成后由主线程接管"""
+        self.filmstrip = state.filmstrip
+        self._draw_filmstrip_row()
+        if state.filmstrip is None and "filmstrip" not in state.pending:
+            path, info = state.filepath, state.info
+            state.pending.add("filmstrip")
+
+            def job():
+                try:
+                    state.filmstrip = build_filmstrip(path, info['total_frames'], info['fps'], info['width'], info['height'])
+                except Exception:
+                    state.filmstrip = None
+                finally:
+                    state.pending.discard("filmstrip")
+
+            threading.Thread(target=job, name="Filmstrip", daemon=True).start()
+        if "filmstrip" in state.pending:
+            self.after(200, self._check_filmstrip, state)
+
+    def _check_filmstrip(self, state):
+        if self.session.current is not state:
+            return  # 已切换视频，结果留在视频状态上
+        if "filmstrip" in state.pending:
+            self.after(200, self._check_filmstrip, state)
+            return
+        self.filmstrip = state.filmstrip
+        self._draw_filmstrip_row()
+
+    def _draw_filmstrip_row(self):
+        """把胶片条均匀铺满进度条上方一行"""
+        self.filmstrip_row.delete("all")
+        if self.filmstrip is None or not len(self.filmstrip):
+            return
+        rw = self.filmstrip_row.winfo_width()
+        rh = FILMSTRIP_ROW_HEIGHT
+        _, th, tw, _ = self.filmstrip.thumbs.shape
+        dw = max(1, int(round(rh * tw / th)))
+        thumbs = self.filmstrip.sample(rw // dw + 1)
+        if not len(thumbs):
             return
+        row = cv2.hconcat([cv2.resize(t, (dw, rh), interpolation=cv2.INTER_AREA) for t in thumbs])
+        row = cv2.cvtColor(row[:, :rw], cv2.COLOR_BGR2RGB)
+        self.filmstrip_photo = ImageTk.PhotoImage(Image.fromarray(row))
+        self.filmstrip_row.create_image(0, 0, anchor=tk.NW, image=self.filmstrip_photo)
 
-        # 在 frame 上绘制所有 overlay
-        if hasattr(self, 'overlays'):
-            for o in self.overlays:
-                x1, y1 = int(o['x1']), int(o['y1'])
-                x2, y2 = int(o['x2']), int(o['y2'])
-                # 画矩形框
-                cv2.rectangle(
-                    frame,
-                    (x1, y1),
-                    (x2, y2),
-                    color=(0, 255, 224),
-                    thickness=2
-                )
-                # 在框顶部绘制文字
-                cv2.putText(
-                    frame,
-                    o['text'],
-                    (x1, max( y1-10, 0)),             # 文字位置：框左上角上方 10 像素
-                    fontFace=cv2.FONT_HERSHEY_SIMPLEX,
-                    fontScale=0.8,
-                    color=(0, 255, 224),
-                    thickness=2,
-                    lineType=cv2.LINE_AA
-                )
-
-        # 转为 RGB + PIL Image，再等比缩放 & 居中
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(frame)
-        pw, ph = self.video_panel.winfo_width(), self.video_panel.winfo_height()
-        img.thumbnail((pw, ph), Image.LANCZOS)
-        bg = Image.new("RGB", (pw, ph), VIDEO_BG)
-        bg.paste(img, ((pw - img.width)//2, (ph - img.height)//2))
-
-        # 更新显示
-        self.photo = ImageTk.PhotoImage(bg)
-        self.video_panel.config(image=self.photo)
+    def show_frame(self, idx, frame=None, fast=False):
+        """
+        每次渲染一帧时：
+         1. 从 VideoCore 取出 frame（调用方已从预取缓冲区取得时直接传入）
+         2. FrameRenderer 先缩放到面板尺寸，再叠加预栅格化的 overlay 图层并转 RGB
+         3. 把复用的面板缓冲区粘贴进同一个 PhotoImage（fast=True 时用廉价插值）
+        """
+        if frame is None:
+            with perf.span("frame.decode"):
+                ret, frame = self.video_core.get_frame(idx)
+            if not ret:
+                return
+
+        # 缩略图预览时 frame 小于原始分辨率，按原始分辨率计算显示尺寸与 overlay 坐标
+        src_size = (self.video_core.width or frame.shape[1], self.video_core.height or frame.shape[0])
+        pw, ph = max(1, self.video_panel.winfo_width()), max(1, self.video_panel.winfo_height())
+        buf = self.renderer.render(frame, src_size, (pw, ph), fast=fast or self.playing)
+
+        # 更新显示：尺寸不变时复用 PhotoImage，只粘贴像素
+        with perf.span("frame.pil"):
+            img = Image.frombuffer("RGB", (pw, ph), buf, "raw", "RGB", 0, 1)
+        with perf.span("frame.tk"):
+            if self.photo is None or (self.photo.width(), self.photo.height()) != (pw, ph):
+                self.photo = ImageTk.PhotoImage(img)
+                self.video_panel.config(image=self.photo)
+            else:
+                self.photo.paste(img)
 
         # —— 后续进度条 & 状态更新保持不变 ——
         self.current_frame_idx = idx
@@ -243,34 +511,76 @@ class MainWindow(tk.Tk):
         if self.playing:
             self.playing = False
             self.btn_play.config(text="播放(↑)")
+            self.lbl_fps_info.config(text="")
             if self.after_id:
                 self.after_cancel(self.after_id)
+            self._resync_playback()
         else:
             self.playing = True
             self.btn_play.config(text="暂停(↑)")
+            self._resync_playback()
             self.play_loop()
 
     def play_loop(self):
+        """
+        时钟驱动的播放：
+         - 每次按墙钟时间算出应显示的帧，取预取缓冲区中不晚于它的最新一帧显示
+         - 来不及显示的帧由预取线程直接跳过（倍速时只 grab 不 retrieve）
+         - 下一次调度对准下一帧的显示时刻，而不是固定延时
+        """
         if not self.playing:
             return
-        next_idx = self.current_frame_idx + 1
-        if next_idx >= self.total_frames:
+        now = time.perf_counter()
+        due = self.clock.due_frame(now)
+        if due >= self.total_frames:
+            last = self.total_frames - 1
+            self.show_frame(last, self.prefetcher.pop(last))
             self.playing = False
-            self.btn_play.config(text="播放")
+            self.btn_play.config(text="播放(↑)")
+            self.lbl_fps_info.config(text="")
+            self._resync_playback()
             return
-        self.show_frame(next_idx)
-        delay = int(480 / self.frame_rate / self.playback_speed)
+
+        idx, frame = self.prefetcher.pop_due(due)
+        if frame is not None:
+            self.show_frame(idx, frame)
+            self.clock.record_display(now)
+            self.lbl_fps_info.config(
+                text=f"播放: {self.clock.achieved_fps:.1f}/{self.clock.target_fps:.1f} fps"
+            )
+
+        next_at = self.clock.time_of(due + self.clock.stride)
+        delay = max(1, int((next_at - time.perf_counter()) * 1000))
         self.after_id = self.after(delay, self.play_loop)
 
     def step_frame(self, step):
         idx = max(0, min(self.total_frames - 1, self.current_frame_idx + step))
-        self.show_frame(idx)
+        self.show_frame(idx, self.prefetcher.pop(idx))
+        if not self.playing:
+            self.prefetcher.hold(self.current_frame_idx)
 
     def seek(self, value):
         if self.updating_scale:
             return
         idx = int(float(value))
-        self.show_frame(idx)
+        self.prefetcher.flush()
+        if self.filmstrip is not None:
+            # 胶片条即时预览，停止拖动后再解码精确帧
+            self.show_frame(idx, self.filmstrip.get(idx), fast=True)
+            self.seeker.defer(idx)
+        else:
+            self.seeker.request(idx, preview=True)
+
+    def _request_jump(self, idx):
+        """帧/秒跳转：直接请求精确帧"""
+        self.prefetcher.flush()
+        self.seeker.request(max(0, min(self.total_frames - 1, idx)), preview=False)
+
+    def _on_seek_frame(self, idx, frame, preview):
+        """SeekScheduler 交回解码结果（主线程）"""
+        self.show_frame(idx, frame, fast=preview)
+        if not preview:
+            self._resync_playback()
 
     def jump_to_frame(self):
         try:
@@ -278,7 +588,7 @@ class MainWindow(tk.Tk):
         except ValueError:
             messagebox.showerror("错误", "帧数无效")
             return
-        self.show_frame(max(0, min(self.total_frames - 1, idx)))
+        self._request_jump(idx)
 
     def jump_to_second(self):
         try:
@@ -287,7 +597,7 @@ class MainWindow(tk.Tk):
             messagebox.showerror("错误", "秒数无效")
             return
         idx = int(self.video_core.time_to_frame(sec))
-        self.show_frame(max(0, min(self.total_frames - 1, idx)))
+        self._request_jump(idx)
 
     def load_events(self):
         path = filedialog.askopenfilename(
@@ -297,12 +607,18 @@ class MainWindow(tk.Tk):
         )
         if not path:
             return
+        def progress(done, total):
+            pct = 100 * done // total if total else 100
+            self.lbl_fps_info.config(text=f"加载事件 {pct}%")
+            self.update_idletasks()
+
         try:
-            self.event_manager.load_events(path)
-            self._refresh_event_list()
+            self.event_manager.load_events(path, on_progress=progress)
             messagebox.showinfo("提示", f"已加载事件：{path}")
         except Exception as e:
             messagebox.showerror("错误", str(e))
+        finally:
+            self.lbl_fps_info.config(text="")
 
     def load_config(self):
         path = filedialog.askopenfilename(
@@ -317,8 +633,83 @@ class MainWindow(tk.Tk):
         self.event_types = cfg.get('event_types', [])
         self.event_texts = cfg.get('event_texts', [])
         self.overlays    = cfg.get('overlays', [])
+        self.renderer.set_overlays(self.overlays)
         messagebox.showinfo("提示", f"已加载配置：{path}")
 
+    def detect_hud_events(self):
+        """在后台分析 overlays 标出的 HUD 区域，把变化显著的区间作为未确认的候选事件加入列表"""
+        if not self.video_core.filepath:
+            return messagebox.showwarning("提示", "请先加载视频")
+        if not self.overlays:
+            return messagebox.showwarning("提示", "配置中没有 overlays 区域")
+        path = self.video_core.filepath
+        info = {'width': self.video_core.width, 'height': self.video_core.height,
+                'fps': self.frame_rate, 'total_frames': self.total_frames}
+        game_type = self.game_types[0] if self.game_types else ""
+        save_path = os.path.join(DEFAULT_SAVE_DIR, self.current_video_name)
+        overlays = list(self.overlays)
+        frame_to_time = self.video_core.frame_to_time  # 绑定被检测视频的解码句柄，检测期间切换视频不受影响
+        self.btn_detect.config(state=tk.DISABLED)
+        self._detect_result = None
+        self._detect_progress = (0, 0)
+
+        def progress(done, total):
+            self._detect_progress = (done, total)
+
+        def job():
+            try:
+                result = detect_candidates(path, overlays, info, game_type, save_path,
+                                           on_progress=progress, frame_to_time=frame_to_time)
+            except Exception as e:
+                result = e
+            self._detect_result = (path, result)
+
+        threading.Thread(target=job, name="HudDetect", daemon=True).start()
+        self.after(200, self._check_detect)
+
+    def _check_detect(self):
+        if self._detect_result is None:
+            done, total = self._detect_progress
+            if total:
+                self.lbl_fps_info.config(text=f"检测候选 {done}/{total}")
+            self.after(200, self._check_detect)
+            return
+        path, result = self._detect_result
+        self.btn_detect.config(state=tk.NORMAL)
+        self.lbl_fps_info.config(text="")
+        if isinstance(result, Exception):
+            return messagebox.showerror("错误", str(result))
+        state = self.session.get(path)
+        if state is None:
+            return  # 检测期间视频已移出会话，结果作废
+        # 候选事件加入被检测视频自己的事件列表（检测期间可能已切换到别的视频）
+        for evt in result:
+            state.events.add_event(evt)
+        messagebox.showinfo("提示", f"找到 {len(result)} 个候选事件，右键确认或拒绝")
+
+    def retime_events(self):
+        """按当前视频的逐帧时间戳重算全部事件的时间字段"""
+        if not self.video_core.filepath:
+            return messagebox.showwarning("提示", "请先加载视频")
+        if self.video_core.timestamps is None:
+            return messagebox.showwarning("提示", "时间戳表尚未建立，请稍后再试")
+        try:
+            count = self.event_manager.retime(self.video_core.frame_to_time)
+            messagebox.showinfo("提示", f"已重算 {count} 个事件的时间")
+        except Exception as e:
+            messagebox.showerror("错误", str(e))
+
+    def merge_events(self):
+        """删除近似重复的事件，并把同类型的重叠事件合并为一条"""
+        if not messagebox.askyesno("确认", "删除重复事件并合并同类型的重叠事件？"):
+            return
+        try:
+            removed = self.event_manager.dedupe()
+            merged = self.event_manager.merge_overlaps(frame_to_time=self.video_core.frame_to_time)
+            messagebox.showinfo("提示", f"删除重复 {removed} 个，合并重叠涉及 {merged} 个事件")
+        except Exception as e:
+            messagebox.showerror("错误", str(e))
+
     def add_event(self):
         if not self.game_types or not self.event_types: return messagebox.showwarning("善意的警告", "别急啊 加载配置了吗")
         pre = {"save_path": os.path.join(DEFAULT_SAVE_DIR, self.current_video_name),
@@ -345,61 +736,107 @@ class MainWindow(tk.Tk):
         self.btn_mark_end.config(state=tk.DISABLED)
 
 
-    def _on_event_saved(self, evt):
+    def _event_times(self, evt):
+        """按逐帧时间戳填写 highlight_time / duration_seconds（新增与修改共用同一换算）"""
         hf, df = evt["highlight_frame"], evt["duration_frames"]
-        evt["highlight_time"]   = math.ceil(self.video_core.frame_to_time(hf))
-        evt["duration_seconds"] = df / self.frame_rate
+        start = self.video_core.frame_to_time(hf)
+        evt["highlight_time"]   = start
+        evt["duration_seconds"] = self.video_core.frame_to_time(hf + df) - start
+
+    def _on_event_saved(self, evt):
+        self._event_times(evt)
         os.makedirs(os.path.dirname(evt["save_path"]) or evt["save_path"], exist_ok=True)
-        self.event_manager.add_event(evt)
-        self._refresh_event_list()
-
-    def _refresh_event_list(self):
-        for iid in self.tree.get_children():
-            self.tree.delete(iid)
-        for idx, e in enumerate(self.event_manager.events):
-            values = (
-                e.get("game_type",""),
-                e.get("event_type",""),
-                e.get("highlight_frame",""),
-                f"{e.get('highlight_time',0):.2f}",
-                e.get("duration_frames",""),
-                f"{e.get('duration_seconds',0):.2f}",
-                e.get("event_text",""),
-                e.get("save_path",""),
-                e.get("language",""),
-                e.get("comment","")
-            )
-            self.tree.insert('', 'end', iid=str(idx), values=values)
+        eid = self.event_manager.add_event(evt)
+        self.event_list.see(eid)
+
+    def _on_events_changed(self, op, eid):
+        self._schedule_event_strip()
+        self._update_filter_count()
+
+    # ---------- 事件筛选 ----------
+    def _filter_choices(self, field):
+        """筛选下拉框的候选：当前事件中该字段出现过的取值，按事件数降序"""
+        return [v for v, _ in self.event_manager.field_values(field) if v]
+
+    def _schedule_filter(self):
+        """输入时延迟刷新，连续键入只筛选一次"""
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(EVENT_FILTER_DELAY_MS, self._apply_filter)
+
+    def _apply_filter(self):
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+            self._filter_job = None
+        criteria = {field: var.get().strip() for field, var in self.filter_vars.items()}
+        with perf.span("events.filter"):
+            self.event_list.set_filter(criteria)
+        self._update_filter_count()
+
+    def clear_filter(self):
+        for var in self.filter_vars.values():
+            var.set("")
+        self._apply_filter()
+
+    def _update_filter_count(self):
+        if self.event_list.criteria is None:
+            self.lbl_filter_count.config(text="")
+        else:
+            self.lbl_filter_count.config(text=f"匹配 {len(self.event_list)} / {len(self.event_manager)}")
+
+    def _schedule_event_strip(self):
+        """事件变化后在空闲时重绘事件分布条（连续改动只重绘一次）"""
+        if not self._strip_pending:
+            self._strip_pending = True
+            self.after_idle(self._redraw_event_strip)
+
+    def _redraw_event_strip(self):
+        self._strip_pending = False
+        self._draw_event_strip()
 
     def show_event_menu(self, event):
-        row = self.tree.identify_row(event.y)
-        if not row:
+        eid = self.event_list.event_id_at(event.y)
+        if eid is None:
             return
-        idx = int(row)
         menu = tk.Menu(self, tearoff=0)
-        menu.add_command(label="修改事件", command=lambda: self._edit_event(idx))
-        menu.add_command(label="删除事件", command=lambda: self._delete_event(idx))
+        if is_candidate(self.event_manager.get_record(eid)):
+            menu.add_command(label="确认候选", command=lambda: self._accept_candidate(eid))
+            menu.add_command(label="拒绝候选", command=lambda: self._delete_event(eid))
+            menu.add_separator()
+        menu.add_command(label="修改事件", command=lambda: self._edit_event(eid))
+        menu.add_command(label="删除事件", command=lambda: self._delete_event(eid))
         menu.post(event.x_root, event.y_root)
 
-    def _delete_event(self, idx):
-        self.event_manager.delete_event(idx)
-        self._refresh_event_list()
+    def _accept_candidate(self, eid):
+        evt = self.event_manager.get_event(eid)
+        evt.pop("confirmed", None)
+        self.event_manager.update_event(self.event_manager.index_of(eid), evt)
 
-    def _edit_event(self, idx):
-        old = self.event_manager.events[idx]
+    def _delete_event(self, eid):
+        self.event_manager.delete_event(self.event_manager.index_of(eid))
+
+    def _edit_event(self, eid):
+        old = self.event_manager.get_event(eid)
         dlg = EventDialog(
-            self, self.game_types, self.event_types,
-            on_save=lambda ne: self._on_event_updated(idx, ne),
+            self, self.game_types, self.event_types, self.event_texts,
+            on_save=lambda ne: self._on_event_updated(eid, ne),
             prefill=old
         )
         self.wait_window(dlg)
 
-    def _on_event_updated(self, idx, ne):
-        hf, df = ne["highlight_frame"], ne["duration_frames"]
-        ne["highlight_time"]   = self.video_core.frame_to_time(hf)
-        ne["duration_seconds"] = math.ceil(df / self.frame_rate)
-        self.event_manager.update_event(idx, ne)
-        self._refresh_event_list()
+    def _on_event_updated(self, eid, ne):
+        self._event_times(ne)
+        self.event_manager.update_event(self.event_manager.index_of(eid), ne)
+
+    def on_close(self):
+        """关闭窗口：停止后台线程，并把未压缩的事件日志落盘"""
+        self.prefetcher.stop()
+        try:
+            self.session.close()
+            self.default_event_manager.close()
+        except Exception as e:
+            messagebox.showerror("错误", str(e))
+        self.destroy()
 
     def save_events(self):
         try:
@@ -408,6 +845,22 @@ class MainWindow(tk.Tk):
         except Exception as e:
             messagebox.showerror("错误", str(e))
 
+    def export_trace(self):
+        """把记录的各阶段耗时导出为 trace 文件（chrome://tracing / Perfetto 可打开）"""
+        path = filedialog.asksaveasfilename(
+            title="导出性能 trace",
+            initialdir=DEFAULT_SAVE_DIR,
+            defaultextension=".json",
+            filetypes=[("Trace JSON", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            count = perf.export_trace(path)
+            messagebox.showinfo("提示", f"已导出 {count} 条记录：{path}")
+        except Exception as e:
+            messagebox.showerror("错误", str(e))
+
 
 if __name__ == '__main__':
     app = MainWindow()
@@ -0,0 +1,64 @@
+# event_recorder/gui/perf_hud.py
+
+import tkinter as tk
+
+from event_recorder.config import PERF_HUD_REFRESH_MS
+from event_recorder.core.perf import perf
+
+HUD_BG = "#000000"
+HUD_FG = "#7CFC00"
+
+
+class PerfHud:
+    """
+    视频面板左上角的性能 HUD：按阶段显示最近若干次耗时的 p50 / p95 / p99（毫秒）。
+    显示时开启 perf 记录，隐藏时恢复原来的记录开关。
+    """
+
+    def __init__(self, container, refresh_ms: int = PERF_HUD_REFRESH_MS):
+        self.container = container
+        self.refresh_ms = refresh_ms
+        self.label = tk.Label(container, bg=HUD_BG, fg=HUD_FG, justify=tk.LEFT, anchor=tk.NW,
+                              font=("Courier", 9))
+        self.visible = False
+        self._was_enabled = perf.enabled
+        self._after_id = None
+
+    def toggle(self):
+        if self.visible:
+            self.hide()
+        else:
+            self.show()
+
+    def show(self):
+        if self.visible:
+            return
+        self.visible = True
+        self._was_enabled = perf.enabled
+        perf.enabled = True
+        self.label.place(x=8, y=8)
+        self.label.lift()
+        self._refresh()
+
+    def hide(self):
+        if not self.visible:
+            return
+        self.visible = False
+        perf.enabled = self._was_enabled
+        if self._after_id:
+            self.container.after_cancel(self._after_id)
+            self._after_id = None
+        self.label.place_forget()
+
+    def _refresh(self):
+        self._after_id = None
+        if not self.visible:
+            return
+        lines = [f"{'阶段':<18}{'p50':>8}{'p95':>8}{'p99':>8}{'n':>6}"]
+        for name, s in perf.stats().items():
+            lines.append(f"{name:<20}{s['p50_ms']:>8.2f}{s['p95_ms']:>8.2f}{s['p99_ms']:>8.2f}{s['n']:>6}")
+        if len(lines) == 1:
+            lines.append("（暂无数据）")
+        lines.append("F3 关闭 · F4 导出 trace · F5 清空")
+        self.label.config(text="\n".join(lines))
+        self._after_id = self.container.after(self.refresh_ms, self._refresh)
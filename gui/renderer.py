@@ -0,0 +1,112 @@
+# event_recorder/gui/renderer.py
+
+from event_recorder.core.lazy_import import lazy_import
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+from event_recorder.core.perf import perf
+
+# overlay 框与文字颜色（BGR）
+OVERLAY_COLOR = (0, 255, 224)
+
+
+def hex_to_rgb(color: str):
+    color = color.lstrip('#')
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+class FrameRenderer:
+    """
+    视频面板渲染阶段，不依赖 Tk，可在无界面环境下使用：
+     1. 先把帧缩放到面板显示尺寸（不放大超过原始分辨率）
+     2. 叠加预先栅格化的 overlay 图层（仅在 overlay 或面板尺寸变化时重建）
+     3. 在缩放后的小图上做 BGR→RGB 转换，写入复用的面板大小信箱缓冲区
+    每帧开销只取决于面板尺寸，与源分辨率无关。
+    """
+
+    def __init__(self, bg_color: str):
+        self.bg_rgb = hex_to_rgb(bg_color)
+        self.overlays = []
+        self._layout_key = None
+        self._canvas = None  # (ph, pw, 3) RGB 信箱缓冲区，边框只在布局变化时填充
+        self._scaled = None  # (dh, dw, 3) BGR 缩放缓冲区
+        self._rgb = None  # (dh, dw, 3) RGB 转换缓冲区
+        self._ov_idx = None  # overlay 像素在缩放缓冲区中的扁平索引
+        self._ov_alpha = None
+        self._ov_colors = None  # 预乘透明度的 overlay 颜色
+        self._rect = (0, 0, 0, 0)  # 图像区域 (ox, oy, dw, dh)
+
+    def set_overlays(self, overlays):
+        """更新 overlay 定义，下一帧重建图层"""
+        self.overlays = list(overlays or [])
+        self._layout_key = None
+
+    def render(self, frame, src_size, panel_size, fast: bool = False):
+        """
+        :param frame: BGR 帧（原始分辨率或缩略图，均按 src_size 的显示尺寸输出）
+        :param src_size: 视频原始分辨率 (w, h)，用于计算显示尺寸与 overlay 坐标
+        :param panel_size: 面板尺寸 (w, h)
+        :param fast: True 时使用双线性插值（播放、拖动预览）
+        :return: 面板大小的 RGB 缓冲区（下次调用时会被覆盖）
+        """
+        self._ensure_layout(src_size, panel_size)
+        ox, oy, dw, dh = self._rect
+        fh, fw = frame.shape[:2]
+        if fw > dw and not fast:
+            interp = cv2.INTER_AREA
+        else:
+            interp = cv2.INTER_LINEAR
+        with perf.span("render.resize"):
+            if (fw, fh) == (dw, dh):
+                np.copyto(self._scaled, frame)
+            else:
+                cv2.resize(frame, (dw, dh), dst=self._scaled, interpolation=interp)
+        if self._ov_idx is not None:
+            with perf.span("render.overlay"):
+                flat = self._scaled.reshape(-1, 3)
+                px = flat[self._ov_idx] * (1.0 - self._ov_alpha) + self._ov_colors
+                flat[self._ov_idx] = px.astype(np.uint8)
+        with perf.span("render.color"):
+            cv2.cvtColor(self._scaled, cv2.COLOR_BGR2RGB, dst=self._rgb)
+            self._canvas[oy:oy + dh, ox:ox + dw] = self._rgb
+        return self._canvas
+
+    def _ensure_layout(self, src_size, panel_size):
+        pw, ph = max(1, int(panel_size[0])), max(1, int(panel_size[1]))
+        sw, sh = max(1, int(src_size[0])), max(1, int(src_size[1]))
+        key = (pw, ph, sw, sh)
+        if key == self._layout_key:
+            return
+        fit = min(pw / sw, ph / sh, 1.0)
+        dw, dh = max(1, int(sw * fit)), max(1, int(sh * fit))
+        ox, oy = (pw - dw) // 2, (ph - dh) // 2
+
+        self._canvas = np.empty((ph, pw, 3), dtype=np.uint8)
+        self._canvas[:] = self.bg_rgb
+        self._scaled = np.empty((dh, dw, 3), dtype=np.uint8)
+        self._rgb = np.empty((dh, dw, 3), dtype=np.uint8)
+        self._rect = (ox, oy, dw, dh)
+        self._rasterize_overlays(fit, dw, dh)
+        self._layout_key = key
+
+    def _rasterize_overlays(self, fit: float, dw: int, dh: int):
+        """按显示尺寸栅格化 overlay 框与文字（抗锯齿蒙版），只保存被覆盖像素的索引与透明度"""
+        if not self.overlays:
+            self._ov_idx = self._ov_alpha = self._ov_colors = None
+            return
+        mask = np.zeros((dh, dw), dtype=np.uint8)
+        thickness = max(1, int(round(2 * fit)))
+        for o in self.overlays:
+            x1, y1 = int(o['x1'] * fit), int(o['y1'] * fit)
+            x2, y2 = int(o['x2'] * fit), int(o['y2'] * fit)
+            cv2.rectangle(mask, (x1, y1), (x2, y2), color=255, thickness=thickness)
+            cv2.putText(
+                mask, o['text'],
+                (x1, max(y1 - int(10 * fit), 0)),  # 文字位置：框左上角上方 10 像素
+                fontFace=cv2.FONT_HERSHEY_SIMPLEX, fontScale=0.8 * fit,
+                color=255, thickness=thickness, lineType=cv2.LINE_AA
+            )
+        idx = np.flatnonzero(mask)
+        self._ov_idx = idx
+        self._ov_alpha = (mask.reshape(-1)[idx].astype(np.float32) / 255.0)[:, None]
+        self._ov_colors = np.asarray(OVERLAY_COLOR, dtype=np.float32) * self._ov_alpha
@@ -0,0 +1,120 @@
+# event_recorder/gui/seek_scheduler.py
+
+import threading
+
+from event_recorder.config import SEEK_SETTLE_MS, SEEK_POLL_MS
+from event_recorder.core.perf import perf
+
+
+class SeekScheduler:
+    """
+    “最新者胜”的异步跳转调度器，位于 MainWindow 的跳转入口与 VideoCore 之间。
+
+    - request(idx, preview=True)：拖动进度条时调用，只解码最新目标的廉价预览；
+      停止拖动 SEEK_SETTLE_MS 毫秒后自动补一次精确的全质量帧
+    - request(idx, preview=False)：直接解码精确帧（帧/秒跳转）
+    - 后台线程解码；被更新请求取代的精确解码会在向前解码途中中止
+    - 结果通过 Tk after 轮询交回主线程，调用 on_frame(idx, frame, preview)
+    """
+
+    def __init__(self, widget, video_core, on_frame,
+                 settle_ms: int = SEEK_SETTLE_MS, poll_ms: int = SEEK_POLL_MS):
+        self.widget = widget
+        self.video_core = video_core
+        self.on_frame = on_frame
+        self.settle_ms = settle_ms
+        self.poll_ms = poll_ms
+
+        self._gen = 0  # 每个新请求自增
+        self._pending = None  # (gen, idx, preview)，只保留最新一个
+        self._result = None  # (gen, idx, frame, preview)，只保留最新一个
+        self._shown_gen = 0
+        self._done_gen = 0  # 后台线程处理完的最新请求
+        self._settle_id = None
+        self._poll_id = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="SeekScheduler", daemon=True)
+        self._thread.start()
+
+    def request(self, idx: int, preview: bool = True):
+        """提交跳转请求，覆盖尚未开始的旧请求"""
+        with self._cond:
+            self._gen += 1
+            self._pending = (self._gen, idx, preview)
+            self._cond.notify_all()
+        if self._settle_id is not None:
+            self.widget.after_cancel(self._settle_id)
+            self._settle_id = None
+        if preview:
+            self._settle_id = self.widget.after(self.settle_ms, self._settle, idx)
+        if self._poll_id is None:
+            self._poll_id = self.widget.after(self.poll_ms, self._poll)
+
+    def defer(self, idx: int):
+        """
+        只安排停止拖动后的精确解码，不做预览解码（预览已由缩略图胶片条提供）。
+        同时使进行中的旧解码失效。
+        """
+        with self._cond:
+            self._gen += 1
+            self._pending = None
+            self._done_gen = self._gen
+            self._shown_gen = self._gen
+        if self._settle_id is not None:
+            self.widget.after_cancel(self._settle_id)
+        self._settle_id = self.widget.after(self.settle_ms, self._settle, idx)
+
+    def cancel(self):
+        """放弃所有未完成的请求（例如切换视频时）"""
+        with self._cond:
+            self._gen += 1
+            self._pending = None
+            self._result = None
+            self._done_gen = self._gen
+            self._shown_gen = self._gen
+        if self._settle_id is not None:
+            self.widget.after_cancel(self._settle_id)
+            self._settle_id = None
+
+    @property
+    def busy(self) -> bool:
+        return self._pending is not None or self._settle_id is not None
+
+    def _settle(self, idx: int):
+        self._settle_id = None
+        self.request(idx, preview=False)
+
+    def _is_stale(self, gen: int) -> bool:
+        return gen != self._gen
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                gen, idx, preview = self._pending
+                self._pending = None
+
+            if preview:
+                # 预览解码很廉价，允许完成，让画面在拖动中持续跟随
+                with perf.span("seek.preview"):
+                    ret, frame, _ = self.video_core.get_preview_frame(idx)
+            else:
+                with perf.span("seek.decode"):
+                    ret, frame = self.video_core.get_frame(idx, should_abort=lambda: self._is_stale(gen))
+
+            with self._cond:
+                self._done_gen = max(self._done_gen, gen)
+                if ret and (self._result is None or self._result[0] < gen):
+                    self._result = (gen, idx, frame, preview)
+
+    def _poll(self):
+        self._poll_id = None
+        with self._cond:
+            result, self._result = self._result, None
+        if result is not None and result[0] > self._shown_gen:
+            gen, idx, frame, preview = result
+            self._shown_gen = gen
+            self.on_frame(idx, frame, preview)
+        if self.busy or self._done_gen < self._gen or self._result is not None:
+            self._poll_id = self.widget.after(self.poll_ms, self._poll)
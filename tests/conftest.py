@@ -0,0 +1,58 @@
+# event_recorder/tests/conftest.py
+"""
+测试与 bench 一样以包名 event_recorder 导入：把仓库的上级目录加入 sys.path
+（仓库目录本身即 event_recorder 包）。
+
+    python -m pytest event_recorder/tests
+
+make_event / random_events 为各测试共用的事件工厂。
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+_PARENT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _PARENT not in sys.path:
+    sys.path.insert(0, _PARENT)
+
+# 随机事件的备注取值：含中英文、大小写、短文本，以及缺失（None）与非字符串取值
+COMMENTS = ("", "残血复活 Clutch", "clutch save", "ace", "a", "团灭", None, 42)
+
+
+def _make_event(start=0, duration=10, event_type="Kill", video="v", **fields) -> dict:
+    """一个字段齐全的事件 dict；fields 覆盖或追加任意字段"""
+    evt = {
+        "game_type": "G", "event_type": event_type,
+        "highlight_frame": start, "highlight_time": 0.0,
+        "duration_frames": duration, "duration_seconds": 0.0,
+        "event_text": "", "save_path": f"saved/{video}", "language": "zh_CN", "comment": "",
+    }
+    evt.update(fields)
+    return evt
+
+
+def _random_events(n: int, seed: int = 0, frames: int = 2000):
+    """n 个随机事件：起点在 [0, frames)，持续帧数、类型、视频、语言与备注随机（可复现）"""
+    rnd = random.Random(seed)
+    return [
+        _make_event(
+            rnd.randrange(frames), rnd.choice((0, 1, 5, 40, 300)), rnd.choice(("Kill", "Revive", "Death")),
+            video=rnd.choice("xyz"), game_type=rnd.choice(("G1", "G2")),
+            language=rnd.choice(("zh_CN", "en_US")), event_text=rnd.choice(("", "t")),
+            comment=rnd.choice(COMMENTS),
+        )
+        for _ in range(n)
+    ]
+
+
+@pytest.fixture
+def make_event():
+    return _make_event
+
+
+@pytest.fixture
+def random_events():
+    return _random_events
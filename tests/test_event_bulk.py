@@ -0,0 +1,212 @@
+# event_recorder/tests/test_event_bulk.py
+
+import json
+
+import numpy as np
+import pytest
+
+from event_recorder.core import event_bulk
+from event_recorder.core.event_logic import EventManager
+from event_recorder.core.event_store import EventRecord
+
+
+def _columns(events):
+    return event_bulk.EventColumns.from_records([EventRecord.from_dict(e) for e in events])
+
+
+def _scan_clusters(events, tolerance):
+    """逐组排序后线性扫描的参考实现：[[位置, ...], ...]"""
+    clusters = []
+    for key in sorted({(e["game_type"], e["event_type"]) for e in events}):
+        members = sorted((e["highlight_frame"], i) for i, e in enumerate(events)
+                         if (e["game_type"], e["event_type"]) == key)
+        current, run_end = [], None
+        for start, i in members:
+            end = start + max(0, events[i]["duration_frames"])
+            if current and start <= run_end + tolerance:
+                current.append(i)
+                run_end = max(run_end, end)
+            else:
+                if current:
+                    clusters.append(current)
+                current, run_end = [i], end
+        clusters.append(current)
+    return clusters
+
+
+def test_columns_fall_back_for_missing_and_non_numeric_values():
+    records = [EventRecord.from_dict(e) for e in
+               [{"highlight_frame": 5, "duration_frames": 2}, {"duration_frames": "7"},
+                {"highlight_frame": None, "duration_frames": -3}, {"highlight_frame": True}]]
+    cols = event_bulk.EventColumns.from_records(records)
+    assert cols.start.tolist() == [5, 0, 0, 0]
+    assert cols.duration.tolist() == [2, 7, 0, 0]
+    times = event_bulk.float_column(records, "highlight_time")
+    assert np.isnan(times).all()
+
+
+@pytest.mark.parametrize("tolerance", [0, 5])
+def test_find_overlaps_matches_scan(tolerance, random_events):
+    events = random_events(400)
+    found = event_bulk.find_overlaps(_columns(events), tolerance)
+    expected = [c for c in _scan_clusters(events, tolerance) if len(c) > 1]
+    assert sorted(sorted(g.tolist()) for g in found) == sorted(sorted(c) for c in expected)
+
+
+@pytest.mark.parametrize("tolerance", [0, 5])
+def test_merge_overlaps_matches_scan(tolerance, random_events):
+    events = random_events(400, seed=3)
+    keep, start, duration, drop = event_bulk.merge_overlaps(_columns(events), tolerance)
+    expected_keep, expected_drop = {}, []
+    for cluster in _scan_clusters(events, tolerance):
+        if len(cluster) < 2:
+            continue
+        first = min(cluster, key=lambda i: (events[i]["highlight_frame"], i))
+        lo = min(events[i]["highlight_frame"] for i in cluster)
+        hi = max(events[i]["highlight_frame"] + events[i]["duration_frames"] for i in cluster)
+        expected_keep[first] = (lo, hi - lo)
+        expected_drop += [i for i in cluster if i != first]
+    assert dict(zip(keep.tolist(), zip(start.tolist(), duration.tolist()))) == expected_keep
+    assert drop.tolist() == sorted(expected_drop)
+
+
+def test_find_duplicates_keeps_first_of_each_chain(make_event):
+    events = [make_event(100, 10), make_event(101, 11), make_event(102, 10), make_event(100, 10, "Death"),
+              make_event(300, 10), make_event(100, 10)]
+    cols = _columns(events)
+    assert event_bulk.find_duplicates(cols).tolist() == [5]
+    assert event_bulk.find_duplicates(cols, frame_tolerance=1, duration_tolerance=1).tolist() == [1, 2, 5]
+
+
+def test_batch_record_round_trip():
+    rec = event_bulk.batch_record(5, np.array([1, 3]), np.array([10, -2]), np.array([4, 0]),
+                                  time=np.array([0.5, np.nan]), seconds=np.array([0.25, 0.0]), drop=np.array([4]))
+    batch = event_bulk.read_batch_record(json.loads(json.dumps(rec)))
+    assert batch["positions"].tolist() == [1, 3] and batch["drop"].tolist() == [4]
+    assert batch["start"].tolist() == [10, -2] and batch["duration"].tolist() == [4, 0]
+    assert batch["time"][0] == 0.5 and np.isnan(batch["time"][1])
+    whole = event_bulk.read_batch_record(event_bulk.batch_record(3, np.arange(3), time=np.zeros(3), seconds=np.ones(3)))
+    assert whole["positions"].tolist() == [0, 1, 2] and whole["start"] is None and whole["drop"] is None
+
+
+def test_shift_and_rescale(make_event):
+    cols = _columns([make_event(10, 5), make_event(2, 4), make_event(61, 3)])
+    positions, start = event_bulk.shift(cols, -5, [0, 1])
+    assert positions.tolist() == [0, 1] and start.tolist() == [5, 0]
+    start, duration = event_bulk.rescale_fps(cols, 60, 30)
+    assert start.tolist() == [5, 1, 30] and duration.tolist() == [3, 2, 2]
+
+
+def test_record_patch_tracks_positions(make_event):
+    patch = event_bulk.RecordPatch(4)
+    patch.mark(np.array([1, 3]), np.array([10, 30]), np.array([1, 3]), np.array([0.5, 1.5]), np.array([0.1, 0.3]))
+    patch.keep(np.array([True, False, True, True]))
+    patch.append()
+    assert patch.stale.tolist() == [False, False, True, False]
+    rec = patch.apply(EventRecord.from_dict(make_event(0, 0)), 2)
+    assert (rec.highlight_frame, rec.duration_frames, rec.highlight_time, rec.duration_seconds) == (30, 3, 1.5, 0.3)
+    patch.delete(0)
+    assert patch.start.tolist() == [0, 30, 0]
+
+
+@pytest.fixture
+def manager(tmp_path):
+    mgr = EventManager(save_dir=str(tmp_path), journal=False)
+    yield mgr
+    mgr.close()
+
+
+def test_manager_merge_overlaps_updates_records_and_indexes(manager, make_event):
+    for evt in [make_event(0, 10, comment="a"), make_event(5, 10), make_event(30, 5), make_event(8, 1, "Death")]:
+        manager.add_event(evt)
+    resets = []
+    manager.subscribe(lambda op, eid: resets.append(op))
+    assert manager.merge_overlaps(frame_to_time=lambda f: f / 10) == 2
+    assert resets == ["reset"]
+    ids = manager.event_ids()
+    assert ids == [1, 3, 4]
+    merged = manager.get_event(1)
+    assert (merged["highlight_frame"], merged["duration_frames"]) == (0, 15)
+    assert (merged["highlight_time"], merged["duration_seconds"]) == (0.0, 1.5)
+    assert sorted(manager.intervals.covering(12)) == [1]
+    assert manager.search(comment="a") == {1}
+    assert manager.index_of(4) == 2
+    with pytest.raises(KeyError):
+        manager.index_of(2)
+
+
+def test_manager_bulk_ops_keep_records_immutable(manager, make_event):
+    for evt in [make_event(10, 5), make_event(20, 5), make_event(20, 5)]:
+        manager.add_event(evt)
+    before = manager.get_record(1)
+    assert manager.shift_events(5, [1]) == 1
+    assert before.highlight_frame == 10
+    assert manager.get_record(1).highlight_frame == 15
+    assert manager.dedupe() == 1
+    assert manager.rescale_fps(30, 60) == 2
+    assert [e["highlight_frame"] for e in manager.events] == [30, 40]
+    assert [e["duration_seconds"] for e in manager.events] == pytest.approx([10 / 60, 10 / 60])
+    assert manager.delete_events([2, 99]) == 1
+    assert len(manager) == 1
+
+
+def test_manager_saves_lazily_patched_records(manager, tmp_path, make_event):
+    for i in range(20):
+        manager.add_event(make_event(i * 100, 10, comment=str(i)))
+    manager.shift_events(1, frame_to_time=lambda f: f / 10)
+    manager.add_event(make_event(5000, 1))
+    manager.update_event(0, make_event(7, 7))
+    manager.save_events("out.json")
+    saved = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+    assert [e["highlight_frame"] for e in saved] == [7] + [i * 100 + 1 for i in range(1, 20)] + [5000]
+    assert saved[1]["highlight_time"] == pytest.approx(10.1)
+    assert saved[1]["comment"] == "1"
+
+
+@pytest.mark.parametrize("old_fps", [0, -30, float("nan"), float("inf"), "fast"])
+def test_manager_rescale_rejects_invalid_fps(manager, make_event, old_fps):
+    manager.add_event(make_event(30, 30))
+    with pytest.raises(ValueError):
+        manager.rescale_fps(old_fps, 60)
+    with pytest.raises(ValueError):
+        manager.rescale_fps(60, old_fps)
+    assert manager.get_event(1)["highlight_frame"] == 30
+
+
+def test_manager_bulk_ops_journal_batches_without_compacting(tmp_path, random_events):
+    save_dir = str(tmp_path / "saved")
+    first = EventManager(save_dir=save_dir, journal=True)
+    for evt in random_events(300, seed=5, frames=500):
+        first.add_event(evt)
+    first.close()
+    snapshot = (tmp_path / "saved" / "events.json").read_bytes()
+
+    manager = EventManager(save_dir=save_dir, journal=True)
+    manager.add_event(random_events(1, seed=6)[0])
+    assert manager.dedupe(2, 2) > 0
+    assert manager.merge_overlaps(frame_to_time=lambda f: f / 25) > 0
+    manager.update_event(3, random_events(1, seed=7)[0])
+    assert manager.shift_events(7, manager.event_ids()[::4], frame_to_time=lambda f: f / 25) > 0
+    assert manager.retime(lambda f: f / 50) > 0
+    assert manager.rescale_fps(50, 25) > 0
+    manager.delete_events(manager.event_ids()[::9])
+    expected = list(manager.events)
+    # 批量操作不同步压缩：快照保持原样，改动都在日志中
+    assert (tmp_path / "saved" / "events.json").read_bytes() == snapshot
+    # 不调用 close()：模拟崩溃后重放日志
+    manager._closed.set()
+    manager.journal.close()
+
+    reloaded = EventManager(save_dir=save_dir, journal=True)
+    try:
+        assert list(reloaded.events) == expected
+    finally:
+        reloaded.close()
+
+
+def test_manager_retime_recomputes_changed_times(manager, make_event):
+    manager.add_event(make_event(30, 30, highlight_time=1.0, duration_seconds=1.0))
+    manager.add_event(make_event(60, 15, highlight_time="x"))
+    assert manager.retime(lambda f: np.asarray(f) / 30.0) == 1
+    evt = manager.get_event(2)
+    assert (evt["highlight_time"], evt["duration_seconds"]) == (2.0, 0.5)
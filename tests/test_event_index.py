@@ -0,0 +1,102 @@
+# event_recorder/tests/test_event_index.py
+
+import random
+
+import numpy as np
+import pytest
+
+from event_recorder.core.event_index import EventIntervalIndex, event_span
+
+
+def _check_against_scan(index, events):
+    spans = {eid: event_span(evt) for eid, evt in events.items()}
+    assert len(index) == len(spans)
+    for frame in list(range(-5, 1400, 37)) + [0, 999]:
+        covering = sorted(eid for eid, (s, e) in spans.items() if s <= frame <= e)
+        assert sorted(index.covering(frame)) == covering
+        assert index.count_covering(frame) == len(covering)
+    for a, b in [(0, 0), (10, 50), (500, 520), (-10, 2000), (999, 1300)]:
+        hits = sorted(eid for eid, (s, e) in spans.items() if s <= b and e >= a)
+        assert sorted(index.overlapping(a, b)) == hits
+        assert index.count_overlapping(a, b) == len(hits)
+
+
+def test_event_span_clamps_and_defaults():
+    assert event_span({"highlight_frame": 10, "duration_frames": 5}) == (10, 15)
+    assert event_span({"highlight_frame": 10, "duration_frames": -5}) == (10, 10)
+    assert event_span({}) == (0, 0)
+
+
+def _by_id(events):
+    return dict(enumerate(events, 1))
+
+
+def test_incremental_add_remove_update_matches_scan(random_events):
+    events = _by_id(random_events(300, frames=1000))
+    index = EventIntervalIndex()
+    for eid, evt in events.items():
+        index.add(eid, evt)
+    _check_against_scan(index, events)
+
+    rnd = random.Random(1)
+    for eid in rnd.sample(sorted(events), 100):
+        index.remove(eid)
+        del events[eid]
+    for eid in rnd.sample(sorted(events), 50):
+        events[eid] = {"highlight_frame": rnd.randrange(1000), "duration_frames": rnd.randrange(50)}
+        index.update(eid, events[eid])
+    _check_against_scan(index, events)
+
+
+def test_rebuild_and_rebuild_columns_agree_with_incremental(random_events):
+    events = _by_id(random_events(200, seed=2, frames=1000))
+    incremental = EventIntervalIndex()
+    for eid, evt in events.items():
+        incremental.add(eid, evt)
+    rebuilt = EventIntervalIndex()
+    rebuilt.rebuild(events.items())
+    ids = sorted(events)
+    starts = np.array([events[e]["highlight_frame"] for e in ids])
+    columns = EventIntervalIndex()
+    columns.rebuild_columns(ids, starts, starts + np.array([events[e]["duration_frames"] for e in ids]))
+    for index in (rebuilt, columns):
+        for name in ("_starts", "_ends", "_ids", "_sorted_ends"):
+            assert np.array_equal(getattr(index, name), getattr(incremental, name))
+        _check_against_scan(index, events)
+
+
+def test_long_event_does_not_widen_queries(random_events):
+    events = _by_id(random_events(2000, seed=4, frames=100_000))
+    events[0] = {"highlight_frame": 0, "duration_frames": 1_000_000}
+    index = EventIntervalIndex()
+    index.rebuild(events.items())
+    _check_against_scan(index, events)
+    hits = index.overlapping(50_000, 50_010)
+    assert hits[0] == 0 and len(hits) < 20
+
+
+def test_neighbour_queries():
+    index = EventIntervalIndex()
+    for eid, start in [(1, 100), (2, 200), (3, 200), (4, 350)]:
+        index.add(eid, {"highlight_frame": start, "duration_frames": 1})
+    assert index.next_after(100) == (200, 2)
+    assert index.next_after(350) is None
+    assert index.prev_before(200) == (100, 1)
+    assert index.prev_before(100) is None
+    assert index.nearest(290) == (350, 4)
+    assert index.nearest(0) == (100, 1)
+    assert EventIntervalIndex().nearest(5) is None
+
+
+def test_density_counts_events_per_bin():
+    index = EventIntervalIndex()
+    index.add(1, {"highlight_frame": 0, "duration_frames": 19})
+    index.add(2, {"highlight_frame": 15, "duration_frames": 30})
+    index.add(3, {"highlight_frame": 95, "duration_frames": 100})
+    assert index.density(100, 10).tolist() == [1, 2, 1, 1, 1, 0, 0, 0, 0, 1]
+    assert index.density(0, 4).tolist() == [0, 0, 0, 0]
+
+
+def test_remove_unknown_event_raises():
+    with pytest.raises(KeyError):
+        EventIntervalIndex().remove(1)
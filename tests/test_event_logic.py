@@ -0,0 +1,156 @@
+# event_recorder/tests/test_event_logic.py
+
+import json
+import os
+import time
+
+import pytest
+
+from event_recorder.core.event_logic import EventManager
+from event_recorder.core.event_store import write_events_json
+
+
+def _frames(manager):
+    return [e["highlight_frame"] for e in manager.events]
+
+
+@pytest.fixture
+def save_dir(tmp_path):
+    return str(tmp_path / "saved")
+
+
+def test_journal_replays_uncompacted_changes(save_dir, make_event):
+    first = EventManager(save_dir=save_dir, journal=True)
+    for start in (10, 20, 30):
+        first.add_event(make_event(start))
+    first.update_event(1, make_event(25, comment="edited"))
+    first.delete_event(0)
+    # 不调用 close()：模拟崩溃，快照未压缩，只有日志
+    first._closed.set()
+    assert not os.path.exists(os.path.join(save_dir, "events.json"))
+
+    second = EventManager(save_dir=save_dir, journal=True)
+    try:
+        assert _frames(second) == [25, 30]
+        assert second.get_event(second.event_id(0))["comment"] == "edited"
+    finally:
+        second.close()
+
+    third = EventManager(save_dir=save_dir, journal=True)
+    try:
+        assert _frames(third) == [25, 30]
+        assert json.load(open(os.path.join(save_dir, "events.json"), encoding="utf-8"))[0]["comment"] == "edited"
+    finally:
+        third.close()
+
+
+def test_journal_ignores_log_for_other_snapshot(save_dir, make_event):
+    first = EventManager(save_dir=save_dir, journal=True)
+    first.add_event(make_event(1))
+    first.close()
+    journal = EventManager(save_dir=save_dir, journal=True)
+    journal.add_event(make_event(2))
+    journal._closed.set()
+    # 快照被外部改写：日志首行的摘要不再匹配，不重放
+    write_events_json(os.path.join(save_dir, "events.json"), [make_event(7)])
+    reloaded = EventManager(save_dir=save_dir, journal=True)
+    try:
+        assert _frames(reloaded) == [7]
+    finally:
+        reloaded.close()
+
+
+def _crash(manager):
+    """不调用 close()：模拟崩溃，只留下快照与日志"""
+    manager._closed.set()
+    manager.journal.close()
+
+
+def test_loading_other_file_is_journaled(save_dir, tmp_path, make_event):
+    default = EventManager(save_dir=save_dir, journal=True)
+    default.add_event(make_event(1))
+    default.save_events()
+    other = tmp_path / "other.json"
+    write_events_json(str(other), [make_event(5), make_event(6)])
+
+    default.load_events(str(other))
+    default.add_event(make_event(300))
+    default.merge_overlaps()
+    path = os.path.join(save_dir, "events.json")
+    assert [e["highlight_frame"] for e in json.load(open(path, encoding="utf-8"))] == [1]
+    _crash(default)
+
+    reloaded = EventManager(save_dir=save_dir, journal=True)
+    try:
+        assert _frames(reloaded) == [5, 300]
+        reloaded.save_events()
+        assert [e["highlight_frame"] for e in json.load(open(path, encoding="utf-8"))] == [5, 300]
+    finally:
+        reloaded.close()
+
+
+def test_replay_stops_when_loaded_file_changed(save_dir, tmp_path, make_event):
+    default = EventManager(save_dir=save_dir, journal=True)
+    default.add_event(make_event(1))
+    default.save_events()
+    other = tmp_path / "other.json"
+    write_events_json(str(other), [make_event(5)])
+    default.load_events(str(other))
+    default.add_event(make_event(9))
+    _crash(default)
+    write_events_json(str(other), [make_event(6)])
+
+    reloaded = EventManager(save_dir=save_dir, journal=True)
+    try:
+        assert _frames(reloaded) == [1]
+    finally:
+        reloaded.close()
+
+
+def test_corrupt_default_file_is_moved_aside_and_journaled(save_dir, make_event):
+    os.makedirs(save_dir)
+    path = os.path.join(save_dir, "events.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('[{"highlight_frame": ')
+    manager = EventManager(save_dir=save_dir, journal=True)
+    assert manager.load_error and len(manager) == 0
+    assert open(path + ".corrupt", encoding="utf-8").read() == '[{"highlight_frame": '
+    manager.add_event(make_event(3))
+    _crash(manager)
+
+    reloaded = EventManager(save_dir=save_dir, journal=True)
+    try:
+        assert reloaded.load_error is None
+        assert _frames(reloaded) == [3]
+    finally:
+        reloaded.close()
+
+
+def test_diff_notifications_and_stable_ids(save_dir, make_event):
+    manager = EventManager(save_dir=save_dir, journal=False)
+    seen = []
+    manager.subscribe(lambda op, eid: seen.append((op, eid)))
+    a = manager.add_event(make_event(1))
+    b = manager.add_event(make_event(2))
+    manager.delete_event(0)
+    manager.update_event(0, make_event(3))
+    assert seen == [("add", a), ("add", b), ("delete", a), ("update", b)]
+    assert manager.index_of(b) == 0 and manager.event_ids() == [b]
+    with pytest.raises(IndexError):
+        manager.delete_event(5)
+    manager.close()
+
+
+def test_field_index_is_built_in_background_after_load(save_dir, make_event):
+    os.makedirs(save_dir)
+    write_events_json(os.path.join(save_dir, "events.json"),
+                      [make_event(i, comment="clutch" if i % 2 else "") for i in range(50)])
+    manager = EventManager(save_dir=save_dir, journal=False)
+    try:
+        deadline = time.monotonic() + 5
+        while manager.fields._source is not None and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert manager.fields._source is None  # 未经查询即已建立
+        assert len(manager.search(comment="CLUTCH")) == 25
+    finally:
+        manager.close()
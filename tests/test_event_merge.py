@@ -0,0 +1,76 @@
+# event_recorder/tests/test_event_merge.py
+
+import json
+
+from event_recorder.core.event_merge import ConflictDetector, find_event_files, merge_event_files, video_key
+from event_recorder.core.event_store import write_events_json
+
+
+def _key(evt, source, index=0):
+    return [video_key(evt), evt["highlight_frame"], evt["duration_frames"], source, index]
+
+
+def test_video_key_uses_last_directory():
+    assert video_key({"save_path": "D:\\saved\\clip1\\"}) == "clip1"
+    assert video_key({"save_path": "saved/clip2"}) == "clip2"
+    assert video_key({}) == ""
+
+
+def test_merge_is_sorted_complete_and_keeps_provenance(tmp_path, random_events):
+    inputs = []
+    for k in range(3):
+        events = random_events(120, seed=k, frames=1000)
+        path = tmp_path / f"annotator{k}" / "events.json"
+        path.parent.mkdir()
+        write_events_json(str(path), events)
+        inputs.append(str(path))
+    out = tmp_path / "merged.json"
+    # 小段长与小扇入，覆盖多段切分与分批归并
+    summary = merge_event_files(find_event_files([str(tmp_path)]), str(out), workers=2, run_events=25, fan_in=4)
+    assert summary["inputs"] == 3 and summary["events"] == 360 and summary["runs"] == 15
+
+    merged = json.loads(out.read_text(encoding="utf-8"))
+    keys = [(video_key(e), e["highlight_frame"], e["duration_frames"]) for e in merged]
+    assert keys == sorted(keys)
+    sources = sorted((e["provenance"]["file"], e["provenance"]["index"]) for e in merged)
+    assert sources == sorted((p, i) for p in inputs for i in range(120))
+    assert not [p for p in tmp_path.iterdir() if p.name.startswith(".merge_")]
+
+
+def test_merge_keeps_existing_provenance(tmp_path, make_event):
+    path = tmp_path / "events.json"
+    write_events_json(str(path), [dict(make_event(1), provenance={"file": "orig.json", "index": 7})])
+    out = tmp_path / "out.json"
+    merge_event_files([str(path)], str(out), workers=1)
+    assert json.loads(out.read_text(encoding="utf-8"))[0]["provenance"] == {"file": "orig.json", "index": 7}
+
+
+def test_conflict_detector_classifies_pairs(make_event):
+    detector = ConflictDetector(tolerance=3, iou=0.5)
+    a = make_event(100, 20)
+    stream = [
+        (a, 0),
+        (make_event(102, 19), 1),  # 同类型、起止相差 <= 3：一致
+        (make_event(110, 40), 1),  # 同类型、重叠但终点相差大：span
+        (make_event(101, 20, "Death"), 2),  # 不同类型、高度重叠：type
+        (make_event(100, 20), 0),  # 同一来源之间不比较
+    ]
+    found = []
+    for evt, source in sorted(stream, key=lambda item: _key(*item)):
+        found += detector.feed(_key(evt, source), evt)
+    assert detector.counts == {"span": 2, "type": 3, "agree": 2}
+    assert {c["kind"] for c in found} == {"span", "type"}
+
+
+def test_conflict_detector_resets_per_video_and_drops_finished_events(make_event):
+    detector = ConflictDetector(tolerance=0, iou=0.5)
+
+    def feed(start, duration, video, source):
+        evt = make_event(start, duration, video=video)
+        return detector.feed(_key(evt, source), evt)
+
+    feed(0, 10, "v1", 0)
+    assert feed(0, 10, "v2", 1) == []  # 换视频后不与上一个视频的事件比较
+    feed(50, 10, "v2", 0)
+    assert feed(61, 5, "v2", 1) == []  # 已结束的事件不再参与比较
+    assert detector.counts == {"span": 0, "type": 0, "agree": 0}
@@ -0,0 +1,127 @@
+# event_recorder/tests/test_event_search.py
+
+import random
+
+import pytest
+
+from event_recorder.core.event_search import EventFieldIndex, comment_grams
+from event_recorder.core.event_store import EventRecord
+
+
+def _records(events):
+    return {eid: EventRecord.from_dict(evt) for eid, evt in enumerate(events, 1)}
+
+
+def _scan(records, comment=None, **fields):
+    def ok(rec):
+        for field, wanted in fields.items():
+            if wanted is None or wanted == "":
+                continue
+            value = rec.get(field)
+            value = "" if value is None else str(value)
+            if (value != wanted) if isinstance(wanted, str) else (value not in wanted):
+                return False
+        text = rec.get("comment")
+        text = "" if text is None else str(text)
+        return not comment or comment.lower() in text.lower()
+    return {eid for eid, rec in records.items() if ok(rec)}
+
+
+QUERIES = [
+    {}, {"event_type": "Kill"}, {"event_type": ["Kill", "Death"], "language": "en_US"},
+    {"comment": "clutch"}, {"comment": "CLUTCH", "game_type": "G2"}, {"comment": "a"},
+    {"comment": "复活"}, {"comment": "4"}, {"comment": "zzz"}, {"event_type": "Nope"},
+    {"event_text": "", "comment": ""},
+]
+
+
+def _build(records):
+    index = EventFieldIndex()
+    index.invalidate(lambda: (list(records), list(records.values())))
+    return index
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_scan(query, random_events):
+    records = _records(random_events(300))
+    index = _build(records)
+    expected = _scan(records, **query)
+    assert index.search(**query) == expected
+    assert {eid for eid in records if index.matches(eid, **query)} == expected
+
+
+def test_incremental_updates_after_build(random_events):
+    records = _records(random_events(200, seed=1))
+    index = _build(records)
+    index.search()  # 建立索引
+    rnd = random.Random(2)
+    for eid in rnd.sample(sorted(records), 60):
+        index.remove(eid)
+        del records[eid]
+    for eid in rnd.sample(sorted(records), 40):
+        records[eid] = EventRecord.from_dict({"event_type": "Kill", "comment": "new clutch"})
+        index.update(eid, records[eid])
+    for eid in range(1000, 1020):
+        records[eid] = EventRecord.from_dict({"event_type": "Revive", "comment": "ACE"})
+        index.add(eid, records[eid])
+    assert len(index) == len(records)
+    for query in QUERIES:
+        assert index.search(**query) == _scan(records, **query)
+
+
+def test_invalidate_defers_build_to_first_query(random_events):
+    records = _records(random_events(10))
+    calls = []
+    index = EventFieldIndex()
+    index.invalidate(lambda: calls.append(1) or (list(records), list(records.values())))
+    index.add(99, EventRecord.from_dict({"event_type": "Kill"}))  # 待建立时忽略，建立时从来源读取
+    assert calls == []
+    assert 99 not in index.search()
+    assert index.values("event_type")
+    assert calls == [1]
+
+
+def test_background_build_replays_edits_made_meanwhile(random_events):
+    records = _records(random_events(200, seed=3))
+    index = _build(records)
+    job = index.prepare()
+    assert index.building and index.prepare() is None  # 同时只有一个后台建立
+    built = index.build(job)
+    # 建立期间的改动暂存，换入时补上
+    index.remove(5)
+    del records[5]
+    records[7] = EventRecord.from_dict({"event_type": "Kill", "comment": "late clutch"})
+    index.update(7, records[7])
+    records[500] = EventRecord.from_dict({"event_type": "Revive", "comment": "ACE"})
+    index.add(500, records[500])
+    assert index.install(job, built) and not index.building
+    for query in QUERIES:
+        assert index.search(**query) == _scan(records, **query)
+
+
+def test_stale_background_build_is_discarded(random_events):
+    records = _records(random_events(50, seed=4))
+    index = _build(records)
+    job = index.prepare()
+    built = index.build(job)
+    records = _records(random_events(20, seed=5))
+    index.invalidate(lambda: (list(records), list(records.values())))
+    assert not index.install(job, built)
+    assert index.search() == set(records)
+
+
+def test_values_sorted_by_count():
+    records = {1: EventRecord.from_dict({"event_type": "B"}), 2: EventRecord.from_dict({"event_type": "A"}),
+               3: EventRecord.from_dict({"event_type": "B"})}
+    assert _build(records).values("event_type") == [("B", 2), ("A", 1)]
+
+
+def test_unknown_field_raises():
+    with pytest.raises(KeyError):
+        _build({}).search(comment_text="x")
+
+
+def test_comment_grams_pad_short_text():
+    assert comment_grams("") == set()
+    assert comment_grams("a", 3) == {"\x02a\x03"}
+    assert comment_grams("abc", 3) == {"\x02ab", "abc", "bc\x03"}
@@ -0,0 +1,78 @@
+# event_recorder/tests/test_event_store.py
+
+import hashlib
+import json
+
+import pytest
+
+from event_recorder.core.event_store import EventRecord, EventsView, iter_json_array, write_events_json
+
+
+def test_record_round_trip_keeps_unknown_and_missing_fields():
+    evt = {"event_type": "Kill", "highlight_frame": 5, "comment": None, "confirmed": False,
+           "provenance": {"file": "a.json", "index": 3}}
+    rec = EventRecord.from_dict(evt)
+    assert rec.to_dict() == evt
+    assert "game_type" not in rec
+    assert rec.get("game_type", "x") == "x"
+    assert rec["confirmed"] is False
+    assert rec.get("comment", "x") is None
+
+
+def test_record_replace_returns_new_record(make_event):
+    rec = EventRecord.from_dict(make_event(1, confirmed=False))
+    new = rec.replace(highlight_frame=9)
+    assert new.highlight_frame == 9 and rec.highlight_frame == 1
+    assert new["confirmed"] is False
+
+
+def test_record_rejects_non_object():
+    with pytest.raises(ValueError):
+        EventRecord.from_dict([1, 2])
+
+
+def test_events_view_reads_like_list_of_dicts(make_event):
+    events = [make_event(i) for i in range(3)]
+    view = EventsView([EventRecord.from_dict(e) for e in events])
+    assert len(view) == 3 and view
+    assert view[1] == events[1]
+    assert view[1:] == events[1:]
+    assert view == events
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 20])
+def test_iter_json_array_matches_json_load(tmp_path, chunk_size, random_events):
+    events = [dict(e, nested={"a": [1, 2.5, "中文"]}) for e in random_events(50)] + [12, "s", None]
+    path = tmp_path / "events.json"
+    path.write_text(json.dumps(events, ensure_ascii=False, indent=2), encoding="utf-8")
+    assert list(iter_json_array(str(path), chunk_size=chunk_size)) == events
+
+
+def test_iter_json_array_reports_progress_and_hashes(tmp_path):
+    path = tmp_path / "events.json"
+    path.write_bytes(b"\xef\xbb\xbf[1, 2, 3]")
+    digest = hashlib.sha1()
+    progress = []
+    assert list(iter_json_array(str(path), lambda done, total: progress.append((done, total)),
+                                hasher=digest, chunk_size=4)) == [1, 2, 3]
+    assert progress[-1] == (path.stat().st_size, path.stat().st_size)
+    assert digest.hexdigest() == hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+@pytest.mark.parametrize("text", ["", "{}", "[1, 2", "[1 2]", "[1, }"])
+def test_iter_json_array_rejects_malformed(tmp_path, text):
+    path = tmp_path / "events.json"
+    path.write_text(text, encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(path)))
+
+
+@pytest.mark.parametrize("count", [0, 1, 3])
+def test_write_events_json_matches_json_dump(tmp_path, count, random_events):
+    events = [dict(e, extra={"k": "值"}) for e in random_events(count)]
+    path = tmp_path / "events.json"
+    digest = hashlib.sha1()
+    write_events_json(str(path), [EventRecord.from_dict(e) for e in events], hasher=digest)
+    expected = json.dumps(events, ensure_ascii=False, indent=4).encode("utf-8")
+    assert path.read_bytes() == expected
+    assert digest.hexdigest() == hashlib.sha1(expected).hexdigest()
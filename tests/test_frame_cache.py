@@ -0,0 +1,70 @@
+# event_recorder/tests/test_frame_cache.py
+
+import numpy as np
+
+from event_recorder.core.frame_cache import FrameCache
+from event_recorder.core.video_core import VideoCore
+
+
+def _frame(nbytes=100):
+    return np.zeros(nbytes, dtype=np.uint8)
+
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = FrameCache(300)
+    for idx in range(3):
+        cache.put(idx, _frame())
+    assert cache.get(0) is not None  # 0 变为最近使用
+    cache.put(3, _frame())
+    assert 1 not in cache and {0, 2, 3} <= {i for i in range(4) if i in cache}
+    assert cache.nbytes == 300 and len(cache) == 3
+
+
+def test_put_replaces_existing_frame_without_double_counting():
+    cache = FrameCache(300)
+    cache.put(0, _frame(100))
+    cache.put(0, _frame(200))
+    assert cache.nbytes == 200 and len(cache) == 1
+
+
+def test_oversized_frame_is_not_cached():
+    cache = FrameCache(50)
+    cache.put(0, _frame(100))
+    assert cache.get(0) is None and cache.nbytes == 0
+
+
+def test_resize_and_clear():
+    cache = FrameCache(1000)
+    for idx in range(5):
+        cache.put(idx, _frame())
+    cache.resize(250)
+    assert [i for i in range(5) if i in cache] == [3, 4]
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0
+
+
+class _FlakyCapture:
+    """假 VideoCapture：帧内容为帧号，第 bad 帧第一次 grab 失败（如损坏的包）"""
+
+    def __init__(self, bad):
+        self.bad = bad
+        self.pos = 0
+
+    def grab(self):
+        if self.pos == self.bad:
+            self.bad = None
+            return False
+        self.pos += 1
+        return True
+
+    def read(self):
+        frame = np.full(10, self.pos, dtype=np.uint8)
+        return self.grab(), frame
+
+
+def test_failed_skip_does_not_return_an_earlier_frame():
+    core = VideoCore(cache_bytes=1000)
+    core.cap = _FlakyCapture(bad=3)
+    assert core.get_frame(20) == (False, None)
+    ret, frame = core.get_frame(3)
+    assert ret and frame[0] == 3
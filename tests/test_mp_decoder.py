@@ -0,0 +1,61 @@
+# event_recorder/tests/test_mp_decoder.py
+
+import queue
+
+import numpy as np
+
+from event_recorder.core import mp_decoder
+
+
+class _DeadProcess:
+    def is_alive(self):
+        return False
+
+    def join(self, timeout=None):
+        pass
+
+
+class _FallbackCore:
+    """代替 VideoCore 的单进程解码器：按帧号返回帧"""
+
+    def __init__(self, cache_bytes=0):
+        self.opened = None
+        self.released = False
+        self.frame_cache = type("Cache", (), {"clear": lambda self: None})()
+
+    def open(self, filepath):
+        self.opened = filepath
+
+    def get_frame(self, idx, should_abort=None, backstep_cache=True):
+        return True, np.full(4, idx, dtype=np.uint8)
+
+    def is_cached(self, idx):
+        return False
+
+    def release(self):
+        self.released = True
+
+
+def test_dead_worker_falls_back_to_single_process(monkeypatch):
+    monkeypatch.setattr(mp_decoder, "VideoCore", _FallbackCore)
+    decoder = mp_decoder.MultiProcessDecoder(workers=1, segment_frames=4)
+    decoder.filepath = "clip.mp4"
+    decoder.total_frames = 100
+    # 进程池已“启动”，但唯一的解码进程已退出：调度的段永远不会有回报
+    decoder._procs = [_DeadProcess()]
+    decoder._tasks = [queue.Queue()]
+    decoder._results = queue.Queue()
+    decoder._idle = [0]
+    decoder._worker_pos = [0]
+    decoder._free = list(range(8))
+    decoder._keep_behind = 0
+
+    ret, frame = decoder.get_frame(9)
+    assert ret and frame.tolist() == [9] * 4
+    assert decoder._fallback.opened == "clip.mp4"
+    assert decoder._procs == []
+    assert decoder.get_frame(10)[0] and decoder.read_frame()[1].tolist() == [11] * 4
+
+    fallback = decoder._fallback
+    decoder.release()
+    assert fallback.released and decoder._fallback is None
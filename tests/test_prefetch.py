@@ -0,0 +1,118 @@
+# event_recorder/tests/test_prefetch.py
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from event_recorder.core.frame_cache import FrameCache
+from event_recorder.core.prefetch import FramePrefetcher
+
+
+class FakeCore:
+    """按帧号返回帧的假解码器：记录每次调用，解码过的帧进入帧缓存"""
+
+    def __init__(self, total=100, frame_bytes=16):
+        self.total = total
+        self.frame_bytes = frame_bytes
+        self.frame_cache = FrameCache(1 << 20)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_frame(self, idx, should_abort=None, backstep_cache=True):
+        with self._lock:
+            self.calls.append((idx, backstep_cache))
+        if idx >= self.total:
+            return False, None
+        frame = np.full(self.frame_bytes, idx % 256, dtype=np.uint8)
+        self.frame_cache.put(idx, frame)
+        return True, frame
+
+    def is_cached(self, idx):
+        return idx in self.frame_cache
+
+
+def _wait(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待预取超时")
+        time.sleep(0.005)
+
+
+@pytest.fixture
+def core():
+    return FakeCore()
+
+
+@pytest.fixture
+def prefetcher(core):
+    p = FramePrefetcher(core, max_bytes=1 << 20, max_frames=5)
+    yield p
+    p.stop()
+
+
+def test_ring_buffer_fills_to_frame_limit_and_refills_on_pop(core, prefetcher):
+    prefetcher.start(10)
+    _wait(lambda: prefetcher.buffered == 5)
+    time.sleep(0.02)
+    assert [i for i, _ in core.calls] == [10, 11, 12, 13, 14]
+    assert prefetcher.pop(9) is None  # 不在缓冲区中：缓冲区不变
+    frame = prefetcher.pop(12)  # 丢弃更早的帧
+    assert frame[0] == 12
+    _wait(lambda: prefetcher.buffered == 5)
+    assert prefetcher.pop(13)[0] == 13
+
+
+def test_byte_limit_bounds_buffer(core):
+    p = FramePrefetcher(core, max_bytes=3 * core.frame_bytes, max_frames=100)
+    try:
+        p.start(0)
+        _wait(lambda: p.buffered == 3)
+        time.sleep(0.02)
+        assert p.buffered == 3
+    finally:
+        p.stop()
+
+
+def test_stride_and_pop_due(core, prefetcher):
+    prefetcher.start(0, stride=4)
+    _wait(lambda: prefetcher.buffered == 5)
+    idx, frame = prefetcher.pop_due(9)  # 丢弃 0、4，取不晚于 9 的最新一帧
+    assert idx == 8 and frame[0] == 8
+    assert prefetcher.pop_due(10) == (None, None)  # 下一帧 12 尚未到显示时刻
+    assert all(not backstep for _, backstep in core.calls)
+
+
+def test_stops_at_end_of_video(core, prefetcher):
+    prefetcher.start(98)
+    _wait(lambda: (100, False) in core.calls)
+    time.sleep(0.02)
+    assert prefetcher.buffered == 2
+    assert [i for i, _ in core.calls] == [98, 99, 100]
+
+
+def test_hold_prefetches_forward_then_backstep(core, prefetcher):
+    prefetcher.hold(40)
+    _wait(lambda: 39 in core.frame_cache)
+    assert [i for i, _ in core.calls] == [41, 42, 43, 44, 45, 39]
+    assert core.calls[-1] == (39, True)  # 回退帧按默认方式解码，目标前几帧随之缓存
+    assert prefetcher.pop(41)[0] == 41
+
+
+def test_hold_keeps_buffer_when_stepping_forward(core, prefetcher):
+    prefetcher.hold(10)
+    _wait(lambda: 9 in core.frame_cache)
+    assert prefetcher.pop(11) is not None
+    prefetcher.hold(11)  # 缓冲区已从 12 开始：保留
+    assert prefetcher.buffered >= 4
+    assert prefetcher.pop(12)[0] == 12
+
+
+def test_flush_discards_buffer(core, prefetcher):
+    prefetcher.start(0)
+    _wait(lambda: prefetcher.buffered == 5)
+    prefetcher.flush()
+    assert prefetcher.buffered == 0
+    assert prefetcher.pop(5) is None
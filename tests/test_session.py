@@ -0,0 +1,47 @@
+# event_recorder/tests/test_session.py
+
+import os
+
+from event_recorder.core.event_logic import EventManager
+from event_recorder.core.event_store import write_events_json
+from event_recorder.core.session import VideoSession
+
+
+def _frames(manager):
+    return [e["highlight_frame"] for e in manager.events]
+
+
+def test_migration_moves_events_out_of_default_file(tmp_path, make_event):
+    root = str(tmp_path / "saved")
+    default = EventManager(save_dir=root, journal=True)
+    for start, video in [(1, "clip"), (2, "other"), (3, "clip")]:
+        default.add_event(make_event(start, video=video))
+    session = VideoSession(save_root=root, default_events=default)
+    try:
+        clip = session._open_events(str(tmp_path / "a" / "clip.mp4"))
+        assert _frames(clip) == [1, 3]
+        assert _frames(default) == [2]
+        # 另一文件夹下的同名视频不会再迁移一次
+        again = session._open_events(str(tmp_path / "b" / "clip.mp4"))
+        assert _frames(again) == []
+        clip.close()
+        again.close()
+    finally:
+        default.close()
+    reloaded = EventManager(save_dir=root, journal=True)
+    assert _frames(reloaded) == [2]
+    reloaded.close()
+
+
+def test_migration_renames_legacy_directory_file(tmp_path, make_event):
+    root = tmp_path / "saved"
+    legacy = root / "clip" / "events.json"
+    legacy.parent.mkdir(parents=True)
+    write_events_json(str(legacy), [make_event(4, video="clip")])
+    session = VideoSession(save_root=str(root))
+    clip = session._open_events(str(tmp_path / "clip.mp4"))
+    try:
+        assert _frames(clip) == [4]
+        assert not legacy.exists() and os.path.exists(str(legacy) + ".migrated")
+    finally:
+        clip.close()